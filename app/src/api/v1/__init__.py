@@ -1,6 +1,16 @@
 from fastapi import APIRouter
 
-from . import anomaly, auth, dataset, forecast, user
+from . import (
+    algorithms,
+    anomaly,
+    auth,
+    dataset,
+    forecast,
+    job,
+    metrics,
+    models,
+    user,
+)
 
 router = APIRouter(prefix="")
 router.include_router(user.router, prefix="/users")
@@ -8,3 +18,7 @@ router.include_router(auth.router, prefix="/auth")
 router.include_router(forecast.router, prefix="/forecasts")
 router.include_router(anomaly.router, prefix="/anomalies")
 router.include_router(dataset.router, prefix="/datasets")
+router.include_router(job.router, prefix="/jobs")
+router.include_router(metrics.router, prefix="/metrics")
+router.include_router(models.router, prefix="/models")
+router.include_router(algorithms.router, prefix="/algorithms")
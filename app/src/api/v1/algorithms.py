@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Response
+
+from auth.auth_bearer import JWTBearer
+from core.config import settings
+from core.params import ParameterRegistry, get_params_registry
+from schemas.auth import AuthJWTSchema
+from schemas.params import AlgorithmParametersSchema
+
+router = APIRouter(
+    tags=[
+        "Algorithms",
+    ]
+)
+
+
+@router.get("/parameters", response_model=AlgorithmParametersSchema)
+async def get_algorithm_parameters(
+    if_none_match: Optional[str] = Header(default=None),
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    registry: ParameterRegistry = Depends(get_params_registry),
+):
+    """Параметры алгоритмов прогнозирования, детекторов и порогов.
+
+    Ответ содержит заголовок ETag; при совпадении If-None-Match
+    возвращается 304 без тела.
+    """
+    etag, content = registry.export()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.PARAMS.MAX_AGE}",
+    }
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in [tag.strip() for tag in if_none_match.split(",")]
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -1,20 +1,46 @@
-from fastapi import APIRouter, Depends
+import asyncio
 
+from fastapi import APIRouter, Depends, WebSocketDisconnect
+from pydantic import ValidationError
+
+from api.v1.job import serialize_job
 from auth.auth_bearer import JWTBearer, get_current_user_from_ws
-from core.manager_ws import ManagerWebSocket, get_anomaly_manager_web_socket
+from core.manager_ws import (
+    ManagerWebSocket,
+    get_anomaly_leaderboard_manager_web_socket,
+    get_anomaly_manager_web_socket,
+    get_anomaly_stream_manager_web_socket,
+)
+from exceptions.base import ServiceException
 from models.base import PydanticObjectId
 from schemas.anomaly import (
+    AnomalyLeaderboardDataSchema,
+    AnomalyLeaderboardSchema,
     AnomalyProgressEnum,
+    AnomalyScoreDataSchema,
+    AnomalyScoreSchema,
+    AnomalySearchDataSchema,
+    AnomalyStreamBatchSchema,
     AnomalyTrainTestDataSchema,
     ResultAnomalyDataListSchema,
     ResultAnomalyListSchema,
     ResultAnomalySchema,
     ResultWebSocketAnomalyDataSchema,
+    ResultWebSocketAnomalyLeaderboardSchema,
     ResultWebSocketAnomalySchema,
+    ResultWebSocketAnomalyStreamSchema,
 )
 from schemas.auth import AuthJWTSchema
+from schemas.base import SearchResultSchema
+from schemas.job import JobSchema, KindJobEnum
 from services.anomaly import get_anomaly_service
-from services.base import BaseAnomalyService
+from services.base import (
+    BaseAnomalyService,
+    BaseAnomalyStreamService,
+    BaseJobService,
+)
+from services.job import get_job_service
+from services.stream import get_anomaly_stream_service
 
 router = APIRouter(
     tags=[
@@ -36,14 +62,23 @@ async def websocket_endpoint(
         body = await manager_ws.ws.receive_json()
         data = AnomalyTrainTestDataSchema(**body)
 
-        result = await service.get_train_test_result(
-            data, auth_data.user_id, manager_ws.set_progress
-        )
+        watcher = asyncio.create_task(manager_ws.watch_disconnect())
+        try:
+            async with manager_ws.progress() as set_progress:
+                result = await service.get_train_test_result(
+                    data,
+                    auth_data.user_id,
+                    set_progress,
+                    cancel_event=manager_ws.cancel_event,
+                )
+        finally:
+            watcher.cancel()
 
         data = ResultWebSocketAnomalySchema(
             status=result.status,
             progress=AnomalyProgressEnum.finish,
             message=result.message,
+            from_cache=result.from_cache,
             data=ResultWebSocketAnomalyDataSchema(
                 params=result.params,
                 train_metrics=result.train_metrics,
@@ -70,7 +105,7 @@ async def train_test(
     service: BaseAnomalyService = Depends(get_anomaly_service),
 ):
 
-    async def set_progress(data: tuple):
+    def set_progress(data: tuple, **info):
         pass
 
     result = await service.get_train_test_result(
@@ -81,6 +116,7 @@ async def train_test(
         status=result.status,
         progress=AnomalyProgressEnum.finish,
         message=result.message,
+        from_cache=result.from_cache,
         data=ResultWebSocketAnomalyDataSchema(
             params=result.params,
             train_metrics=result.train_metrics,
@@ -93,6 +129,135 @@ async def train_test(
     return data
 
 
+@router.websocket("/ws/leaderboard")
+async def websocket_leaderboard(
+    manager_ws: ManagerWebSocket = Depends(
+        get_anomaly_leaderboard_manager_web_socket
+    ),
+    auth_data: AuthJWTSchema = Depends(get_current_user_from_ws),
+    service: BaseAnomalyService = Depends(get_anomaly_service),
+):
+    try:
+        await manager_ws.set_progress(AnomalyProgressEnum.start)
+        body = await manager_ws.ws.receive_json()
+        data = AnomalyLeaderboardDataSchema(**body)
+
+        watcher = asyncio.create_task(manager_ws.watch_disconnect())
+        try:
+            async with manager_ws.progress() as set_progress:
+                leaderboard = await service.get_leaderboard(
+                    data,
+                    auth_data.user_id,
+                    set_progress,
+                    cancel_event=manager_ws.cancel_event,
+                )
+        finally:
+            watcher.cancel()
+
+        data = ResultWebSocketAnomalyLeaderboardSchema(
+            progress=AnomalyProgressEnum.finish, data=leaderboard
+        )
+        await manager_ws.ws.send_text(data.model_dump_json())
+
+    except Exception as e:
+        await manager_ws.send_exception(e)
+
+    finally:
+        await manager_ws.close()
+
+
+@router.post("/leaderboard", response_model=AnomalyLeaderboardSchema)
+async def leaderboard(
+    data: AnomalyLeaderboardDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseAnomalyService = Depends(get_anomaly_service),
+):
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    return await service.get_leaderboard(data, auth_data.user_id, set_progress)
+
+
+@router.post("/search", response_model=SearchResultSchema)
+async def search(
+    data: AnomalySearchDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseAnomalyService = Depends(get_anomaly_service),
+):
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    return await service.search(data, auth_data.user_id, set_progress)
+
+
+@router.websocket("/ws/{anomaly_id}/stream")
+async def websocket_stream(
+    anomaly_id: PydanticObjectId,
+    manager_ws: ManagerWebSocket = Depends(
+        get_anomaly_stream_manager_web_socket
+    ),
+    auth_data: AuthJWTSchema = Depends(get_current_user_from_ws),
+    service: BaseAnomalyStreamService = Depends(get_anomaly_stream_service),
+):
+    """Поиск аномалий в точках, которые клиент отправляет по одной или
+    небольшими пачками.
+
+    Ошибка в одном сообщении не закрывает соединение. Состояние потока
+    сохраняется в БД при отключении клиента.
+    """
+    stream = None
+    try:
+        stream = await service.attach(auth_data.user_id, anomaly_id)
+        while True:
+            body = await manager_ws.ws.receive_json()
+            try:
+                data = AnomalyStreamBatchSchema(**body)
+                result = await stream.process(data)
+            except (ServiceException, ValidationError) as e:
+                await manager_ws.send_exception(e)
+                continue
+
+            data = ResultWebSocketAnomalyStreamSchema(data=result)
+            await manager_ws.ws.send_text(data.model_dump_json())
+
+    except WebSocketDisconnect:
+        manager_ws.cancel_event.set()
+
+    except Exception as e:
+        await manager_ws.send_exception(e)
+
+    finally:
+        if stream:
+            await stream.checkpoint()
+        await manager_ws.close()
+
+
+@router.post("/{anomaly_id}/score", response_model=AnomalyScoreSchema)
+async def score(
+    anomaly_id: PydanticObjectId,
+    data: AnomalyScoreDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseAnomalyService = Depends(get_anomaly_service),
+):
+    return await service.score(data, auth_data.user_id, anomaly_id)
+
+
+@router.post("/jobs", response_model=JobSchema, status_code=202)
+async def submit_job(
+    data: AnomalyTrainTestDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseJobService = Depends(get_job_service),
+):
+    job = await service.submit(
+        kind=KindJobEnum.anomaly,
+        params=data.model_dump(mode="json"),
+        user_id=auth_data.user_id,
+    )
+    return serialize_job(job)
+
+
 @router.get("", response_model=ResultAnomalyListSchema)
 async def get_list_history(
     auth_data: AuthJWTSchema = Depends(JWTBearer()),
@@ -128,11 +293,14 @@ async def get_detail_history(
         id=obj.id,
         status=obj.status,
         message=obj.message,
+        from_cache=obj.from_cache,
         params=obj.params,
         train_metrics=obj.train_metrics,
         test_metrics=obj.test_metrics,
         test_ts=obj.test_ts,
         test_pred=obj.test_pred,
         test_labels=obj.test_labels,
+        duration=obj.duration,
+        peak_memory=obj.peak_memory,
     )
     return data
@@ -25,6 +25,9 @@ async def upload_dataset(
         id=str(obj.id),
         file_name=obj.file_name,
         columns=obj.columns,
+        size=obj.size,
+        rows=obj.rows,
+        profile=obj.profile.model_dump() if obj.profile else None,
         created_at=obj.created_at,
     )
 
@@ -42,6 +45,9 @@ async def get_user_datasets(
                 id=str(obj.id),
                 file_name=obj.file_name,
                 columns=obj.columns,
+                size=obj.size,
+                rows=obj.rows,
+                profile=obj.profile.model_dump() if obj.profile else None,
                 created_at=obj.created_at,
             )
         )
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, Depends
+import asyncio
 
+from fastapi import APIRouter, Depends, WebSocketDisconnect
+from pydantic import ValidationError
+
+from api.v1.job import serialize_job
 from auth.auth_bearer import JWTBearer, get_current_user_from_ws
-from core.manager_ws import ManagerWebSocket, get_forecast_manager_web_socket
+from core.manager_ws import (
+    ManagerWebSocket,
+    get_forecast_leaderboard_manager_web_socket,
+    get_forecast_manager_web_socket,
+    get_forecast_predict_manager_web_socket,
+)
+from exceptions.base import ServiceException
 from models.base import PydanticObjectId
 from schemas import TrainTestDataSchema
 from schemas.auth import AuthJWTSchema
+from schemas.base import SearchResultSchema, TimeseriesSchema
 from schemas.forecast import (
+    ForecastBacktestDataSchema,
+    ForecastBacktestSchema,
+    ForecastBatchDataSchema,
+    ForecastBatchSchema,
+    ForecastLeaderboardDataSchema,
+    ForecastLeaderboardSchema,
+    ForecastPredictDataSchema,
     ForecastProgressEnum,
+    ForecastSearchDataSchema,
     ResultForecastDataListSchema,
     ResultForecastListSchema,
     ResultForecastSchema,
     ResultWebSocketForecastDataSchema,
+    ResultWebSocketForecastLeaderboardSchema,
+    ResultWebSocketForecastPredictSchema,
     ResultWebSocketForecastSchema,
 )
-from services.base import BaseForecastService
+from schemas.job import JobSchema, KindJobEnum
+from services.base import BaseForecastService, BaseJobService
 from services.forecast import get_forecast_service
+from services.job import get_job_service
 
 router = APIRouter(
     tags=[
@@ -36,14 +59,23 @@ async def websocket_endpoint(
         body = await manager_ws.ws.receive_json()
         data = TrainTestDataSchema(**body)
 
-        result = await service.get_train_test_result(
-            data, auth_data.user_id, manager_ws.set_progress
-        )
+        watcher = asyncio.create_task(manager_ws.watch_disconnect())
+        try:
+            async with manager_ws.progress() as set_progress:
+                result = await service.get_train_test_result(
+                    data,
+                    auth_data.user_id,
+                    set_progress,
+                    cancel_event=manager_ws.cancel_event,
+                )
+        finally:
+            watcher.cancel()
 
         data = ResultWebSocketForecastSchema(
             status=result.status,
             progress=ForecastProgressEnum.finish,
             message=result.message,
+            from_cache=result.from_cache,
             data=ResultWebSocketForecastDataSchema(
                 params=result.params,
                 train_metrics=result.train_metrics,
@@ -70,7 +102,7 @@ async def train_test(
     service: BaseForecastService = Depends(get_forecast_service),
 ):
 
-    async def set_progress(data: tuple):
+    def set_progress(data: tuple, **info):
         pass
 
     result = await service.get_train_test_result(
@@ -81,6 +113,7 @@ async def train_test(
         status=result.status,
         progress=ForecastProgressEnum.finish,
         message=result.message,
+        from_cache=result.from_cache,
         data=ResultWebSocketForecastDataSchema(
             params=result.params,
             train_metrics=result.train_metrics,
@@ -93,6 +126,187 @@ async def train_test(
     return data
 
 
+@router.websocket("/ws/leaderboard")
+async def websocket_leaderboard(
+    manager_ws: ManagerWebSocket = Depends(
+        get_forecast_leaderboard_manager_web_socket
+    ),
+    auth_data: AuthJWTSchema = Depends(get_current_user_from_ws),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+    try:
+        await manager_ws.set_progress(ForecastProgressEnum.start)
+        body = await manager_ws.ws.receive_json()
+        data = ForecastLeaderboardDataSchema(**body)
+
+        watcher = asyncio.create_task(manager_ws.watch_disconnect())
+        try:
+            async with manager_ws.progress() as set_progress:
+                leaderboard = await service.get_leaderboard(
+                    data,
+                    auth_data.user_id,
+                    set_progress,
+                    cancel_event=manager_ws.cancel_event,
+                )
+        finally:
+            watcher.cancel()
+
+        data = ResultWebSocketForecastLeaderboardSchema(
+            progress=ForecastProgressEnum.finish, data=leaderboard
+        )
+        await manager_ws.ws.send_text(data.model_dump_json())
+
+    except Exception as e:
+        await manager_ws.send_exception(e)
+
+    finally:
+        await manager_ws.close()
+
+
+@router.post("/leaderboard", response_model=ForecastLeaderboardSchema)
+async def leaderboard(
+    data: ForecastLeaderboardDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    return await service.get_leaderboard(data, auth_data.user_id, set_progress)
+
+
+@router.post("/search", response_model=SearchResultSchema)
+async def search(
+    data: ForecastSearchDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    return await service.search(data, auth_data.user_id, set_progress)
+
+
+@router.post("/backtest", response_model=ForecastBacktestSchema)
+async def backtest(
+    data: ForecastBacktestDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    return await service.backtest(data, auth_data.user_id, set_progress)
+
+
+def serialize_batch(obj) -> ForecastBatchSchema:
+    return ForecastBatchSchema(
+        id=str(obj.id),
+        status=obj.status,
+        message=obj.message,
+        params=obj.params,
+        series=obj.series,
+        forecast=obj.forecast,
+        duration=obj.duration,
+        created_at=obj.created_at,
+    )
+
+
+@router.post("/batch", response_model=ForecastBatchSchema)
+async def batch(
+    data: ForecastBatchDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+    """Обучить алгоритм на каждом ряде датасета за один запрос."""
+
+    def set_progress(data: tuple, **info):
+        pass
+
+    result = await service.batch(data, auth_data.user_id, set_progress)
+    return serialize_batch(result)
+
+
+@router.get("/batch/{batch_id}", response_model=ForecastBatchSchema)
+async def get_batch(
+    batch_id: PydanticObjectId,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+    obj = await service.get_batch_by_id(
+        user_id=auth_data.user_id, batch_id=batch_id
+    )
+    return serialize_batch(obj)
+
+
+@router.websocket("/ws/{forecast_id}/predict")
+async def websocket_predict(
+    forecast_id: PydanticObjectId,
+    manager_ws: ManagerWebSocket = Depends(
+        get_forecast_predict_manager_web_socket
+    ),
+    auth_data: AuthJWTSchema = Depends(get_current_user_from_ws),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+    """Прогноз по каждому полученному сообщению в рамках одного соединения.
+
+    Ошибка в одном запросе не закрывает соединение, модель остается
+    загруженной между запросами.
+    """
+    try:
+        while True:
+            body = await manager_ws.ws.receive_json()
+            try:
+                data = ForecastPredictDataSchema(**body)
+                forecast = await service.predict(
+                    data, auth_data.user_id, forecast_id
+                )
+            except (ServiceException, ValidationError) as e:
+                await manager_ws.send_exception(e)
+                continue
+
+            data = ResultWebSocketForecastPredictSchema(
+                progress=ForecastProgressEnum.finish, data=forecast
+            )
+            await manager_ws.ws.send_text(data.model_dump_json())
+
+    except WebSocketDisconnect:
+        manager_ws.cancel_event.set()
+
+    except Exception as e:
+        await manager_ws.send_exception(e)
+
+    finally:
+        await manager_ws.close()
+
+
+@router.post("/{forecast_id}/predict", response_model=TimeseriesSchema)
+async def predict(
+    forecast_id: PydanticObjectId,
+    data: ForecastPredictDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseForecastService = Depends(get_forecast_service),
+):
+    return await service.predict(data, auth_data.user_id, forecast_id)
+
+
+@router.post("/jobs", response_model=JobSchema, status_code=202)
+async def submit_job(
+    data: TrainTestDataSchema,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseJobService = Depends(get_job_service),
+):
+    job = await service.submit(
+        kind=KindJobEnum.forecast,
+        params=data.model_dump(mode="json"),
+        user_id=auth_data.user_id,
+    )
+    return serialize_job(job)
+
+
 @router.get("", response_model=ResultForecastListSchema)
 async def get_list_history(
     auth_data: AuthJWTSchema = Depends(JWTBearer()),
@@ -128,11 +342,14 @@ async def get_detail_history(
         id=obj.id,
         status=obj.status,
         message=obj.message,
+        from_cache=obj.from_cache,
         params=obj.params,
         train_metrics=obj.train_metrics,
         test_metrics=obj.test_metrics,
         test_ts=obj.test_ts,
         train_ts=obj.train_ts,
         exog_ts=obj.exog_ts,
+        duration=obj.duration,
+        peak_memory=obj.peak_memory,
     )
     return data
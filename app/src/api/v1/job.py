@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, WebSocket
+from starlette.websockets import WebSocketDisconnect
+
+from auth.auth_bearer import JWTBearer, get_current_user_from_ws
+from core.config import settings
+from core.progress import get_progress_bus
+from exceptions.base import ServiceException
+from models.base import PydanticObjectId
+from models.job import TrainingJob
+from schemas.auth import AuthJWTSchema
+from schemas.job import JobSchema, StatusJobEnum
+from services.base import BaseJobService
+from services.job import get_job_service, job_progress_topic
+
+router = APIRouter(
+    tags=[
+        "Job",
+    ]
+)
+
+
+def serialize_job(job: TrainingJob) -> JobSchema:
+    return JobSchema(
+        id=str(job.id),
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        detail=job.detail,
+        result_id=str(job.result_id) if job.result_id else None,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job(
+    job_id: PydanticObjectId,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseJobService = Depends(get_job_service),
+):
+    job = await service.get_users_job(user_id=auth_data.user_id, job_id=job_id)
+    return serialize_job(job)
+
+
+@router.post("/{job_id}/cancel", response_model=JobSchema)
+async def cancel_job(
+    job_id: PydanticObjectId,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseJobService = Depends(get_job_service),
+):
+    job = await service.cancel(user_id=auth_data.user_id, job_id=job_id)
+    return serialize_job(job)
+
+
+@router.websocket("/ws/{job_id}")
+async def subscribe_job(
+    job_id: PydanticObjectId,
+    websocket: WebSocket,
+    auth_data: AuthJWTSchema = Depends(get_current_user_from_ws),
+    service: BaseJobService = Depends(get_job_service),
+):
+    """Отправлять состояние задачи при каждом изменении до ее завершения.
+
+    Задача перечитывается после события прогресса из шины (при
+    PROGRESS_FANOUT события приходят из процесса worker.py) или по
+    истечении JOBS_POLL_INTERVAL.
+    """
+    last_sent = None
+    code = 1000
+    try:
+        async with get_progress_bus().subscribe(
+            job_progress_topic(job_id), fanout=True
+        ) as subscription:
+            while True:
+                job = await service.get_users_job(
+                    user_id=auth_data.user_id, job_id=job_id
+                )
+                data = serialize_job(job).model_dump_json()
+                if data != last_sent:
+                    await websocket.send_text(data)
+                    last_sent = data
+                if job.status not in (
+                    StatusJobEnum.queued,
+                    StatusJobEnum.process,
+                ):
+                    break
+                await subscription.wait(timeout=settings.JOBS.POLL_INTERVAL)
+                subscription.drain()
+    except WebSocketDisconnect:
+        return
+    except ServiceException as e:
+        await websocket.send_json({"detail": [{"msg": e.msg}]})
+        code = 4000
+
+    await websocket.close(code=code)
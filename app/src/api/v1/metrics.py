@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends
+
+from auth.auth_bearer import JWTBearer
+from core.executor import TrainingExecutor, get_training_executor
+from core.progress import ProgressBus, get_progress_bus
+from core.scheduler import TrainingScheduler, get_training_scheduler
+from core.startup import startup_stats
+from schemas.auth import AuthJWTSchema
+from schemas.cache import TrainingCacheStatsSchema
+from schemas.dataset import DatasetCacheStatsSchema
+from schemas.progress import ProgressStatsSchema
+from schemas.registry import ModelCacheStatsSchema
+from schemas.scheduler import SchedulerStatsSchema
+from schemas.startup import StartupStatsSchema
+from schemas.threads import ThreadStatsSchema
+from services.base import BaseModelRegistryService, BaseTrainingCacheService
+from services.cache import get_training_cache_service
+from services.registry import get_model_registry_service
+from utils.columnar import parsed_datasets
+
+router = APIRouter(
+    tags=[
+        "Metrics",
+    ]
+)
+
+
+@router.get("/cache", response_model=TrainingCacheStatsSchema)
+async def get_cache_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseTrainingCacheService = Depends(get_training_cache_service),
+):
+    return await service.get_stats()
+
+
+@router.get("/models", response_model=ModelCacheStatsSchema)
+async def get_models_cache_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseModelRegistryService = Depends(get_model_registry_service),
+):
+    return service.get_cache_stats()
+
+
+@router.get("/datasets", response_model=DatasetCacheStatsSchema)
+async def get_datasets_cache_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+):
+    return parsed_datasets.stats()
+
+
+@router.get("/scheduler", response_model=SchedulerStatsSchema)
+async def get_scheduler_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    scheduler: TrainingScheduler = Depends(get_training_scheduler),
+):
+    return scheduler.get_stats()
+
+
+@router.get("/threads", response_model=ThreadStatsSchema)
+async def get_thread_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    executor: TrainingExecutor = Depends(get_training_executor),
+):
+    return executor.get_thread_stats()
+
+
+@router.get("/startup", response_model=StartupStatsSchema)
+async def get_startup_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+):
+    return startup_stats.as_dict()
+
+
+@router.get("/progress", response_model=ProgressStatsSchema)
+async def get_progress_stats(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    bus: ProgressBus = Depends(get_progress_bus),
+):
+    return bus.get_stats()
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+
+from auth.auth_bearer import JWTBearer
+from models.base import PydanticObjectId
+from models.registry import RegisteredModel
+from schemas.auth import AuthJWTSchema
+from schemas.registry import ListRegisteredModelsSchema, RegisteredModelSchema
+from services.base import BaseModelRegistryService
+from services.registry import get_model_registry_service
+
+router = APIRouter(
+    tags=[
+        "Models",
+    ]
+)
+
+
+def serialize_model(obj: RegisteredModel) -> RegisteredModelSchema:
+    return RegisteredModelSchema(
+        id=str(obj.id),
+        result_id=str(obj.result_id),
+        kind=obj.kind,
+        algorithm=obj.algorithm,
+        version=obj.version,
+        size=obj.size,
+        training_time=obj.training_time,
+        dataset_hash=obj.dataset_hash,
+        params=obj.params,
+        created_at=obj.created_at,
+    )
+
+
+@router.get("", response_model=ListRegisteredModelsSchema)
+async def get_user_models(
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseModelRegistryService = Depends(get_model_registry_service),
+):
+    result = await service.get_users_models(user_id=auth_data.user_id)
+    data = []
+    async for obj in result:
+        data.append(serialize_model(obj))
+    return ListRegisteredModelsSchema(data=data)
+
+
+@router.get("/{model_id}", response_model=RegisteredModelSchema)
+async def get_user_model(
+    model_id: PydanticObjectId,
+    auth_data: AuthJWTSchema = Depends(JWTBearer()),
+    service: BaseModelRegistryService = Depends(get_model_registry_service),
+):
+    obj = await service.get_users_model(
+        user_id=auth_data.user_id, model_id=model_id
+    )
+    return serialize_model(obj)
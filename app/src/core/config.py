@@ -13,14 +13,51 @@ class MongoCollections:
     PROFILES = "profiles"
     AUTH = "auth"
     FORECAST = "forecast"
+    FORECAST_BATCH = "forecast_batch"
     DATASET = "dataset"
     ANOMALY = "anomaly"
+    JOBS = "jobs"
+    TRAINING_CACHE = "training_cache"
+    TRAINING_CACHE_STATS = "training_cache_stats"
+    MODELS = "models"
+    MODEL_VERSIONS = "model_versions"
+    ANOMALY_STREAMS = "anomaly_streams"
+    PROGRESS_EVENTS = "progress_events"
 
 
 class FileStorage:
     PATH: str = os.path.dirname(BASE_DIR) + "/src/file_storage"
 
 
+class UploadConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="UPLOAD_")
+
+    # Максимальный размер загружаемого датасета в мегабайтах, 0 - без
+    # ограничения
+    MAX_SIZE_MB: int = 1024
+    # Размер блока, которым файл записывается на диск
+    CHUNK_SIZE: int = 1024 * 1024
+    # Преобразование датасета в Parquet в фоне после загрузки; обучение
+    # читает из копии только нужные колонки
+    COLUMNAR: bool = True
+    COLUMNAR_CHUNK_ROWS: int = 100_000
+    # Числовые колонки в файлах .npy, которые процессы обучения отображают
+    # в память; тип значений - float64 или float32
+    COLUMN_STORE: bool = True
+    COLUMN_STORE_DTYPE: str = "float64"
+    # Профиль датасета (строки, интервал и частота меток времени,
+    # статистика колонок) в документе датасета
+    PROFILE: bool = True
+
+
+class DatasetConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="DATASET_")
+
+    # Ограничения кэша разобранных датасетов в памяти процесса
+    CACHE_MAX_MB: int = 512
+    CACHE_MAX_ITEMS: int = 16
+
+
 class JWTConfig:
     REFRESH_TOKEN_EXPIRE_DAYS: int = 3
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -36,6 +73,128 @@ class EmailConfig(BaseSettings):
     DEFAULT_FROM_EMAIL: str = ""
 
 
+class TrainingConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="TRAINING_")
+
+    # Количество процессов, в которых выполняется обучение моделей
+    POOL_SIZE: int = os.cpu_count() or 1
+    START_METHOD: str = "spawn"
+    # Ограничения одной задачи обучения: время в секундах и резидентная
+    # память процесса-воркера в мегабайтах, 0 - без ограничения
+    TIMEOUT: int = 3600
+    MEMORY_LIMIT_MB: int = 4096
+    MEMORY_CHECK_INTERVAL: float = 0.5
+    # Потоки torch, BLAS и оценщиков одной задачи обучения, 0 - доступные
+    # ядра, поделенные между процессами пула; при CPU_AFFINITY каждый
+    # процесс привязывается к своим ядрам
+    THREADS_PER_JOB: int = 0
+    CPU_AFFINITY: bool = False
+    # Ход обучения (эпохи, loss) отправляется не чаще одного раза
+    # в PROGRESS_INTERVAL секунд, время обучения моделей без эпох -
+    # раз в PROGRESS_HEARTBEAT секунд (0 - не отправлять)
+    PROGRESS_INTERVAL: float = 0.5
+    PROGRESS_HEARTBEAT: float = 5
+    # Импорт всех алгоритмов в процессах обучения при запуске и, при
+    # WARMUP_FIT, обучение каждого на коротком синтетическом ряде
+    PRELOAD: bool = True
+    WARMUP_FIT: bool = False
+    # Ограничения поиска параметров алгоритмов
+    SEARCH_MAX_TRIALS: int = 100
+    SEARCH_MIN_ROWS: int = 50
+    # Максимальное количество рядов в одном пакетном прогнозе
+    BATCH_MAX_SERIES: int = 500
+
+
+class SchedulerConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="SCHEDULER_")
+
+    # Сколько обучений выполняется одновременно всего и у одного
+    # пользователя (задача с несколькими обучениями занимает несколько мест)
+    MAX_RUNNING: int = os.cpu_count() or 1
+    USER_MAX_RUNNING: int = 2
+    # При большем количестве ожидающих задач запрос отклоняется с кодом 503
+    MAX_QUEUE: int = 100
+    RETRY_AFTER: int = 30
+    # Веса пользователей при распределении очереди, по умолчанию 1
+    USER_WEIGHTS: dict[str, float] = {}
+
+
+class JobsConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="JOBS_")
+
+    # Количество задач, одновременно выполняемых одним процессом worker.py
+    WORKER_CONCURRENCY: int = 1
+    POLL_INTERVAL: float = 1.0
+    HEARTBEAT_INTERVAL: int = 10
+    # Через сколько секунд без heartbeat задача возвращается в очередь
+    STALE_TIMEOUT: int = 120
+    MAX_ATTEMPTS: int = 3
+
+
+class CacheConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+    # Кэш результатов обучения по хэшу датасета и параметров
+    ENABLED: bool = True
+    MODELS_PATH: str = "data/cache"
+    MAX_ENTRIES: int = 1000
+    MAX_SIZE_MB: int = 2048
+    MAX_AGE_DAYS: int = 30
+
+
+class RegistryConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="REGISTRY_")
+
+    # Папка с обученными моделями пользователей
+    PATH: str = "data/models"
+    # Ограничения кэша загруженных моделей в памяти процесса
+    CACHE_MAX_MB: int = 512
+    CACHE_MAX_ITEMS: int = 32
+
+
+class ScoringConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="SCORING_")
+
+    # Размер части датасета при поиске аномалий обученной моделью
+    CHUNK_ROWS: int = 50000
+    # Сколько строк предыдущей части передается детектору как история
+    CONTEXT_ROWS: int = 100
+
+
+class StreamConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="STREAM_")
+
+    # Сколько последних точек и оценок потока хранится в состоянии
+    HISTORY_ROWS: int = 200
+    # Сколько первых точек потока накапливается перед первой оценкой
+    WARMUP_ROWS: int = 10
+    # Состояние сохраняется в БД после указанного количества точек
+    # или по истечении интервала в секундах
+    CHECKPOINT_POINTS: int = 100
+    CHECKPOINT_INTERVAL: int = 30
+
+
+class ProgressConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PROGRESS_")
+
+    # Дублировать события прогресса в MongoDB, чтобы их получали
+    # подписчики в других процессах (API и worker.py)
+    FANOUT: bool = False
+    # Интервал опроса MongoDB подписчиком в секундах
+    POLL_INTERVAL: float = 0.5
+    # Через сколько секунд события удаляются из MongoDB
+    TTL: int = 3600
+
+
+class ParamsConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PARAMS_")
+
+    # Папка с описанием параметров алгоритмов (python -m core.params)
+    PATH: str = os.path.join(BASE_DIR, "algorithm_params")
+    # Сколько секунд клиент может не перепроверять описание параметров
+    MAX_AGE: int = 3600
+
+
 class MongoDB(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="MONGODB_")
 
@@ -62,6 +221,17 @@ class Settings(BaseSettings):
     EMAIL: EmailConfig = EmailConfig()
     JWT: JWTConfig = JWTConfig()
     FILE_STORAGE: FileStorage = FileStorage()
+    UPLOAD: UploadConfig = UploadConfig()
+    DATASET: DatasetConfig = DatasetConfig()
+    TRAINING: TrainingConfig = TrainingConfig()
+    JOBS: JobsConfig = JobsConfig()
+    SCHEDULER: SchedulerConfig = SchedulerConfig()
+    CACHE: CacheConfig = CacheConfig()
+    REGISTRY: RegistryConfig = RegistryConfig()
+    SCORING: ScoringConfig = ScoringConfig()
+    STREAM: StreamConfig = StreamConfig()
+    PARAMS: ParamsConfig = ParamsConfig()
+    PROGRESS: ProgressConfig = ProgressConfig()
 
 
 settings = Settings()
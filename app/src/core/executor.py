@@ -0,0 +1,473 @@
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from core.threads import (
+    CpuAllocation,
+    CpuBudget,
+    apply_allocation,
+    available_cpus,
+    job_threads,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingCancelledError(Exception):
+    """Вычисления отменены до завершения."""
+
+
+class TrainingLimitError(Exception):
+    """Задача превысила ограничение ресурсов и была остановлена."""
+
+
+class TrainingTimeoutError(TrainingLimitError):
+    pass
+
+
+class TrainingMemoryError(TrainingLimitError):
+    pass
+
+
+class ResourceUsage:
+    """Ресурсы, израсходованные задачей в процессе-воркере."""
+
+    def __init__(self) -> None:
+        self.duration: Optional[float] = None
+        # Пиковый объем резидентной памяти процесса-воркера в байтах
+        self.peak_memory: Optional[int] = None
+
+    def update_peak(self, value: Optional[int]):
+        if value is not None:
+            self.peak_memory = max(self.peak_memory or 0, value)
+
+
+def read_memory(pid="self", field: str = "VmRSS") -> Optional[int]:
+    """Прочитать объем памяти процесса из /proc в байтах.
+
+    `VmRSS` - текущий объем резидентной памяти, `VmHWM` - пиковый. Вне
+    Linux возвращается None.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def _reset_peak_memory() -> None:
+    """Сбросить VmHWM, чтобы пик памяти считался для каждой задачи."""
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+class ProgressReporter:
+    """Передает события прогресса из процесса-воркера в основной процесс.
+
+    Может вызываться из нескольких потоков воркера (например, монитором
+    обучения).
+    """
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def __call__(self, progress: Any, **info) -> None:
+        with self.lock:
+            self.conn.send(("progress", (progress, info)))
+
+
+def _picklable_exception(exc: Exception) -> Exception:
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+def _worker_main(
+    conn,
+    initializer: Optional[Callable] = None,
+    allocation: Optional[CpuAllocation] = None,
+) -> None:
+    """Цикл процесса-воркера: получает задачи и отправляет результат.
+
+    Перед первой задачей выполняется `initializer`, его результат и
+    длительность отправляются в основной процесс сообщением `ready`.
+    Инициализация и задачи выполняются в пределах выделения ядер
+    `allocation`.
+    """
+    if allocation is not None:
+        apply_allocation(allocation)
+    if initializer is not None:
+        started = time.monotonic()
+        try:
+            report = initializer()
+        except Exception as e:
+            logger.exception("Ошибка при инициализации процесса обучения")
+            report = {"error": f"{type(e).__name__}: {e}"}
+        conn.send(("ready", (round(time.monotonic() - started, 3), report)))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        func, args, kwargs = task
+        _reset_peak_memory()
+        try:
+            with job_threads(allocation):
+                result = func(
+                    *args, set_progress=ProgressReporter(conn), **kwargs
+                )
+        except Exception as e:
+            logger.exception("Ошибка при выполнении задачи обучения")
+            conn.send(("peak_memory", read_memory(field="VmHWM")))
+            conn.send(("error", _picklable_exception(e)))
+            continue
+
+        conn.send(("peak_memory", read_memory(field="VmHWM")))
+        try:
+            conn.send(("result", result))
+        except Exception as e:
+            conn.send(("error", _picklable_exception(e)))
+
+
+class _Worker:
+    def __init__(
+        self,
+        context,
+        initializer: Optional[Callable] = None,
+        allocation: Optional[CpuAllocation] = None,
+    ) -> None:
+        self.allocation = allocation
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, initializer, allocation),
+            name="training-worker",
+        )
+        self.process.start()
+        child_conn.close()
+        # Воркер без инициализатора готов сразу после запуска
+        self.ready = initializer is None
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class TrainingExecutor:
+    """Пул процессов для обучения моделей вне event loop.
+
+    Блокирующие вызовы Merlion выполняются в отдельных процессах, а события
+    прогресса передаются обратно через pipe и публикуются через `set_progress`.
+    Задача, которая выполняется дольше `timeout` секунд или занимает больше
+    `memory_limit` байт резидентной памяти, останавливается вместе с
+    процессом-воркером. Каждый процесс-воркер, в том числе заменяющий
+    остановленный, перед первой задачей выполняет `initializer` (например,
+    импорт алгоритмов); это время не входит в ограничение времени задачи.
+    Если задан `cpu_budget`, каждый процесс-воркер получает свою долю ядер,
+    которой ограничиваются потоки torch, BLAS и оценщиков.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        start_method: str = "spawn",
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        memory_check_interval: float = 0.5,
+        initializer: Optional[Callable] = None,
+        cpu_budget: Optional[CpuBudget] = None,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.initializer = initializer
+        self.cpu_budget = cpu_budget
+        self.timeout = timeout or None
+        self.memory_limit = memory_limit or None
+        self.memory_check_interval = memory_check_interval
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: list[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        # Потоки для блокирующего чтения и записи pipe воркеров. Отдельный
+        # пул, чтобы обучение не занимало потоки пула по умолчанию, нужные
+        # `asyncio.to_thread` (загрузка файлов, прогноз, оценка). Запас на
+        # ожидание остановленного воркера, пока его заменяет новый.
+        self._io: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        self._idle = asyncio.Queue()
+        self._io = ThreadPoolExecutor(
+            max_workers=2 * self.max_workers,
+            thread_name_prefix="training-io",
+        )
+        for slot in range(self.max_workers):
+            worker = _Worker(
+                self._context,
+                self.initializer,
+                self.cpu_budget.allocation(slot) if self.cpu_budget else None,
+            )
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+        logger.info(
+            f"Запущено процессов обучения: {self.max_workers}"
+            + (
+                f", потоков на задачу: {self.cpu_budget.threads}"
+                if self.cpu_budget
+                else ""
+            )
+        )
+
+    def get_thread_stats(self) -> dict:
+        """Распределение ядер между процессами обучения."""
+        if self.cpu_budget is not None:
+            return self.cpu_budget.get_stats()
+        return {
+            "cpus": len(available_cpus()),
+            "slots": self.max_workers,
+            "threads_per_job": None,
+            "affinity": False,
+        }
+
+    async def wait_ready(self):
+        """Дождаться инициализации всех процессов-воркеров."""
+        workers = [await self._idle.get() for _ in range(len(self._workers))]
+        try:
+            await asyncio.gather(
+                *[self._wait_ready(worker) for worker in workers]
+            )
+        finally:
+            for worker in workers:
+                self._release(worker)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers.clear()
+        if self._io is not None:
+            self._io.shutdown(wait=False, cancel_futures=True)
+            self._io = None
+
+    async def run(
+        self,
+        func: Callable,
+        *args,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+        usage: Optional[ResourceUsage] = None,
+        **kwargs,
+    ) -> Any:
+        """Выполнить `func(*args, set_progress=..., **kwargs)` в воркере.
+
+        `func` должна быть доступна для pickle, а `set_progress` внутри
+        воркера и в процессе приложения является синхронной функцией. При
+        установке `cancel_event` процесс-воркер завершается сразу, а вызов
+        завершается исключением `TrainingCancelledError`. При превышении
+        ограничений времени или памяти вызов завершается исключением
+        `TrainingTimeoutError` или `TrainingMemoryError`. Длительность и
+        пик памяти задачи записываются в `usage`.
+        """
+        usage = usage if usage is not None else ResourceUsage()
+        worker = await self._acquire(cancel_event)
+        try:
+            await self._wait_ready(worker)
+        except Exception:
+            self._release(worker)
+            raise
+
+        started = time.monotonic()
+        try:
+            execution = asyncio.ensure_future(
+                self._execute(worker, func, args, kwargs, set_progress, usage)
+            )
+            monitor = asyncio.ensure_future(self._monitor(worker, usage))
+            waits = {execution, monitor}
+            if cancel_event is not None:
+                cancelled = asyncio.ensure_future(cancel_event.wait())
+                waits.add(cancelled)
+            try:
+                done, pending = await asyncio.wait(
+                    waits,
+                    timeout=self.timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            except BaseException:
+                # Ожидающая задача отменена (например, при остановке
+                # приложения), а воркер еще занят: чтение его pipe не должно
+                # достаться следующей задаче, поэтому воркер останавливается
+                # и заменяется при освобождении
+                worker.kill()
+                for task in waits:
+                    task.cancel()
+                raise
+            for task in pending - {execution}:
+                task.cancel()
+            if execution in done:
+                return execution.result()
+
+            worker.kill()
+            try:
+                await execution
+            except Exception:
+                pass
+            if monitor in done:
+                raise TrainingMemoryError(
+                    f"Превышено ограничение памяти "
+                    f"({self.memory_limit // 2**20} МБ)."
+                )
+            if not done:
+                raise TrainingTimeoutError(
+                    f"Превышено ограничение времени обучения "
+                    f"({self.timeout:g} с)."
+                )
+            raise TrainingCancelledError()
+        finally:
+            usage.duration = round(time.monotonic() - started, 3)
+            self._release(worker)
+
+    def _release(self, worker: _Worker):
+        if not worker.is_alive():
+            worker = self._replace(worker)
+        self._idle.put_nowait(worker)
+
+    async def _wait_ready(self, worker: _Worker):
+        if worker.ready:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            _, (duration, report) = await loop.run_in_executor(
+                self._io, worker.conn.recv
+            )
+        except EOFError:
+            raise RuntimeError("Процесс обучения завершился при запуске.")
+        worker.ready = True
+
+        timings = sorted(
+            (
+                (value, name)
+                for name, value in report.items()
+                if isinstance(value, (int, float))
+            ),
+            reverse=True,
+        )
+        slowest = ", ".join(
+            f"{name} {value:g} с" for value, name in timings[:3]
+        )
+        logger.info(
+            f"Процесс обучения {worker.process.pid} подготовлен за "
+            f"{duration:g} с"
+            + (f" (дольше всего: {slowest})" if slowest else "")
+        )
+        failed = [
+            name for name, value in report.items() if isinstance(value, str)
+        ]
+        if failed:
+            logger.warning(
+                f"Процесс обучения {worker.process.pid} не подготовил: "
+                f"{', '.join(failed)}"
+            )
+
+    async def _acquire(self, cancel_event: Optional[asyncio.Event]) -> _Worker:
+        if cancel_event is None:
+            return await self._idle.get()
+
+        acquire = asyncio.ensure_future(self._idle.get())
+        cancelled = asyncio.ensure_future(cancel_event.wait())
+        await asyncio.wait(
+            {acquire, cancelled}, return_when=asyncio.FIRST_COMPLETED
+        )
+        cancelled.cancel()
+        if acquire.done():
+            if not cancel_event.is_set():
+                return acquire.result()
+            self._idle.put_nowait(acquire.result())
+        else:
+            acquire.cancel()
+        raise TrainingCancelledError()
+
+    async def _monitor(self, worker: _Worker, usage: ResourceUsage) -> None:
+        """Следить за памятью воркера и завершиться при превышении лимита."""
+        while True:
+            memory = read_memory(worker.process.pid)
+            usage.update_peak(memory)
+            if (
+                self.memory_limit
+                and memory is not None
+                and memory > self.memory_limit
+            ):
+                return
+            await asyncio.sleep(self.memory_check_interval)
+
+    async def _execute(
+        self, worker: _Worker, func, args, kwargs, set_progress, usage
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._io, worker.conn.send, (func, args, kwargs)
+        )
+
+        while True:
+            try:
+                kind, payload = await loop.run_in_executor(
+                    self._io, worker.conn.recv
+                )
+            except EOFError:
+                raise RuntimeError("Процесс обучения завершился аварийно.")
+
+            if kind == "progress":
+                progress, info = payload
+                try:
+                    set_progress(progress, **info)
+                except Exception:
+                    logger.warning("Не удалось отправить прогресс обучения")
+            elif kind == "peak_memory":
+                usage.update_peak(payload)
+            elif kind == "result":
+                return payload
+            else:
+                raise payload
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.stop()
+        self._workers.remove(worker)
+        new_worker = _Worker(
+            self._context, self.initializer, worker.allocation
+        )
+        self._workers.append(new_worker)
+        return new_worker
+
+
+training_executor: Optional[TrainingExecutor] = None
+
+
+def get_training_executor() -> TrainingExecutor:
+    return training_executor
@@ -1,17 +1,31 @@
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
 from enum import Enum
 
 from fastapi import WebSocket
 from pydantic import BaseModel, ValidationError
 
+from core.progress import Subscription, get_progress_bus
 from exceptions.base import ServiceException
 from models.anomaly import StatusAnomalyEnum
-from schemas.anomaly import AnomalyProgressEnum, ResultWebSocketAnomalySchema
+from schemas.anomaly import (
+    AnomalyProgressEnum,
+    ResultWebSocketAnomalyLeaderboardSchema,
+    ResultWebSocketAnomalySchema,
+    ResultWebSocketAnomalyStreamSchema,
+)
 from schemas.forecast import (
     ForecastProgressEnum,
+    ResultWebSocketForecastLeaderboardSchema,
+    ResultWebSocketForecastPredictSchema,
     ResultWebSocketForecastSchema,
     StatusForecastEnum,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ManagerWebSocket:
     curent_progres: Enum
@@ -21,17 +35,69 @@ class ManagerWebSocket:
 
     def __init__(self, ws: WebSocket) -> None:
         self.ws = ws
-
-    async def set_progress(self, progress: Enum):
+        # Устанавливается, когда клиент закрыл соединение
+        self.cancel_event = asyncio.Event()
+        # Прогресс может отправляться из нескольких задач одновременно
+        self.send_lock = asyncio.Lock()
+
+    @property
+    def is_disconnected(self) -> bool:
+        return self.cancel_event.is_set()
+
+    async def watch_disconnect(self):
+        """Ожидать закрытия соединения клиентом.
+
+        Во время вычислений сообщения от клиента не читаются, поэтому
+        отключение можно обнаружить только отдельной задачей.
+        """
+        while True:
+            message = await self.ws.receive()
+            if message["type"] == "websocket.disconnect":
+                self.cancel_event.set()
+                return
+
+    async def set_progress(self, progress: Enum, **info):
+        if self.is_disconnected:
+            return
         data = self.result_schema(
             status=self.status_emum.process,
             progress=progress,
+            **info,
         )
         self.curent_progres = progress
 
-        await self.ws.send_text(data.model_dump_json())
+        async with self.send_lock:
+            await self.ws.send_text(data.model_dump_json())
+
+    @asynccontextmanager
+    async def progress(self):
+        """Функция публикации прогресса задачи, выполняемой в блоке `with`.
+
+        Этапы публикуются в шину прогресса, а отдельная задача отправляет
+        их клиенту, поэтому обучение не ждет отправки сообщений. При выходе
+        из блока отправляются оставшиеся события.
+        """
+        bus = get_progress_bus()
+        topic = f"ws:{uuid.uuid4().hex}"
+        async with bus.subscribe(topic) as subscription:
+            sender = asyncio.create_task(self._send_progress(subscription))
+            try:
+                yield bus.publisher(topic)
+            finally:
+                subscription.close()
+                await sender
+
+    async def _send_progress(self, subscription: Subscription):
+        try:
+            async for events in subscription:
+                for event in events:
+                    await self.set_progress(event.progress, **event.info)
+        except Exception:
+            logger.warning("Не удалось отправить прогресс клиенту")
 
     async def send_exception(self, exc: Exception):
+        if self.is_disconnected:
+            return
         if isinstance(exc, ServiceException):
 
             data = self.result_schema(
@@ -65,6 +131,8 @@ class ManagerWebSocket:
             self.code = 4005
 
     async def close(self, code: int = None):
+        if self.is_disconnected:
+            return
         await self.ws.close(code=self.code if not code else code)
 
 
@@ -82,6 +150,22 @@ class AnomalyManagerWebSocket(ManagerWebSocket):
     status_emum = StatusAnomalyEnum
 
 
+class ForecastLeaderboardManagerWebSocket(ForecastManagerWebSocket):
+    result_schema = ResultWebSocketForecastLeaderboardSchema
+
+
+class AnomalyLeaderboardManagerWebSocket(AnomalyManagerWebSocket):
+    result_schema = ResultWebSocketAnomalyLeaderboardSchema
+
+
+class AnomalyStreamManagerWebSocket(AnomalyManagerWebSocket):
+    result_schema = ResultWebSocketAnomalyStreamSchema
+
+
+class ForecastPredictManagerWebSocket(ForecastManagerWebSocket):
+    result_schema = ResultWebSocketForecastPredictSchema
+
+
 async def get_forecast_manager_web_socket(websocket: WebSocket):
     obj = ForecastManagerWebSocket(websocket)
     return obj
@@ -90,3 +174,23 @@ async def get_forecast_manager_web_socket(websocket: WebSocket):
 async def get_anomaly_manager_web_socket(websocket: WebSocket):
     obj = AnomalyManagerWebSocket(websocket)
     return obj
+
+
+async def get_forecast_leaderboard_manager_web_socket(websocket: WebSocket):
+    obj = ForecastLeaderboardManagerWebSocket(websocket)
+    return obj
+
+
+async def get_anomaly_leaderboard_manager_web_socket(websocket: WebSocket):
+    obj = AnomalyLeaderboardManagerWebSocket(websocket)
+    return obj
+
+
+async def get_forecast_predict_manager_web_socket(websocket: WebSocket):
+    obj = ForecastPredictManagerWebSocket(websocket)
+    return obj
+
+
+async def get_anomaly_stream_manager_web_socket(websocket: WebSocket):
+    obj = AnomalyStreamManagerWebSocket(websocket)
+    return obj
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from enum import Enum
+from typing import Any, Callable, NamedTuple, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Группы параметров: алгоритмы прогнозирования, детекторы аномалий
+# и пороги детекторов
+KINDS = ("forecast", "anomaly", "threshold")
+
+_TYPES = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "bool": bool,
+    "list": list,
+    "tuple": tuple,
+    "dict": dict,
+}
+
+
+class ParameterInfo(NamedTuple):
+    type: str
+    default: Any
+    check: Callable[[Any], bool]
+    values: Optional[list] = None
+
+
+def compile_check(
+    type_name: str, values: Optional[list] = None
+) -> Callable[[Any], bool]:
+    """Функция проверки значения параметра по имени его типа.
+
+    Значение перечисления передается именем элемента, как принимают
+    конфигурации Merlion.
+    """
+    if type_name == "enum":
+        allowed = frozenset(values or ())
+        return lambda value: isinstance(value, str) and value in allowed
+    expected = _TYPES[type_name]
+    return lambda value: isinstance(value, expected)
+
+
+def compile_params(description: dict) -> dict[str, ParameterInfo]:
+    return {
+        name: ParameterInfo(
+            type=info["type"],
+            default=info.get("default"),
+            check=compile_check(info["type"], info.get("values")),
+            values=info.get("values"),
+        )
+        for name, info in description.items()
+    }
+
+
+def describe_params(params_info: dict) -> dict:
+    """Преобразовать описание параметров Merlion в JSON-совместимый вид."""
+    description = {}
+    for name, info in params_info.items():
+        value_type = info["type"]
+        default = info["default"]
+        item = {
+            "type": (
+                "enum" if issubclass(value_type, Enum) else value_type.__name__
+            ),
+            "default": None if default == "" else default,
+        }
+        if issubclass(value_type, Enum):
+            item["values"] = list(value_type.__members__)
+        description[name] = item
+    return description
+
+
+def introspect(kind: str, name: str) -> dict:
+    """Получить описание параметров из сигнатуры класса Merlion.
+
+    Используется при сборке реестра и для алгоритмов, которых нет в
+    собранном реестре.
+    """
+    if kind == "forecast":
+        from merlion.dashboard.models.forecast import ForecastModel
+
+        params_info = ForecastModel.get_parameter_info(algorithm=name)
+    elif kind == "anomaly":
+        from merlion.dashboard.models.anomaly import AnomalyModel
+
+        params_info = AnomalyModel.get_parameter_info(algorithm=name)
+    else:
+        from merlion.dashboard.models.anomaly import AnomalyModel
+
+        params_info = AnomalyModel.get_threshold_info(name)
+    return describe_params(params_info)
+
+
+class ParameterRegistry:
+    """Описание параметров алгоритмов, собранное заранее.
+
+    Описание читается из JSON-файлов `<PARAMS_PATH>/<группа>.json` один
+    раз, для каждого параметра сохраняется функция проверки типа, поэтому
+    проверка параметров запроса не обращается к Merlion. Алгоритмы, которых
+    нет в файлах, описываются по сигнатуре класса Merlion при первом
+    обращении и затем также берутся из памяти.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.document: dict[str, dict] = {}
+        self.content = b""
+        self.etag = ""
+        self._compiled: dict[tuple[str, str], dict[str, ParameterInfo]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        document = {}
+        for kind in KINDS:
+            file_path = os.path.join(self.path, f"{kind}.json")
+            try:
+                with open(file_path) as file:
+                    document[kind] = json.load(file)
+            except FileNotFoundError:
+                logger.warning(f"Файл параметров {file_path} не найден")
+                document[kind] = {}
+        compiled = {
+            (kind, name): compile_params(description)
+            for kind, algorithms in document.items()
+            for name, description in algorithms.items()
+        }
+        content = json.dumps(
+            document, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+        with self._lock:
+            self.document = document
+            self.content = content
+            self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            self._compiled = compiled
+            self._loaded = True
+
+    def export(self) -> tuple[str, bytes]:
+        """ETag и JSON всего реестра для ответа клиенту."""
+        self._ensure_loaded()
+        return self.etag, self.content
+
+    def algorithms(self, kind: str) -> list[str]:
+        self._ensure_loaded()
+        return list(self.document[kind])
+
+    def get(self, kind: str, name: str) -> dict[str, ParameterInfo]:
+        """Параметры алгоритма или порога `name` группы `kind`.
+
+        Если алгоритм не найден ни в реестре, ни в Merlion, вызывается
+        исключение Merlion (ValueError, ImportError и др.).
+        """
+        self._ensure_loaded()
+        key = (kind, str(getattr(name, "value", name)))
+        params = self._compiled.get(key)
+        if params is None:
+            params = compile_params(introspect(*key))
+            with self._lock:
+                self._compiled[key] = params
+        return params
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+
+params_registry = ParameterRegistry(settings.PARAMS.PATH)
+
+
+def get_params_registry() -> ParameterRegistry:
+    return params_registry
+
+
+def build(path: str) -> None:
+    """Собрать файлы реестра по классам Merlion.
+
+    Запуск: `python -m core.params [папка]`. Алгоритмы, зависимости
+    которых не установлены, пропускаются.
+    """
+    from merlion.dashboard.models.anomaly import AnomalyModel
+
+    from schemas.anomaly import AlgorithmAnomaly
+    from schemas.forecast import AlgorithmForecast
+
+    names = {
+        "forecast": [a.value for a in AlgorithmForecast],
+        "anomaly": list(
+            dict.fromkeys(
+                [a.value for a in AlgorithmAnomaly]
+                + AnomalyModel.multivariate_algorithms
+            )
+        ),
+        "threshold": AnomalyModel.get_available_thresholds(),
+    }
+    os.makedirs(path, exist_ok=True)
+    for kind, algorithms in names.items():
+        document = {}
+        for name in algorithms:
+            try:
+                document[name] = introspect(kind, name)
+            except ImportError as e:
+                logger.warning(f"{name} пропущен: {e}")
+        with open(os.path.join(path, f"{kind}.json"), "w") as file:
+            json.dump(document, file, ensure_ascii=False, indent=4)
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    build(sys.argv[1] if len(sys.argv) > 1 else settings.PARAMS.PATH)
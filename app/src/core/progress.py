@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import socket
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from models.progress import ProgressEventModel
+from storages.base import BaseProgressStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressEvent(NamedTuple):
+    # Этап из ForecastProgressEnum/AnomalyProgressEnum, для событий из
+    # других процессов - словарь {"stage": ..., "percent": ...}
+    progress: Any
+    info: dict
+
+    @property
+    def key(self) -> Hashable:
+        """События с одинаковым ключом объединяются: подписчик получает
+        только последнее из них."""
+        return self.info.get("candidate")
+
+
+class Subscription:
+    """Подписка на события одной задачи с объединением событий.
+
+    Если подписчик не успевает отправлять события, из событий с одинаковым
+    ключом в очереди остается только последнее, поэтому очередь не растет,
+    а публикация не ждет подписчика.
+    """
+
+    def __init__(self, topic: str) -> None:
+        self.topic = topic
+        self.closed = False
+        self._pending: dict[Hashable, ProgressEvent] = {}
+        self._ready = asyncio.Event()
+
+    def put(self, event: ProgressEvent) -> None:
+        if self.closed:
+            return
+        self._pending.pop(event.key, None)
+        self._pending[event.key] = event
+        self._ready.set()
+
+    def close(self) -> None:
+        """Завершить подписку; уже полученные события еще можно забрать."""
+        self.closed = True
+        self._ready.set()
+
+    def drain(self) -> list[ProgressEvent]:
+        events = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        return events
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться нового события; False, если истек `timeout`."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> list[ProgressEvent]:
+        while not self._pending:
+            if self.closed:
+                raise StopAsyncIteration
+            await self.wait()
+            if not self._pending and not self.closed:
+                self._ready.clear()
+        return self.drain()
+
+
+class ProgressBus:
+    """Шина событий прогресса обучения внутри процесса.
+
+    Код обучения публикует этапы через `publish` без ожидания: событие
+    сразу раскладывается по подпискам, а отправкой клиенту занимаются
+    задачи подписчиков. Если задано хранилище, события задач с `fanout`
+    дополнительно сохраняются в MongoDB в фоне, и подписчики получают
+    события, которые опубликованы в других процессах.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[BaseProgressStorage] = None,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.storage = storage
+        self.poll_interval = poll_interval
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self.published = 0
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._tasks: set[asyncio.Task] = set()
+
+    def publish(
+        self, topic: str, progress: Enum, fanout: bool = False, **info
+    ) -> None:
+        """Опубликовать этап задачи `topic`.
+
+        Вызывается из потока цикла событий и не блокирует вызывающий код.
+        При `fanout` событие также сохраняется в MongoDB для подписчиков
+        из других процессов.
+        """
+        event = ProgressEvent(progress, info)
+        self.published += 1
+        for subscription in self._subscriptions.get(topic, ()):
+            subscription.put(event)
+        if fanout and self.storage is not None:
+            self._spawn(self._store(topic, event))
+
+    def publisher(
+        self, topic: str, fanout: bool = False
+    ) -> Callable[..., None]:
+        """Функция `set_progress(progress, **info)` для задачи `topic`."""
+        return partial(self.publish, topic, fanout=fanout)
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str, fanout: bool = False):
+        """Подписаться на события задачи `topic`.
+
+        При `fanout` подписка также получает из MongoDB события, которые
+        опубликованы в других процессах.
+        """
+        subscription = Subscription(topic)
+        self._subscriptions[topic].add(subscription)
+        listener = (
+            asyncio.create_task(self._listen(subscription))
+            if fanout and self.storage is not None
+            else None
+        )
+        try:
+            yield subscription
+        finally:
+            subscription.close()
+            if listener:
+                listener.cancel()
+            self._subscriptions[topic].discard(subscription)
+            if not self._subscriptions[topic]:
+                del self._subscriptions[topic]
+
+    def get_stats(self) -> dict:
+        return {
+            "published": self.published,
+            "topics": len(self._subscriptions),
+            "subscriptions": sum(map(len, self._subscriptions.values())),
+            "fanout": self.storage is not None,
+        }
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _store(self, topic: str, event: ProgressEvent) -> None:
+        progress = event.progress
+        if isinstance(progress, Enum):
+            progress = {"stage": progress.stage, "percent": progress.percent}
+        try:
+            await self.storage.add(
+                ProgressEventModel(
+                    topic=topic,
+                    origin=self.origin,
+                    progress=progress,
+                    info=event.info,
+                )
+            )
+        except Exception:
+            logger.warning(f"Не удалось сохранить прогресс задачи {topic}")
+
+    async def _listen(self, subscription: Subscription) -> None:
+        """Получать из MongoDB события задачи из других процессов."""
+        last_id = None
+        while True:
+            try:
+                events = await self.storage.get_after(
+                    subscription.topic, last_id
+                )
+            except Exception:
+                logger.warning(
+                    f"Не удалось получить прогресс задачи {subscription.topic}"
+                )
+                events = []
+            for event in events:
+                last_id = str(event.id)
+                # События своего процесса уже доставлены напрямую
+                if event.origin != self.origin:
+                    subscription.put(ProgressEvent(event.progress, event.info))
+            await asyncio.sleep(self.poll_interval)
+
+
+progress_bus: Optional[ProgressBus] = None
+
+
+def get_progress_bus() -> ProgressBus:
+    return progress_bus
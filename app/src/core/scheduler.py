@@ -0,0 +1,239 @@
+import asyncio
+import itertools
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from core.executor import TrainingCancelledError
+from exceptions.scheduler import SchedulerOverloadedException
+
+logger = logging.getLogger(__name__)
+
+
+class _Waiter:
+    def __init__(
+        self, user_id: str, tag: float, seq: int, units: int = 1
+    ) -> None:
+        self.user_id = user_id
+        # Количество мест, которое займет задача
+        self.units = units
+        # Виртуальное время начала: задачи запускаются по возрастанию
+        self.tag = tag
+        self.seq = seq
+        self.granted = asyncio.get_running_loop().create_future()
+        # Устанавливается, когда позиция в очереди могла измениться
+        self.moved = asyncio.Event()
+
+    @property
+    def key(self) -> tuple:
+        return self.tag, self.seq
+
+
+class TrainingScheduler:
+    """Очередь ресурсоемких вычислений с честным разделением между
+    пользователями.
+
+    Одновременно выполняется не больше `max_running` задач и не больше
+    `user_max_running` задач одного пользователя. Ожидающие задачи
+    запускаются по виртуальному времени начала (start-time fair queuing):
+    каждая задача пользователя сдвигает его виртуальное время на
+    `1 / weight`, поэтому пользователь с весом 2 получает вдвое больше
+    запусков, а пользователь, отправивший много задач, не блокирует
+    остальных. Если очередь длиннее `max_queue`, новая задача сразу
+    отклоняется.
+
+    Задача из нескольких обучений (сравнение алгоритмов, подбор
+    параметров, бэктестинг, пакетный прогноз) занимает столько мест,
+    сколько обучений выполняет одновременно, но не больше
+    `user_max_running`, и сдвигает виртуальное время пользователя
+    пропорционально. Ограничения считаются в местах, а не в задачах.
+    """
+
+    def __init__(
+        self,
+        max_running: int,
+        user_max_running: int,
+        max_queue: int,
+        retry_after: int,
+        weights: Optional[dict[str, float]] = None,
+    ) -> None:
+        self.max_running = max(1, max_running)
+        self.user_max_running = max(1, user_max_running)
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.weights = weights or {}
+        self._running: dict[str, int] = defaultdict(int)
+        self._waiting: list[_Waiter] = []
+        self._finish: dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: str,
+        on_position: Optional[Callable[[int], Awaitable[Any]]] = None,
+        cancel_event: Optional[asyncio.Event] = None,
+        jobs: int = 1,
+    ):
+        """Дождаться своей очереди и занять места на время блока `with`.
+
+        Для задачи из `jobs` обучений занимается `min(jobs,
+        user_max_running)` мест; блок получает их количество, и задача не
+        должна выполнять больше обучений одновременно (`gather_limited`).
+        Пока задача ждет, при каждом изменении позиции вызывается
+        `on_position(position)`. При установке `cancel_event` задача
+        покидает очередь с исключением `TrainingCancelledError`.
+        """
+        units = max(1, min(jobs, self.user_max_running, self.max_running))
+        await self._acquire(str(user_id), on_position, cancel_event, units)
+        try:
+            yield units
+        finally:
+            self._release(str(user_id), units)
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.running,
+            "waiting": len(self._waiting),
+            "max_running": self.max_running,
+            "user_max_running": self.user_max_running,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "users": {
+                user_id: count
+                for user_id, count in self._running.items()
+                if count
+            },
+        }
+
+    def _enqueue(self, user_id: str, units: int) -> _Waiter:
+        start = max(self._virtual_time, self._finish.get(user_id, 0.0))
+        self._finish[user_id] = start + units / self.weights.get(user_id, 1.0)
+        waiter = _Waiter(user_id, start, next(self._seq), units)
+        self._waiting.append(waiter)
+        self._notify()
+        return waiter
+
+    async def _acquire(
+        self,
+        user_id: str,
+        on_position: Optional[Callable[[int], Awaitable[Any]]],
+        cancel_event: Optional[asyncio.Event],
+        units: int = 1,
+    ) -> None:
+        if len(self._waiting) >= self.max_queue:
+            self.rejected += 1
+            logger.warning(
+                f"Очередь обучения переполнена ({len(self._waiting)}), "
+                f"задача пользователя {user_id} отклонена"
+            )
+            raise SchedulerOverloadedException(
+                msg="Очередь обучения переполнена. Повторите запрос позже.",
+                retry_after=self.retry_after,
+            )
+
+        waiter = self._enqueue(user_id, units)
+        self._dispatch()
+        position = None
+        try:
+            while not waiter.granted.done():
+                waiter.moved.clear()
+                current = self._position(waiter)
+                if on_position and current != position:
+                    position = current
+                    await on_position(position)
+                await self._wait(waiter, cancel_event)
+        except BaseException:
+            if waiter.granted.done():
+                self._release(user_id, units)
+            else:
+                waiter.granted.cancel()
+                self._waiting.remove(waiter)
+                self._notify()
+                self._dispatch()
+            raise
+
+    async def _wait(
+        self, waiter: _Waiter, cancel_event: Optional[asyncio.Event]
+    ) -> None:
+        waits = {
+            asyncio.ensure_future(asyncio.shield(waiter.granted)),
+            asyncio.ensure_future(waiter.moved.wait()),
+        }
+        if cancel_event is not None:
+            waits.add(asyncio.ensure_future(cancel_event.wait()))
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in waits:
+                task.cancel()
+        if (
+            cancel_event is not None
+            and cancel_event.is_set()
+            and not waiter.granted.done()
+        ):
+            raise TrainingCancelledError()
+
+    def _position(self, waiter: _Waiter) -> int:
+        return 1 + sum(1 for w in self._waiting if w.key < waiter.key)
+
+    def _release(self, user_id: str, units: int = 1) -> None:
+        self._running[user_id] -= units
+        if not self._running[user_id]:
+            del self._running[user_id]
+        self._dispatch()
+
+    def _notify(self) -> None:
+        for waiter in self._waiting:
+            waiter.moved.set()
+
+    def _dispatch(self) -> None:
+        started = False
+        while self._waiting and self.running < self.max_running:
+            ready = [
+                w
+                for w in self._waiting
+                if self._running[w.user_id] + w.units <= self.user_max_running
+            ]
+            if not ready:
+                break
+            waiter = min(ready, key=lambda w: w.key)
+            # Следующая задача ждет освобождения нужного ей количества мест,
+            # чтобы задачи, занимающие меньше мест, не обгоняли ее бесконечно
+            if self.running + waiter.units > self.max_running:
+                break
+            self._waiting.remove(waiter)
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._running[waiter.user_id] += waiter.units
+            waiter.granted.set_result(None)
+            started = True
+        if started:
+            self._notify()
+
+
+async def gather_limited(aws: Iterable[Awaitable], limit: int) -> list:
+    """`asyncio.gather(..., return_exceptions=True)`, в котором
+    одновременно выполняется не больше `limit` awaitable."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw: Awaitable):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(
+        *[run(aw) for aw in aws], return_exceptions=True
+    )
+
+
+training_scheduler: Optional[TrainingScheduler] = None
+
+
+def get_training_scheduler() -> TrainingScheduler:
+    return training_scheduler
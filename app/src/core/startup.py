@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from importlib import import_module
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Модули машинного обучения, которые загружаются после запуска приложения
+ML_MODULES = (
+    "services.merlion.models.forecast",
+    "services.merlion.models.anomaly",
+)
+
+
+class StartupStats:
+    """Показатели запуска процесса приложения."""
+
+    def __init__(self) -> None:
+        # Время от запуска процесса до начала lifespan (интерпретатор и
+        # импорт модулей приложения)
+        self.startup_time: Optional[float] = None
+        # Merlion уже был импортирован к началу lifespan
+        self.ml_loaded_on_import: bool = False
+        self.ml_import_time: Optional[float] = None
+        self.workers_ready_time: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+startup_stats = StartupStats()
+
+
+def process_uptime() -> Optional[float]:
+    """Время с запуска текущего процесса в секундах по /proc.
+
+    Вне Linux возвращается None.
+    """
+    try:
+        with open("/proc/self/stat") as file:
+            # Имя процесса может содержать пробелы, поля считаются после ")"
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    return round(uptime - started, 3)
+
+
+def record_startup() -> None:
+    """Записать время запуска и проверить, что Merlion еще не загружен.
+
+    Импорт Merlion при запуске замедляет старт приложения в несколько раз,
+    поэтому такая регрессия выводится в лог предупреждением.
+    """
+    startup_stats.startup_time = process_uptime()
+    startup_stats.ml_loaded_on_import = "merlion" in sys.modules
+    logger.info(f"Приложение импортировано за {startup_stats.startup_time} с")
+    if startup_stats.ml_loaded_on_import:
+        logger.warning(
+            "Merlion импортирован при запуске приложения, "
+            "проверьте импорты модулей на верхнем уровне"
+        )
+
+
+def import_ml_modules() -> Optional[float]:
+    """Импортировать модули машинного обучения и вернуть длительность."""
+    started = time.monotonic()
+    try:
+        for module in ML_MODULES:
+            import_module(module)
+    except Exception:
+        logger.exception("Не удалось загрузить модули машинного обучения")
+        return None
+    startup_stats.ml_import_time = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Модули машинного обучения загружены за "
+        f"{startup_stats.ml_import_time} с"
+    )
+    return startup_stats.ml_import_time
+
+
+async def warm_up(training_executor) -> None:
+    """Загрузить модули машинного обучения в фоне после запуска.
+
+    Пока процессы обучения импортируют алгоритмы, приложение уже отвечает
+    на запросы, которым Merlion не нужен; задачи обучения ждут готовности
+    процессов.
+    """
+    started = time.monotonic()
+    await asyncio.gather(
+        asyncio.to_thread(import_ml_modules), training_executor.wait_ready()
+    )
+    startup_stats.workers_ready_time = round(time.monotonic() - started, 3)
@@ -0,0 +1,155 @@
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Переменные окружения, по которым OpenMP, OpenBLAS, MKL и numexpr
+# выбирают количество потоков при загрузке библиотеки
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+# Параметры алгоритмов Merlion, задающие количество потоков оценщика
+# (LightGBM, IsolationForest, DefaultDetector, RandomCutForest)
+THREAD_PARAMS = ("n_jobs", "n_threads", "thread_pool_size")
+
+
+class CpuAllocation(NamedTuple):
+    # Количество потоков одной задачи обучения
+    threads: int
+    # Ядра, к которым привязывается процесс-воркер; пусто - без привязки
+    cpus: tuple[int, ...] = ()
+
+
+def available_cpus() -> list[int]:
+    """Ядра, доступные процессу (с учетом taskset и cgroup cpuset)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+class CpuBudget:
+    """Распределение ядер между процессами обучения.
+
+    Каждый процесс-воркер выполняет одну задачу, поэтому доступные ядра
+    делятся поровну между `slots` процессами: задача получает
+    `threads_per_job` потоков (0 - доступные ядра / `slots`, не меньше
+    одного). При `affinity` процесс `slot` привязывается к своему
+    непрерывному блоку ядер, блоки разных процессов не пересекаются, пока
+    ядер хватает.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        threads_per_job: int = 0,
+        affinity: bool = False,
+        cpus: Optional[list[int]] = None,
+    ) -> None:
+        self.cpus = sorted(cpus) if cpus else available_cpus()
+        self.slots = max(1, slots)
+        self.threads = threads_per_job or max(1, len(self.cpus) // self.slots)
+        self.affinity = affinity
+
+    def allocation(self, slot: int) -> CpuAllocation:
+        if not self.affinity:
+            return CpuAllocation(self.threads)
+        start = slot * self.threads
+        cpus = tuple(
+            sorted(
+                {
+                    self.cpus[(start + i) % len(self.cpus)]
+                    for i in range(self.threads)
+                }
+            )
+        )
+        return CpuAllocation(self.threads, cpus)
+
+    def get_stats(self) -> dict:
+        return {
+            "cpus": len(self.cpus),
+            "slots": self.slots,
+            "threads_per_job": self.threads,
+            "affinity": self.affinity,
+        }
+
+
+# Выделение текущего процесса-воркера
+_allocation: Optional[CpuAllocation] = None
+
+
+def apply_allocation(allocation: CpuAllocation) -> None:
+    """Ограничить потоки процесса-воркера выделением `allocation`.
+
+    Переменные окружения действуют на библиотеки, которые загрузятся
+    позже, а уже загруженные пулы BLAS/OpenMP и torch ограничиваются
+    через threadpoolctl и `torch.set_num_threads`. Вызывается перед каждой
+    задачей, так как задача может загрузить новые библиотеки.
+    """
+    global _allocation
+    _allocation = allocation
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(allocation.threads)
+    if allocation.cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, allocation.cpus)
+        except OSError as e:
+            logger.warning(f"Не удалось привязать процесс к ядрам: {e}")
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(limits=allocation.threads)
+    except ImportError:
+        pass
+    # torch импортируется только алгоритмами, которым он нужен
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.get_num_threads() != allocation.threads:
+        torch.set_num_threads(allocation.threads)
+
+
+@contextmanager
+def job_threads(allocation: Optional[CpuAllocation]):
+    """Выполнить задачу обучения в пределах выделения `allocation`.
+
+    Оценщики scikit-learn без явного `n_jobs` (RandomForestForecaster,
+    ExtraTreesForecaster) внутри блока используют выделенное количество
+    потоков joblib.
+    """
+    if allocation is None:
+        yield
+        return
+    apply_allocation(allocation)
+    try:
+        from joblib import parallel_config
+    except ImportError:
+        yield
+        return
+    with parallel_config(n_jobs=allocation.threads):
+        yield
+
+
+def job_params(kind: str, algorithm: str, params: dict) -> dict:
+    """Добавить в параметры алгоритма количество потоков задачи.
+
+    Заполняются только параметры потоков, которые есть у алгоритма и не
+    заданы пользователем. Вне процесса-воркера параметры не меняются.
+    """
+    if _allocation is None:
+        return params
+    from core.params import params_registry
+
+    try:
+        known = params_registry.get(kind, algorithm)
+    except Exception:
+        return params
+    for name in THREAD_PARAMS:
+        if name in known and params.get(name) is None:
+            params[name] = _allocation.threads
+    return params
@@ -0,0 +1,40 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from core.config import settings
+
+# Запросы, тело которых содержит загружаемый датасет
+UPLOAD_PATHS = ("/api/v1/datasets",)
+# Запас на границы и заголовки частей multipart/form-data
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+async def limit_upload_size(request: Request, call_next):
+    """Отклонить загрузку датасета больше ограничения до чтения тела.
+
+    Размер проверяется по заголовку Content-Length, поэтому слишком большой
+    файл не сохраняется во временный файл при разборе формы. Запросы без
+    заголовка проверяются при записи файла сервисом датасетов.
+    """
+    max_size = settings.UPLOAD.MAX_SIZE_MB * 2**20
+    length = request.headers.get("content-length")
+    if (
+        max_size
+        and request.method == "POST"
+        and request.url.path.rstrip("/") in UPLOAD_PATHS
+        and length is not None
+        and length.isdigit()
+        and int(length) > max_size + MULTIPART_OVERHEAD
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={
+                "detail": [
+                    {
+                        "msg": f"Размер файла превышает "
+                        f"{settings.UPLOAD.MAX_SIZE_MB} МБ."
+                    }
+                ]
+            },
+        )
+    return await call_next(request)
@@ -9,6 +9,7 @@ async def service_exception_handler(request: Request, exc: ServiceException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": [{"msg": exc.msg}]},
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -0,0 +1,5 @@
+from .base import ServiceException
+
+
+class JobServiceException(ServiceException):
+    pass
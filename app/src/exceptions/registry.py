@@ -0,0 +1,5 @@
+from .base import ServiceException
+
+
+class ModelRegistryServiceException(ServiceException):
+    pass
@@ -0,0 +1,7 @@
+from .base import ServiceException
+
+
+class SchedulerOverloadedException(ServiceException):
+    def __init__(self, msg: str, retry_after: int):
+        super().__init__(msg, status_code=503)
+        self.headers = {"Retry-After": str(retry_after)}
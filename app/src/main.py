@@ -1,4 +1,6 @@
+import asyncio
 from contextlib import asynccontextmanager
+from functools import partial
 
 import uvicorn
 from fastapi import FastAPI
@@ -9,7 +11,9 @@ from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from api import v1 as api_v1
+from core import executor, params, progress, scheduler, startup, threads
 from core.config import settings
+from core.upload import limit_upload_size
 from db import mongodb
 from exceptions.exception_handlers import (
     error_exception_handler,
@@ -17,12 +21,65 @@ from exceptions.exception_handlers import (
     service_exception_handler,
 )
 from exceptions.user import ServiceException
+from services.merlion.warmup import preload_algorithms
+from storages.cache import get_training_cache_storage
+from storages.progress import get_progress_storage
+from storages.registry import get_model_registry_storage
+from storages.stream import get_anomaly_stream_storage
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup.record_startup()
+    params.params_registry.load()
     mongodb.mongodb = AsyncIOMotorClient(settings.MONGODB.DSN)
+    await get_training_cache_storage(db=mongodb.get_db()).create_indexes()
+    await get_model_registry_storage(db=mongodb.get_db()).create_indexes()
+    await get_anomaly_stream_storage(db=mongodb.get_db()).create_indexes()
+    progress.progress_bus = progress.ProgressBus(
+        storage=(
+            get_progress_storage(db=mongodb.get_db())
+            if settings.PROGRESS.FANOUT
+            else None
+        ),
+        poll_interval=settings.PROGRESS.POLL_INTERVAL,
+    )
+    if settings.PROGRESS.FANOUT:
+        await progress.progress_bus.storage.create_indexes()
+    executor.training_executor = executor.TrainingExecutor(
+        max_workers=settings.TRAINING.POOL_SIZE,
+        start_method=settings.TRAINING.START_METHOD,
+        timeout=settings.TRAINING.TIMEOUT,
+        memory_limit=settings.TRAINING.MEMORY_LIMIT_MB * 2**20,
+        memory_check_interval=settings.TRAINING.MEMORY_CHECK_INTERVAL,
+        initializer=(
+            partial(preload_algorithms, fit=settings.TRAINING.WARMUP_FIT)
+            if settings.TRAINING.PRELOAD
+            else None
+        ),
+        cpu_budget=threads.CpuBudget(
+            slots=settings.TRAINING.POOL_SIZE,
+            threads_per_job=settings.TRAINING.THREADS_PER_JOB,
+            affinity=settings.TRAINING.CPU_AFFINITY,
+        ),
+    )
+    executor.training_executor.start()
+    warm_up = (
+        asyncio.create_task(startup.warm_up(executor.training_executor))
+        if settings.TRAINING.PRELOAD
+        else None
+    )
+    scheduler.training_scheduler = scheduler.TrainingScheduler(
+        max_running=settings.SCHEDULER.MAX_RUNNING,
+        user_max_running=settings.SCHEDULER.USER_MAX_RUNNING,
+        max_queue=settings.SCHEDULER.MAX_QUEUE,
+        retry_after=settings.SCHEDULER.RETRY_AFTER,
+        weights=settings.SCHEDULER.USER_WEIGHTS,
+    )
     yield
+    if warm_up:
+        warm_up.cancel()
+    executor.training_executor.shutdown()
     await mongodb.mongodb.close()
 
 
@@ -34,6 +91,9 @@ app = FastAPI(
     default_response_class=ORJSONResponse,
 )
 
+# Регистрируется до CORS, чтобы ответ 413 получал CORS-заголовки
+app.middleware("http")(limit_upload_size)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -15,6 +15,7 @@ class StatusAnomalyEnum(str, Enum):
     process = "in_process"
     success = "success"
     error = "error"
+    cancelled = "cancelled"
 
 
 class ResultAnomalyModel(BaseObjectIDModel):
@@ -22,6 +23,7 @@ class ResultAnomalyModel(BaseObjectIDModel):
 
     params: AnomalyTrainTestDataSchema
     message: Optional[str] = None
+    from_cache: bool = False
     status: StatusAnomalyEnum = StatusAnomalyEnum.success
 
     train_metrics: Optional[dict[str, Any]] = None
@@ -31,6 +33,10 @@ class ResultAnomalyModel(BaseObjectIDModel):
     test_pred: Optional[TimeseriesSchema] = None
     test_labels: Optional[TimeseriesSchema] = None
 
+    # Длительность обучения в секундах и пиковая память процесса в байтах
+    duration: Optional[float] = None
+    peak_memory: Optional[int] = None
+
     created_at: datetime = Field(default_factory=datetime_now)
 
     @field_serializer("user_id")
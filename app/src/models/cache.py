@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import Field
+
+from schemas.job import KindJobEnum
+
+from .base import BaseObjectIDModel, datetime_now
+
+
+class TrainingCacheEntry(BaseObjectIDModel):
+    key: str
+    kind: KindJobEnum
+    algorithm: str
+
+    result: dict[str, Any]
+    model_path: Optional[str] = None
+    size: int = 0
+    hits: int = 0
+
+    created_at: datetime = Field(default_factory=datetime_now)
+    last_used_at: datetime = Field(default_factory=datetime_now)
@@ -2,16 +2,44 @@ from datetime import datetime
 from typing import List, Optional
 
 from bson import ObjectId
-from pydantic import Field, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 
 from .base import BaseObjectIDModel, PydanticObjectId, datetime_now
 
 
+class ColumnProfile(BaseModel):
+    name: str
+    dtype: str
+    # Доля пропусков; min, max и mean - только для числовых колонок
+    null_ratio: float
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+
+
+class DatasetProfile(BaseModel):
+    rows: int
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    # Частота ряда в обозначениях pandas ("D", "h", "15min"), None - если
+    # ее не удалось определить
+    frequency: Optional[str] = None
+    monotonic: bool
+    duplicate_timestamps: int
+    columns: List[ColumnProfile] = []
+
+
 class Dataset(BaseObjectIDModel):
     file_path: Optional[str] = None
     file_name: str
     user_id: PydanticObjectId
     columns: Optional[List[str]] = None
+    # Размер файла в байтах, количество строк данных и хэш содержимого
+    size: Optional[int] = None
+    rows: Optional[int] = None
+    file_hash: Optional[str] = None
+    # Заполняется в фоне после загрузки
+    profile: Optional[DatasetProfile] = None
 
     created_at: datetime = Field(default_factory=datetime_now)
 
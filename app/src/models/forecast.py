@@ -1,12 +1,16 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 from bson import ObjectId
 from pydantic import Field, field_serializer
 
 from schemas.base import TimeseriesSchema
-from schemas.forecast import TrainTestDataSchema
+from schemas.forecast import (
+    ForecastBatchDataSchema,
+    ForecastSeriesSchema,
+    TrainTestDataSchema,
+)
 
 from .base import BaseObjectIDModel, PydanticObjectId, datetime_now
 
@@ -15,6 +19,7 @@ class StatusForecastEnum(str, Enum):
     process = "in_process"
     success = "success"
     error = "error"
+    cancelled = "cancelled"
 
 
 class ResultForecastModel(BaseObjectIDModel):
@@ -22,6 +27,7 @@ class ResultForecastModel(BaseObjectIDModel):
 
     params: TrainTestDataSchema
     message: Optional[str] = None
+    from_cache: bool = False
     status: StatusForecastEnum = StatusForecastEnum.success
 
     train_metrics: Optional[dict[str, Any]] = None
@@ -31,6 +37,28 @@ class ResultForecastModel(BaseObjectIDModel):
     exog_ts: Optional[TimeseriesSchema] = None
     test_pred: Optional[TimeseriesSchema] = None
 
+    # Длительность обучения в секундах и пиковая память процесса в байтах
+    duration: Optional[float] = None
+    peak_memory: Optional[int] = None
+
+    created_at: datetime = Field(default_factory=datetime_now)
+
+    @field_serializer("user_id")
+    def serialize_dt(self, user_id: PydanticObjectId, _info):
+        return ObjectId(user_id)
+
+
+class ResultForecastBatchModel(BaseObjectIDModel):
+    user_id: PydanticObjectId
+
+    params: ForecastBatchDataSchema
+    message: Optional[str] = None
+    status: StatusForecastEnum = StatusForecastEnum.success
+
+    series: List[ForecastSeriesSchema] = []
+    forecast: Optional[TimeseriesSchema] = None
+    duration: Optional[float] = None
+
     created_at: datetime = Field(default_factory=datetime_now)
 
     @field_serializer("user_id")
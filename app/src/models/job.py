@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from bson import ObjectId
+from pydantic import Field, field_serializer
+
+from schemas.job import KindJobEnum, StatusJobEnum
+
+from .base import BaseObjectIDModel, PydanticObjectId, datetime_now
+
+
+class TrainingJob(BaseObjectIDModel):
+    user_id: PydanticObjectId
+    kind: KindJobEnum
+    params: dict[str, Any]
+
+    status: StatusJobEnum = StatusJobEnum.queued
+    progress: Optional[dict[str, Any]] = None
+    message: Optional[str] = None
+    detail: Optional[List[dict[str, Any]]] = None
+    result_id: Optional[PydanticObjectId] = None
+
+    worker_id: Optional[str] = None
+    cancel_requested: bool = False
+    attempts: int = 0
+
+    created_at: datetime = Field(default_factory=datetime_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    @field_serializer("user_id")
+    def serialize_dt(self, user_id: PydanticObjectId, _info):
+        return ObjectId(user_id)
+
+    @field_serializer("result_id")
+    def serialize_result_id(self, result_id: PydanticObjectId, _info):
+        return ObjectId(result_id) if result_id else None
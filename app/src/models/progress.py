@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import Field
+
+from .base import BaseObjectIDModel, datetime_now
+
+
+class ProgressEventModel(BaseObjectIDModel):
+    topic: str
+    # Процесс, опубликовавший событие
+    origin: str
+    progress: dict[str, Any]
+    info: dict[str, Any] = {}
+
+    created_at: datetime = Field(default_factory=datetime_now)
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from bson import ObjectId
+from pydantic import Field, field_serializer
+
+from schemas.job import KindJobEnum
+
+from .base import BaseObjectIDModel, PydanticObjectId, datetime_now
+
+
+class RegisteredModel(BaseObjectIDModel):
+    user_id: PydanticObjectId
+    result_id: PydanticObjectId
+    kind: KindJobEnum
+    algorithm: str
+    # Номер версии среди моделей пользователя с тем же алгоритмом
+    version: int = 1
+
+    path: str
+    size: int = 0
+    training_time: Optional[float] = None
+    dataset_hash: Optional[str] = None
+    params: Optional[dict[str, Any]] = None
+
+    created_at: datetime = Field(default_factory=datetime_now)
+
+    @field_serializer("user_id")
+    def serialize_dt(self, user_id: PydanticObjectId, _info):
+        return ObjectId(user_id)
+
+    @field_serializer("result_id")
+    def serialize_result_id(self, result_id: PydanticObjectId, _info):
+        return ObjectId(result_id)
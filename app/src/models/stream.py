@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from pydantic import Field, field_serializer
+
+from schemas.base import TimeseriesSchema
+
+from .base import BaseObjectIDModel, PydanticObjectId, datetime_now
+
+
+class AnomalyStreamState(BaseObjectIDModel):
+    user_id: PydanticObjectId
+    anomaly_id: PydanticObjectId
+
+    # Последние точки потока - история для детектора
+    history: Optional[TimeseriesSchema] = None
+    # Последние оценки аномальности до постобработки - состояние порога
+    scores: Optional[TimeseriesSchema] = None
+    n_points: int = 0
+    n_anomalies: int = 0
+    last_timestamp: Optional[datetime] = None
+
+    updated_at: datetime = Field(default_factory=datetime_now)
+
+    @field_serializer("user_id")
+    def serialize_dt(self, user_id: PydanticObjectId, _info):
+        return ObjectId(user_id)
+
+    @field_serializer("anomaly_id")
+    def serialize_anomaly_id(self, anomaly_id: PydanticObjectId, _info):
+        return ObjectId(anomaly_id)
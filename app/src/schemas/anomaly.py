@@ -1,7 +1,7 @@
+from datetime import datetime
 from enum import Enum
 from typing import Any, List, Optional, Self
 
-from merlion.dashboard.models.anomaly import AnomalyModel
 from pydantic import (
     BaseModel,
     Field,
@@ -11,14 +11,34 @@ from pydantic import (
 )
 from pydantic_core import InitErrorDetails, PydanticCustomError
 
+from core.params import params_registry
 from models.base import PydanticObjectId
-from schemas.base import ParamsAlgorithmSchema, TimeseriesSchema
+from schemas.base import (
+    BaseSearchDataSchema,
+    LeaderboardEntrySchema,
+    ParamsAlgorithmSchema,
+    TimeseriesSchema,
+    TrainingProgressSchema,
+    check_algorithm_params,
+    check_param_space,
+)
+
+
+def dashboard_model():
+    """Модель дашборда Merlion со списками детекторов.
+
+    Merlion импортируется при первом обращении, а не при импорте схем.
+    """
+    from merlion.dashboard.models.anomaly import AnomalyModel
+
+    return AnomalyModel
 
 
 class StatusAnomalyEnum(str, Enum):
     process = "in_process"
     success = "success"
     error = "error"
+    cancelled = "cancelled"
 
 
 class AlgorithmAnomaly(str, Enum):
@@ -39,11 +59,13 @@ class AlgorithmAnomaly(str, Enum):
 
 class AnomalyProgressEnum(Enum):
     start = ("Запрос получен.", 5)
+    queued = ("Ожидание свободного места в очереди обучения.", 5)
     file_exist = ("Файл с датасетом временного ряда найден", 5)
 
     data_loaded = ("Данные из файла загружены.", 20)
 
     start_anomaly_detector_training = ("Обучение детектора аномалий ...", 20)
+    training = ("Идет обучение детектора аномалий.", 40)
     training_completed = ("Обучение завершено.", 60)
     get_train_metrics = (
         "Вычисление показателей эффективности обучения...",
@@ -90,48 +112,128 @@ class AnomalyTrainTestDataSchema(BaseModel):
     @model_validator(mode="after")
     def check_parametrs_by_algorithm(self) -> Self:
 
-        params_info = AnomalyModel.get_parameter_info(algorithm=self.algorithm)
-        errors = []
-        for param in self.algorithm_params:
-            info = params_info.get(param.parametr)
-            if not info:
-                errors.append(
-                    InitErrorDetails(
-                        type=PydanticCustomError(
-                            "algorithm_parameter_not_exists",
-                            "Параметр {name} не существует",
-                            dict(name=param.parametr),
-                        ),
-                        loc=tuple(
-                            [
-                                "algorithm_params",
-                            ]
-                        ),
-                        input=param,
-                    )
-                )
-                continue
+        params_info = params_registry.get("anomaly", self.algorithm)
+        errors = check_algorithm_params(self.algorithm_params, params_info)
 
-            if param.value is not None and not isinstance(
-                param.value, info["type"]
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class AnomalyMetricEnum(str, Enum):
+    Precision = "Precision"
+    Recall = "Recall"
+    F1 = "F1"
+
+
+class AnomalyCandidateSchema(BaseModel):
+    algorithm: str = Field(example=AlgorithmAnomaly.IsolationForest)
+    algorithm_params: List[ParamsAlgorithmSchema] = []
+
+    @model_validator(mode="after")
+    def check_parametrs_by_algorithm(self) -> Self:
+        known = self.algorithm in params_registry.algorithms("anomaly")
+        try:
+            if not known and self.algorithm not in (
+                dashboard_model().univariate_algorithms
+                + dashboard_model().multivariate_algorithms
             ):
-                errors.append(
+                raise ValueError
+            params_info = params_registry.get("anomaly", self.algorithm)
+        except (ValueError, ImportError):
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма",
+                [
                     InitErrorDetails(
                         type=PydanticCustomError(
-                            "algorithm_parameter_not_exists",
-                            "Параметр {name} имеет не верный тип. Необходимый тип: {type}",
-                            dict(
-                                name=param.parametr, type=info["type"].__name__
-                            ),
+                            "algorithm_not_available",
+                            "Алгоритм {name} недоступен",
+                            dict(name=self.algorithm),
                         ),
-                        loc=tuple(
-                            [
-                                "algorithm_params",
-                            ]
-                        ),
-                        input=param,
+                        loc=("algorithm",),
+                        input=self.algorithm,
                     )
-                )
+                ],
+            )
+        errors = check_algorithm_params(self.algorithm_params, params_info)
+
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class AnomalyLeaderboardDataSchema(BaseModel):
+    file_id: PydanticObjectId
+    columns: List[str] = Field(
+        example=[
+            "temp_max",
+        ]
+    )
+    # Если список пуст, сравниваются все алгоритмы, доступные
+    # для выбранного количества переменных
+    candidates: List[AnomalyCandidateSchema] = []
+    label_column: str = Field(example="label")
+    train_percentage: int = Field(example=80, le=100, ge=10)
+    file_mode: str = Field(default="single")
+    test_filename: Optional[str] = None
+    threshold_class: Optional[str] = None
+    threshold_params: Optional[List[ParamsAlgorithmSchema]] = None
+    # Метрика тестовой выборки, по которой ранжируются алгоритмы
+    metric: AnomalyMetricEnum = AnomalyMetricEnum.F1
+
+    @model_validator(mode="after")
+    def check_candidates_by_columns(self) -> Self:
+        available = dashboard_model().get_available_algorithms(
+            len(self.columns)
+        )
+        errors = [
+            InitErrorDetails(
+                type=PydanticCustomError(
+                    "algorithm_not_available",
+                    "Алгоритм {name} недоступен для {count} переменных",
+                    dict(name=candidate.algorithm, count=len(self.columns)),
+                ),
+                loc=("candidates", i, "algorithm"),
+                input=candidate.algorithm,
+            )
+            for i, candidate in enumerate(self.candidates)
+            if candidate.algorithm not in available
+        ]
+
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка алгоритмов", errors
+            )
+        return self
+
+
+class AnomalySearchDataSchema(BaseSearchDataSchema):
+    file_id: PydanticObjectId
+    columns: List[str] = Field(
+        example=[
+            "temp_max",
+        ]
+    )
+    algorithm: AlgorithmAnomaly = Field(
+        example=AlgorithmAnomaly.IsolationForest
+    )
+    label_column: str = Field(example="label")
+    train_percentage: int = Field(example=80, le=100, ge=10)
+    file_mode: str = Field(default="single")
+    test_filename: Optional[str] = None
+    threshold_class: Optional[str] = None
+    threshold_params: Optional[List[ParamsAlgorithmSchema]] = None
+    metric: AnomalyMetricEnum = AnomalyMetricEnum.F1
+
+    @model_validator(mode="after")
+    def check_param_space_by_algorithm(self) -> Self:
+
+        params_info = params_registry.get("anomaly", self.algorithm)
+        errors = check_param_space(self.param_space, params_info)
 
         if errors:
             raise ValidationError.from_exception_data(
@@ -156,6 +258,11 @@ class ResultWebSocketAnomalySchema(BaseModel):
     detail: Optional[List[dict[str, Any]]] = None
 
     message: Optional[str] = None
+    from_cache: bool = False
+    # Позиция в очереди обучения, пока задача ожидает запуска
+    queue_position: Optional[int] = None
+    # Ход обучения: эпоха, loss, прошедшее и оставшееся время
+    training: Optional[TrainingProgressSchema] = None
     data: Optional[ResultWebSocketAnomalyDataSchema] = None
 
     @field_serializer("progress")
@@ -168,6 +275,7 @@ class ResultWebSocketAnomalySchema(BaseModel):
 class ResultAnomalySchema(BaseModel):
     id: Optional[str] = None
     message: Optional[str] = None
+    from_cache: bool = False
     status: StatusAnomalyEnum = StatusAnomalyEnum.success
     params: Optional[AnomalyTrainTestDataSchema] = None
     train_metrics: Optional[dict[str, Any]] = None
@@ -176,6 +284,63 @@ class ResultAnomalySchema(BaseModel):
     test_ts: Optional[TimeseriesSchema] = None
     test_pred: Optional[TimeseriesSchema] = None
     test_labels: Optional[TimeseriesSchema] = None
+    duration: Optional[float] = Field(default=None, example=1.25)
+    peak_memory: Optional[int] = Field(default=None, example=104857600)
+
+
+class AnomalyScoreDataSchema(BaseModel):
+    file_id: PydanticObjectId
+    # Интервал датасета, в котором ищутся аномалии
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    label_column: Optional[str] = None
+    threshold_class: Optional[str] = None
+    threshold_params: Optional[List[ParamsAlgorithmSchema]] = None
+
+
+class AnomalyScoreSchema(BaseModel):
+    n_points: int = Field(example=1000)
+    n_anomalies: int = Field(example=12)
+    test_metrics: Optional[dict[str, Any]] = None
+    # Метки только тех точек, в которых найдены аномалии
+    anomalies: Optional[TimeseriesSchema] = None
+
+
+class AnomalyStreamBatchSchema(BaseModel):
+    index: List[datetime] = Field(min_length=1)
+    data: dict[str, List[Optional[float]]] = Field(
+        example={"temp_max": [12.5]}
+    )
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> Self:
+        for name, values in self.data.items():
+            if len(values) != len(self.index):
+                raise ValidationError.from_exception_data(
+                    "Проверка данных потока",
+                    [
+                        InitErrorDetails(
+                            type=PydanticCustomError(
+                                "stream_length_mismatch",
+                                "Количество значений {name} не совпадает "
+                                "с количеством меток времени",
+                                dict(name=name),
+                            ),
+                            loc=("data", name),
+                            input=len(values),
+                        )
+                    ],
+                )
+        return self
+
+
+class AnomalyStreamResultSchema(BaseModel):
+    index: List[datetime] = []
+    scores: List[float] = []
+    labels: List[float] = []
+    # Количество точек и аномалий с начала потока
+    n_points: int = Field(example=1000)
+    n_anomalies: int = Field(example=12)
 
 
 class ResultAnomalyDataListSchema(BaseModel):
@@ -189,3 +354,42 @@ class ResultAnomalyDataListSchema(BaseModel):
 
 class ResultAnomalyListSchema(BaseModel):
     data: List[ResultAnomalyDataListSchema] = []
+
+
+class AnomalyLeaderboardSchema(BaseModel):
+    metric: AnomalyMetricEnum
+    entries: List[LeaderboardEntrySchema] = []
+
+
+class ResultWebSocketAnomalyStreamSchema(BaseModel):
+    status: StatusAnomalyEnum = StatusAnomalyEnum.success
+    progress: Optional[AnomalyProgressEnum] = None
+    detail: Optional[List[dict[str, Any]]] = None
+
+    data: Optional[AnomalyStreamResultSchema] = None
+
+    @field_serializer("progress")
+    def serialize_progress(self, value: AnomalyProgressEnum, _info):
+        if value is None:
+            return None
+        return {"percent": value.percent, "stage": value.stage}
+
+
+class ResultWebSocketAnomalyLeaderboardSchema(BaseModel):
+    status: StatusAnomalyEnum = StatusAnomalyEnum.success
+    progress: Optional[AnomalyProgressEnum] = None
+    detail: Optional[List[dict[str, Any]]] = None
+
+    message: Optional[str] = None
+    # Алгоритм, к которому относится событие прогресса
+    candidate: Optional[str] = None
+    queue_position: Optional[int] = None
+    # Ход обучения: эпоха, loss, прошедшее и оставшееся время
+    training: Optional[TrainingProgressSchema] = None
+    data: Optional[AnomalyLeaderboardSchema] = None
+
+    @field_serializer("progress")
+    def serialize_progress(self, value: AnomalyProgressEnum, _info):
+        if value is None:
+            return None
+        return {"percent": value.percent, "stage": value.stage}
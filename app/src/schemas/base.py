@@ -1,7 +1,13 @@
+import math
 from datetime import datetime
+from enum import Enum
 from typing import Any, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from pydantic_core import InitErrorDetails, PydanticCustomError
+from typing_extensions import Self
+
+from core.config import settings
 
 
 class SuccessSchema(BaseModel):
@@ -16,3 +22,143 @@ class TimeseriesSchema(BaseModel):
 class ParamsAlgorithmSchema(BaseModel):
     parametr: str = Field(example="max_forecast_steps")
     value: Any = Field(example="None")
+
+
+def check_algorithm_params(
+    algorithm_params: List[ParamsAlgorithmSchema],
+    params_info: dict,
+    loc: tuple = ("algorithm_params",),
+) -> List[InitErrorDetails]:
+    """Проверить параметры алгоритма по описанию из реестра параметров."""
+    errors = []
+    for param in algorithm_params:
+        info = params_info.get(param.parametr)
+        if not info:
+            errors.append(
+                InitErrorDetails(
+                    type=PydanticCustomError(
+                        "algorithm_parameter_not_exists",
+                        "Параметр {name} не существует",
+                        dict(name=param.parametr),
+                    ),
+                    loc=loc,
+                    input=param,
+                )
+            )
+            continue
+
+        if param.value is not None and not info.check(param.value):
+            errors.append(
+                InitErrorDetails(
+                    type=PydanticCustomError(
+                        "algorithm_parameter_not_exists",
+                        "Параметр {name} имеет не верный тип. "
+                        "Необходимый тип: {type}",
+                        dict(name=param.parametr, type=info.type),
+                    ),
+                    loc=loc,
+                    input=param,
+                )
+            )
+    return errors
+
+
+class TrainingProgressSchema(BaseModel):
+    elapsed: float = Field(example=12.5)
+    epoch: Optional[int] = Field(default=None, example=3)
+    epochs: Optional[int] = Field(default=None, example=10)
+    loss: Optional[float] = Field(default=None, example=0.0123)
+    # Оценка оставшегося времени обучения в секундах
+    eta: Optional[float] = Field(default=None, example=29.2)
+
+
+class LeaderboardEntrySchema(BaseModel):
+    rank: Optional[int] = Field(default=None, example=1)
+    algorithm: str = Field(example="Arima")
+    algorithm_params: List[ParamsAlgorithmSchema] = []
+    status: str = Field(example="success")
+    message: Optional[str] = None
+    train_metrics: Optional[dict[str, Any]] = None
+    test_metrics: Optional[dict[str, Any]] = None
+    duration: Optional[float] = Field(default=None, example=1.25)
+
+
+class SearchStrategyEnum(str, Enum):
+    grid = "grid"
+    random = "random"
+    halving = "halving"
+
+
+class ParamSpaceSchema(BaseModel):
+    parametr: str = Field(example="max_forecast_steps")
+    values: List[Any] = Field(min_length=1, example=[10, 50, 100])
+
+
+def check_param_space(
+    param_space: List[ParamSpaceSchema], params_info: dict
+) -> List[InitErrorDetails]:
+    """Проверить все значения пространства поиска параметров алгоритма."""
+    return check_algorithm_params(
+        [
+            ParamsAlgorithmSchema(parametr=space.parametr, value=value)
+            for space in param_space
+            for value in space.values
+        ],
+        params_info,
+        loc=("param_space",),
+    )
+
+
+def param_space_size(param_space: List[ParamSpaceSchema]) -> int:
+    return math.prod(len(space.values) for space in param_space)
+
+
+class SearchTrialSchema(LeaderboardEntrySchema):
+    rung: int = Field(default=0, example=0)
+    train_rows: Optional[int] = Field(default=None, example=120)
+    pruned: bool = False
+
+
+class BaseSearchDataSchema(BaseModel):
+    param_space: List[ParamSpaceSchema] = Field(min_length=1)
+    strategy: SearchStrategyEnum = SearchStrategyEnum.grid
+    # Количество проверяемых конфигураций для random и halving
+    n_trials: int = Field(default=20, ge=1)
+    halving_factor: int = Field(default=3, ge=2)
+    seed: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_trials_count(self) -> Self:
+        trials = (
+            param_space_size(self.param_space)
+            if self.strategy == SearchStrategyEnum.grid
+            else self.n_trials
+        )
+        if trials > settings.TRAINING.SEARCH_MAX_TRIALS:
+            raise ValidationError.from_exception_data(
+                "Проверка пространства поиска",
+                [
+                    InitErrorDetails(
+                        type=PydanticCustomError(
+                            "search_space_too_large",
+                            "Количество конфигураций ({trials}) больше "
+                            "допустимого ({max_trials})",
+                            dict(
+                                trials=trials,
+                                max_trials=settings.TRAINING.SEARCH_MAX_TRIALS,
+                            ),
+                        ),
+                        loc=("param_space",),
+                        input=trials,
+                    )
+                ],
+            )
+        return self
+
+
+class SearchResultSchema(BaseModel):
+    strategy: SearchStrategyEnum
+    metric: str = Field(example="RMSE")
+    best_params: Optional[List[ParamsAlgorithmSchema]] = None
+    result_id: Optional[str] = None
+    trials: List[SearchTrialSchema] = []
@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class TrainingCacheStatsSchema(BaseModel):
+    enabled: bool
+    entries: int = Field(example=12)
+    size: int = Field(example=10485760)
+    hits: int = Field(example=30)
+    misses: int = Field(example=12)
+    hit_ratio: Optional[float] = Field(example=0.71)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from fastapi import UploadFile
 from pydantic import BaseModel, Field
@@ -7,10 +7,32 @@ from pydantic import BaseModel, Field
 from models.base import PydanticObjectId
 
 
+class ColumnProfileSchema(BaseModel):
+    name: str = Field(example="max")
+    dtype: str = Field(example="float64")
+    null_ratio: float = Field(example=0.01)
+    min: Optional[float] = Field(default=None, example=-3.5)
+    max: Optional[float] = Field(default=None, example=31.2)
+    mean: Optional[float] = Field(default=None, example=12.7)
+
+
+class DatasetProfileSchema(BaseModel):
+    rows: int = Field(example=8760)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    frequency: Optional[str] = Field(default=None, example="h")
+    monotonic: bool = Field(example=True)
+    duplicate_timestamps: int = Field(example=0)
+    columns: List[ColumnProfileSchema] = []
+
+
 class DatasetSchema(BaseModel):
     id: PydanticObjectId = Field(example="665271bff4546cdc3faa2719")
     file_name: str = Field(example="example.csv")
     columns: List[str] = Field(example=["date", "max", "min"])
+    size: Optional[int] = Field(default=None, example=1048576)
+    rows: Optional[int] = Field(default=None, example=8760)
+    profile: Optional[DatasetProfileSchema] = None
     created_at: datetime
 
 
@@ -18,5 +40,14 @@ class ListDatasetsSchema(BaseModel):
     data: List[DatasetSchema]
 
 
+class DatasetCacheStatsSchema(BaseModel):
+    entries: int = Field(example=3)
+    size: int = Field(example=10485760)
+    max_size: int = Field(example=536870912)
+    hits: int = Field(example=30)
+    misses: int = Field(example=3)
+    hit_ratio: Optional[float] = Field(example=0.91)
+
+
 class DatasetFile(UploadFile):
     pass
@@ -1,7 +1,7 @@
+from datetime import datetime
 from enum import Enum
 from typing import Any, List, Optional
 
-from merlion.dashboard.models.forecast import ForecastModel
 from pydantic import (
     BaseModel,
     Field,
@@ -12,8 +12,17 @@ from pydantic import (
 from pydantic_core import InitErrorDetails, PydanticCustomError
 from typing_extensions import Self
 
+from core.params import params_registry
 from models.base import PydanticObjectId
-from schemas.base import ParamsAlgorithmSchema, TimeseriesSchema
+from schemas.base import (
+    BaseSearchDataSchema,
+    LeaderboardEntrySchema,
+    ParamsAlgorithmSchema,
+    TimeseriesSchema,
+    TrainingProgressSchema,
+    check_algorithm_params,
+    check_param_space,
+)
 
 
 class AlgorithmForecast(str, Enum):
@@ -46,50 +55,107 @@ class TrainTestDataSchema(BaseModel):
     @model_validator(mode="after")
     def check_parametrs_by_algorithm(self) -> Self:
 
-        params_info = ForecastModel.get_parameter_info(
-            algorithm=self.algorithm
-        )
-        errors = []
-        for param in self.algorithm_params:
-            info = params_info.get(param.parametr)
-            if not info:
-                errors.append(
-                    InitErrorDetails(
-                        type=PydanticCustomError(
-                            "algorithm_parameter_not_exists",
-                            "Параметр {name} не существует",
-                            dict(name=param.parametr),
-                        ),
-                        loc=tuple(
-                            [
-                                "algorithm_params",
-                            ]
-                        ),
-                        input=param,
-                    )
-                )
-                continue
+        params_info = params_registry.get("forecast", self.algorithm)
+        errors = check_algorithm_params(self.algorithm_params, params_info)
 
-            if param.value is not None and not isinstance(
-                param.value, info["type"]
-            ):
-                errors.append(
-                    InitErrorDetails(
-                        type=PydanticCustomError(
-                            "algorithm_parameter_not_exists",
-                            "Параметр {name} имеет не верный тип. Необходимый тип: {type}",
-                            dict(
-                                name=param.parametr, type=info["type"].__name__
-                            ),
-                        ),
-                        loc=tuple(
-                            [
-                                "algorithm_params",
-                            ]
-                        ),
-                        input=param,
-                    )
-                )
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class ForecastMetricEnum(str, Enum):
+    MAE = "MAE"
+    MARRE = "MARRE"
+    RMSE = "RMSE"
+    sMAPE = "sMAPE"
+    RMSPE = "RMSPE"
+
+
+class ForecastCandidateSchema(BaseModel):
+    algorithm: AlgorithmForecast = Field(example=AlgorithmForecast.Arima)
+    algorithm_params: List[ParamsAlgorithmSchema] = []
+
+    @model_validator(mode="after")
+    def check_parametrs_by_algorithm(self) -> Self:
+
+        params_info = params_registry.get("forecast", self.algorithm)
+        errors = check_algorithm_params(self.algorithm_params, params_info)
+
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class ForecastLeaderboardDataSchema(BaseModel):
+    file_id: PydanticObjectId
+    target_col: str = Field(example="temp_max")
+    candidates: List[ForecastCandidateSchema] = Field(min_length=1)
+    train_percentage: int = Field(example=80, le=100, ge=10)
+    file_mode: str = Field(default="single")
+    feature_cols: Optional[List[str]] = None
+    exog_cols: Optional[List[str]] = None
+    test_filename: Optional[str] = None
+    # Метрика тестовой выборки, по которой ранжируются алгоритмы
+    metric: ForecastMetricEnum = ForecastMetricEnum.RMSE
+
+
+class ForecastSearchDataSchema(BaseSearchDataSchema):
+    file_id: PydanticObjectId
+    target_col: str = Field(example="temp_max")
+    algorithm: AlgorithmForecast = Field(example=AlgorithmForecast.Arima)
+    train_percentage: int = Field(example=80, le=100, ge=10)
+    file_mode: str = Field(default="single")
+    feature_cols: Optional[List[str]] = None
+    exog_cols: Optional[List[str]] = None
+    test_filename: Optional[str] = None
+    metric: ForecastMetricEnum = ForecastMetricEnum.RMSE
+
+    @model_validator(mode="after")
+    def check_param_space_by_algorithm(self) -> Self:
+
+        params_info = params_registry.get("forecast", self.algorithm)
+        errors = check_param_space(self.param_space, params_info)
+
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class BacktestWindowEnum(str, Enum):
+    expanding = "expanding"
+    rolling = "rolling"
+
+
+class ForecastBacktestDataSchema(BaseModel):
+    file_id: PydanticObjectId
+    target_col: str = Field(example="temp_max")
+    algorithm: AlgorithmForecast = Field(
+        example=AlgorithmForecast.DefaultForecaster
+    )
+    algorithm_params: List[ParamsAlgorithmSchema] = []
+    feature_cols: Optional[List[str]] = None
+    exog_cols: Optional[List[str]] = None
+    # Количество точек начала прогноза и длина прогноза в строках датасета
+    n_folds: int = Field(default=5, ge=1, le=100)
+    horizon: int = Field(example=10, ge=1)
+    # Шаг между точками начала прогноза, по умолчанию равен horizon
+    stride: Optional[int] = Field(default=None, ge=1)
+    window: BacktestWindowEnum = BacktestWindowEnum.expanding
+    # Размер обучающего окна для rolling, по умолчанию - все строки
+    # до первой точки начала прогноза
+    train_size: Optional[int] = Field(default=None, ge=1)
+
+    @model_validator(mode="after")
+    def check_parametrs_by_algorithm(self) -> Self:
+
+        params_info = params_registry.get("forecast", self.algorithm)
+        errors = check_algorithm_params(self.algorithm_params, params_info)
 
         if errors:
             raise ValidationError.from_exception_data(
@@ -98,15 +164,44 @@ class TrainTestDataSchema(BaseModel):
         return self
 
 
+class ForecastPredictDataSchema(BaseModel):
+    # Количество шагов прогноза после последней точки истории
+    horizon: Optional[int] = Field(default=None, ge=1, example=30)
+    time_stamps: Optional[List[datetime]] = None
+    # Новые данные: история целевой переменной и экзогенные переменные
+    file_id: Optional[PydanticObjectId] = None
+
+    @model_validator(mode="after")
+    def check_horizon(self) -> Self:
+        if (self.horizon is None) == (self.time_stamps is None):
+            raise ValidationError.from_exception_data(
+                "Проверка горизонта прогноза",
+                [
+                    InitErrorDetails(
+                        type=PydanticCustomError(
+                            "forecast_horizon_required",
+                            "Необходимо указать либо horizon, "
+                            "либо time_stamps",
+                        ),
+                        loc=("horizon",),
+                        input=self.horizon,
+                    )
+                ],
+            )
+        return self
+
+
 class StatusForecastEnum(str, Enum):
     process = "in_process"
     success = "success"
     error = "error"
+    cancelled = "cancelled"
 
 
 class ResultForecastSchema(BaseModel):
     id: Optional[str] = None
     message: Optional[str] = None
+    from_cache: bool = False
     status: StatusForecastEnum = StatusForecastEnum.success
     params: Optional[TrainTestDataSchema] = None
     train_metrics: Optional[dict[str, Any]] = None
@@ -114,6 +209,8 @@ class ResultForecastSchema(BaseModel):
     test_ts: Optional[TimeseriesSchema] = None
     train_ts: Optional[TimeseriesSchema] = None
     exog_ts: Optional[TimeseriesSchema] = None
+    duration: Optional[float] = Field(default=None, example=1.25)
+    peak_memory: Optional[int] = Field(default=None, example=104857600)
 
 
 class ResultForecastDataListSchema(BaseModel):
@@ -131,6 +228,7 @@ class ResultForecastListSchema(BaseModel):
 
 class ForecastProgressEnum(Enum):
     start = ("Запрос получен.", 5)
+    queued = ("Ожидание свободного места в очереди обучения.", 8)
     file_exist = (
         "Файл с датасетом найден. Запускается процесс прогнозирования.",
         10,
@@ -138,6 +236,7 @@ class ForecastProgressEnum(Enum):
     data_loaded = ("Данные из файла загружены.", 20)
     model_initialized = ("Модель инициализирована.", 25)
     training_started = ("Обучение модели началось.", 30)
+    training = ("Идет обучение модели.", 50)
     training_completed = ("Обучение модели завершено.", 70)
     train_metrics_computed = ("Обучающие метрики вычислены.", 75)
     test_metrics_computed = ("Тестовые метрики вычислены.", 80)
@@ -172,6 +271,11 @@ class ResultWebSocketForecastSchema(BaseModel):
     detail: Optional[List[dict[str, Any]]] = None
 
     message: Optional[str] = None
+    from_cache: bool = False
+    # Позиция в очереди обучения, пока задача ожидает запуска
+    queue_position: Optional[int] = None
+    # Ход обучения: эпоха, loss, прошедшее и оставшееся время
+    training: Optional[TrainingProgressSchema] = None
     data: Optional[ResultWebSocketForecastDataSchema] = None
 
     @field_serializer("progress")
@@ -179,3 +283,130 @@ class ResultWebSocketForecastSchema(BaseModel):
         if value is None:
             return None
         return {"percent": value.percent, "stage": value.stage}
+
+
+class ResultWebSocketForecastPredictSchema(BaseModel):
+    status: StatusForecastEnum = StatusForecastEnum.success
+    progress: Optional[ForecastProgressEnum] = None
+    detail: Optional[List[dict[str, Any]]] = None
+
+    data: Optional[TimeseriesSchema] = None
+
+    @field_serializer("progress")
+    def serialize_progress(self, value: ForecastProgressEnum, _info):
+        if value is None:
+            return None
+        return {"percent": value.percent, "stage": value.stage}
+
+
+class ForecastLeaderboardSchema(BaseModel):
+    metric: ForecastMetricEnum
+    entries: List[LeaderboardEntrySchema] = []
+
+
+class ResultWebSocketForecastLeaderboardSchema(BaseModel):
+    status: StatusForecastEnum = StatusForecastEnum.success
+    progress: Optional[ForecastProgressEnum] = None
+    detail: Optional[List[dict[str, Any]]] = None
+
+    message: Optional[str] = None
+    # Алгоритм, к которому относится событие прогресса
+    candidate: Optional[str] = None
+    queue_position: Optional[int] = None
+    # Ход обучения: эпоха, loss, прошедшее и оставшееся время
+    training: Optional[TrainingProgressSchema] = None
+    data: Optional[ForecastLeaderboardSchema] = None
+
+    @field_serializer("progress")
+    def serialize_progress(self, value: ForecastProgressEnum, _info):
+        if value is None:
+            return None
+        return {"percent": value.percent, "stage": value.stage}
+
+
+class BacktestFoldSchema(BaseModel):
+    fold: int = Field(example=0)
+    status: StatusForecastEnum = StatusForecastEnum.success
+    message: Optional[str] = None
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+    train_rows: int = Field(example=120)
+    train_metrics: Optional[dict[str, Any]] = None
+    test_metrics: Optional[dict[str, Any]] = None
+    duration: Optional[float] = Field(default=None, example=1.25)
+
+
+class ForecastBacktestSchema(BaseModel):
+    algorithm: AlgorithmForecast
+    window: BacktestWindowEnum
+    horizon: int
+    stride: int
+    folds: List[BacktestFoldSchema] = []
+    # Среднее, стандартное отклонение, минимум и максимум метрик
+    # тестовой выборки по успешным фолдам
+    aggregate_metrics: dict[str, dict[str, float]] = {}
+
+
+class ForecastBatchDataSchema(BaseModel):
+    file_id: PydanticObjectId
+    algorithm: AlgorithmForecast = Field(example=AlgorithmForecast.Arima)
+    algorithm_params: List[ParamsAlgorithmSchema] = []
+    train_percentage: int = Field(example=80, le=100, ge=10)
+    # Широкий формат: отдельная колонка для каждого ряда
+    target_cols: Optional[List[str]] = Field(
+        default=None, min_length=1, example=["store_1", "store_2"]
+    )
+    # Длинный формат: колонка с идентификатором ряда и колонка значений
+    series_col: Optional[str] = Field(default=None, example="store_id")
+    value_col: Optional[str] = Field(default=None, example="sales")
+
+    @model_validator(mode="after")
+    def check_parametrs_by_algorithm(self) -> Self:
+
+        params_info = params_registry.get("forecast", self.algorithm)
+        errors = check_algorithm_params(self.algorithm_params, params_info)
+
+        is_long = self.series_col is not None or self.value_col is not None
+        if (self.target_cols is None) == (not is_long) or (
+            is_long and not (self.series_col and self.value_col)
+        ):
+            errors.append(
+                InitErrorDetails(
+                    type=PydanticCustomError(
+                        "batch_format_required",
+                        "Необходимо указать либо target_cols, "
+                        "либо series_col и value_col",
+                    ),
+                    loc=("target_cols",),
+                    input=self.target_cols,
+                )
+            )
+
+        if errors:
+            raise ValidationError.from_exception_data(
+                "Проверка параметров алгоритма", errors
+            )
+        return self
+
+
+class ForecastSeriesSchema(BaseModel):
+    series: str = Field(example="store_1")
+    status: StatusForecastEnum = StatusForecastEnum.success
+    message: Optional[str] = None
+    train_metrics: Optional[dict[str, Any]] = None
+    test_metrics: Optional[dict[str, Any]] = None
+    duration: Optional[float] = Field(default=None, example=1.25)
+
+
+class ForecastBatchSchema(BaseModel):
+    id: str
+    status: StatusForecastEnum = StatusForecastEnum.success
+    message: Optional[str] = None
+    params: ForecastBatchDataSchema
+    series: List[ForecastSeriesSchema] = []
+    # Прогнозы тестовой части, отдельная колонка для каждого ряда
+    forecast: Optional[TimeseriesSchema] = None
+    duration: Optional[float] = Field(default=None, example=12.5)
+    created_at: datetime
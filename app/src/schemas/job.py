@@ -0,0 +1,31 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class StatusJobEnum(str, Enum):
+    queued = "queued"
+    process = "in_process"
+    success = "success"
+    error = "error"
+    cancelled = "cancelled"
+
+
+class KindJobEnum(str, Enum):
+    forecast = "forecast"
+    anomaly = "anomaly"
+
+
+class JobSchema(BaseModel):
+    id: str = Field(example="665271bff4546cdc3faa2719")
+    kind: KindJobEnum
+    status: StatusJobEnum
+    progress: Optional[dict[str, Any]] = None
+    message: Optional[str] = None
+    detail: Optional[List[dict[str, Any]]] = None
+    result_id: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
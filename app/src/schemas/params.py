@@ -0,0 +1,16 @@
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class AlgorithmParameterSchema(BaseModel):
+    type: str = Field(example="int")
+    default: Any = Field(default=None, example=100)
+    # Допустимые значения параметра-перечисления
+    values: Optional[List[str]] = None
+
+
+class AlgorithmParametersSchema(BaseModel):
+    forecast: dict[str, dict[str, AlgorithmParameterSchema]] = {}
+    anomaly: dict[str, dict[str, AlgorithmParameterSchema]] = {}
+    threshold: dict[str, dict[str, AlgorithmParameterSchema]] = {}
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class ProgressStatsSchema(BaseModel):
+    published: int = Field(example=120)
+    topics: int = Field(example=2)
+    subscriptions: int = Field(example=3)
+    fanout: bool = False
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+from schemas.job import KindJobEnum
+
+
+class RegisteredModelSchema(BaseModel):
+    id: str = Field(example="665271bff4546cdc3faa2719")
+    result_id: str = Field(example="665271bff4546cdc3faa2719")
+    kind: KindJobEnum
+    algorithm: str = Field(example="Arima")
+    version: int = Field(example=1)
+    size: int = Field(example=10240)
+    training_time: Optional[float] = Field(example=1.25)
+    dataset_hash: Optional[str] = None
+    params: Optional[dict[str, Any]] = None
+    created_at: datetime
+
+
+class ListRegisteredModelsSchema(BaseModel):
+    data: List[RegisteredModelSchema] = []
+
+
+class ModelCacheStatsSchema(BaseModel):
+    entries: int = Field(example=3)
+    size: int = Field(example=10485760)
+    max_size: int = Field(example=536870912)
+    hits: int = Field(example=30)
+    misses: int = Field(example=3)
+    hit_ratio: Optional[float] = Field(example=0.91)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class SchedulerStatsSchema(BaseModel):
+    running: int = Field(example=2)
+    waiting: int = Field(example=5)
+    max_running: int = Field(example=4)
+    user_max_running: int = Field(example=2)
+    max_queue: int = Field(example=100)
+    rejected: int = Field(example=0)
+    # Количество выполняемых задач каждого пользователя
+    users: dict[str, int] = {}
@@ -0,0 +1,10 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class StartupStatsSchema(BaseModel):
+    startup_time: Optional[float] = Field(default=None, example=1.6)
+    ml_loaded_on_import: bool = False
+    ml_import_time: Optional[float] = Field(default=None, example=3.2)
+    workers_ready_time: Optional[float] = Field(default=None, example=5.4)
@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ThreadStatsSchema(BaseModel):
+    cpus: int = Field(example=8)
+    slots: int = Field(example=4)
+    # Потоков на задачу обучения; None - без ограничения
+    threads_per_job: Optional[int] = Field(example=2)
+    affinity: bool = False
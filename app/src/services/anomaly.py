@@ -6,31 +6,107 @@
 #
 
 import asyncio
+import time
 from functools import lru_cache
-from typing import Any, AsyncGenerator, List
+from typing import Any, AsyncGenerator, List, Optional
 
 from fastapi import Depends
 
+from core.config import settings
+from core.executor import (
+    ResourceUsage,
+    TrainingCancelledError,
+    TrainingExecutor,
+    TrainingLimitError,
+    get_training_executor,
+)
+from core.scheduler import (
+    TrainingScheduler,
+    gather_limited,
+    get_training_scheduler,
+)
 from exceptions.anomaly import AnomalyServiceException
 from models.anomaly import ResultAnomalyModel, StatusAnomalyEnum
-from schemas.anomaly import AnomalyProgressEnum, AnomalyTrainTestDataSchema
-from services.base import BaseAnomalyService
-from services.merlion.models import AnomalyModel
+from models.dataset import Dataset
+from schemas.anomaly import (
+    AnomalyCandidateSchema,
+    AnomalyLeaderboardDataSchema,
+    AnomalyLeaderboardSchema,
+    AnomalyProgressEnum,
+    AnomalyScoreDataSchema,
+    AnomalyScoreSchema,
+    AnomalySearchDataSchema,
+    AnomalyTrainTestDataSchema,
+)
+from schemas.base import LeaderboardEntrySchema, SearchResultSchema
+from schemas.job import KindJobEnum
+from services.base import (
+    BaseAnomalyService,
+    BaseModelRegistryService,
+    BaseTrainingCacheService,
+)
+from services.cache import get_training_cache_service
+from services.leaderboard import ERROR, SUCCESS, rank_leaderboard
+from services.merlion import models as merlion_models
+from services.registry import get_model_registry_service
+from services.search import count_configs, run_search
 from storages.anomaly import get_anomaly_storage
 from storages.base import BaseAnomalyStorage, BaseDatasetStorage
 from storages.dataset import get_dataset_storage
-from utils import serializer_timeseries_to_pydantic
+from utils import (
+    load_dataset,
+    open_dataset,
+    serializer_dataframe_to_pydantic,
+    serializer_timeseries_to_pydantic,
+)
+
+# Минимальная длина временного ряда для обучения
+MIN_SERIES_LENGTH = 20
+
+# Поля результата, которые сохраняются в кэше обучения
+CACHED_RESULT_FIELDS = {
+    "train_metrics",
+    "test_metrics",
+    "test_ts",
+    "test_pred",
+    "test_labels",
+}
 
 
 class AnomalyService(BaseAnomalyService):
 
     def __init__(
-        self, storage: BaseAnomalyStorage, dataset_storage: BaseDatasetStorage
+        self,
+        storage: BaseAnomalyStorage,
+        dataset_storage: BaseDatasetStorage,
+        executor: TrainingExecutor,
+        cache: BaseTrainingCacheService,
+        registry: BaseModelRegistryService,
+        scheduler: TrainingScheduler,
     ) -> None:
         self.storage = storage
         self.dataset_storage = dataset_storage
+        self.executor = executor
+        self.cache = cache
+        self.registry = registry
+        self.scheduler = scheduler
+
+    def _queue_slot(
+        self,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+        jobs: int = 1,
+    ):
+        """Места в очереди обучения для `jobs` обучений с отправкой
+        позиции в прогресс."""
 
-    models_storage = "data"  # Папка где хранятся модели
+        async def on_position(position: int):
+            set_progress(AnomalyProgressEnum.queued, queue_position=position)
+
+        return self.scheduler.slot(
+            user_id, on_position, cancel_event, jobs=jobs
+        )
 
     async def get_users_history(
         self, user_id: str
@@ -48,7 +124,11 @@ class AnomalyService(BaseAnomalyService):
         return obj
 
     async def get_train_test_result(
-        self, data: AnomalyTrainTestDataSchema, user_id: str, set_progress: Any
+        self,
+        data: AnomalyTrainTestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
     ) -> ResultAnomalyModel:
 
         result_in_db = ResultAnomalyModel(user_id=user_id, params=data)
@@ -60,13 +140,45 @@ class AnomalyService(BaseAnomalyService):
             raise AnomalyServiceException(
                 msg="Файл с датасетом временного ряда не существует."
             )
-        await set_progress(AnomalyProgressEnum.file_exist)
-        await asyncio.sleep(0.01)
+        set_progress(AnomalyProgressEnum.file_exist)
+        self._check_profile(file)
 
-        try:
-            train_metrics, test_metrics, test_ts, test_pred, test_labels = (
-                await self._train(
+        cache_key = await self.cache.make_key(
+            KindJobEnum.anomaly, file.file_path, data
+        )
+        cached = await self.cache.get(cache_key)
+        if cached:
+            result_in_db = ResultAnomalyModel(
+                user_id=user_id, params=data, from_cache=True, **cached.result
+            )
+            set_progress(AnomalyProgressEnum.full_process_success)
+            await self.registry.register(
+                user_id=user_id,
+                result_id=str(result_in_db.id),
+                kind=KindJobEnum.anomaly,
+                algorithm=data.algorithm.value,
+                source_path=cached.model_path,
+                dataset_path=file.file_path,
+                params=data.model_dump(mode="json"),
+            )
+            await self.storage.save_result(data=result_in_db)
+            set_progress(AnomalyProgressEnum.save_to_db_success)
+            return result_in_db
+
+        usage = ResourceUsage()
+        async with self._queue_slot(user_id, set_progress, cancel_event):
+            try:
+                started = time.monotonic()
+                (
+                    train_metrics,
+                    test_metrics,
+                    test_ts,
+                    test_pred,
+                    test_labels,
+                    model,
+                ) = await self._train(
                     set_progress=set_progress,
+                    cancel_event=cancel_event,
                     file_path=file.file_path,
                     columns=data.columns,
                     algorithm=data.algorithm,
@@ -77,37 +189,72 @@ class AnomalyService(BaseAnomalyService):
                     test_filename=data.test_filename,
                     threshold_class=data.threshold_class,
                     threshold_params=data.threshold_params,
+                    usage=usage,
+                )
+                training_time = round(time.monotonic() - started, 3)
+                # Отмена в последние моменты обучения: результат не должен
+                # попасть в реестр, кэш и историю как успешный
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TrainingCancelledError()
+                # Модель регистрируется до сохранения результата, чтобы
+                # успешный результат всегда имел модель в реестре
+                set_progress(AnomalyProgressEnum.save_model_train)
+                await self.registry.register(
+                    user_id=user_id,
+                    result_id=str(result_in_db.id),
+                    kind=KindJobEnum.anomaly,
+                    algorithm=data.algorithm.value,
+                    model=model,
+                    training_time=training_time,
+                    dataset_path=file.file_path,
+                    params=data.model_dump(mode="json"),
                 )
-            )
 
-        except AnomalyServiceException as e:
-            raise e
-        except Exception as e:
-            result_in_db.status = StatusAnomalyEnum.error
-            result_in_db.message = str(e)
-            raise AnomalyServiceException(
-                msg="Не удалось произвести вычисления."
-            )
+            except AnomalyServiceException as e:
+                raise e
+            except TrainingCancelledError as e:
+                result_in_db.status = StatusAnomalyEnum.cancelled
+                result_in_db.message = "Вычисления отменены пользователем."
+                raise e
+            except TrainingLimitError as e:
+                result_in_db.status = StatusAnomalyEnum.error
+                result_in_db.message = str(e)
+                raise AnomalyServiceException(msg=str(e))
+            except Exception as e:
+                result_in_db.status = StatusAnomalyEnum.error
+                result_in_db.message = str(e)
+                raise AnomalyServiceException(
+                    msg="Не удалось произвести вычисления."
+                )
 
-        else:
+            else:
+                set_progress(AnomalyProgressEnum.full_process_success)
+                result_in_db.train_metrics = train_metrics
+                result_in_db.test_metrics = test_metrics
+                result_in_db.test_ts = serializer_timeseries_to_pydantic(
+                    test_ts
+                )
+                result_in_db.test_pred = serializer_timeseries_to_pydantic(
+                    test_pred
+                )
+                result_in_db.test_labels = serializer_timeseries_to_pydantic(
+                    test_labels
+                )
 
-            await set_progress(AnomalyProgressEnum.full_process_success)
-            await asyncio.sleep(0.01)
-            result_in_db.train_metrics = train_metrics
-            result_in_db.test_metrics = test_metrics
-            result_in_db.test_ts = serializer_timeseries_to_pydantic(test_ts)
-            result_in_db.test_pred = serializer_timeseries_to_pydantic(
-                test_pred
-            )
-            result_in_db.test_labels = serializer_timeseries_to_pydantic(
-                test_labels
-            )
+            finally:
+                result_in_db.duration = usage.duration
+                result_in_db.peak_memory = usage.peak_memory
+                await self.storage.save_result(data=result_in_db)
 
-        finally:
-            await self.storage.save_result(data=result_in_db)
+        set_progress(AnomalyProgressEnum.save_to_db_success)
 
-        await set_progress(AnomalyProgressEnum.save_to_db_success)
-        await asyncio.sleep(0.01)
+        await self.cache.put(
+            cache_key,
+            KindJobEnum.anomaly,
+            data.algorithm.value,
+            result_in_db.model_dump(include=CACHED_RESULT_FIELDS),
+            model,
+        )
 
         return result_in_db
 
@@ -124,6 +271,8 @@ class AnomalyService(BaseAnomalyService):
         test_filename=None,
         threshold_class=None,
         threshold_params=None,
+        cancel_event: Optional[asyncio.Event] = None,
+        usage: Optional[ResourceUsage] = None,
     ):
 
         if not file_path:
@@ -137,34 +286,21 @@ class AnomalyService(BaseAnomalyService):
                 msg="Пожалуйста, выберите детектор аномалий для обучения."
             )
 
-        df = AnomalyModel().load_data(file_path=file_path)
-
-        if len(df) <= 20:
-            raise AnomalyServiceException(
-                msg=f"Длина входного временного ряда ({len(df)}) слишком мала."
-            )
-
-        if file_mode == "single":
-            n = int(int(train_percentage) * len(df) / 100)
-            train_df, test_df = df.iloc[:n], df.iloc[n:]
-        else:
-            if not test_filename:
-                raise AnomalyServiceException(msg="Тестовый файл пуст!")
-            test_df = AnomalyModel().load_data(file_path=test_filename)
-            train_df = df
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file_path,
+            train_percentage,
+            file_mode,
+            test_filename,
+            columns=[*columns, label_column],
+        )
 
-        await set_progress(AnomalyProgressEnum.data_loaded)
-        await asyncio.sleep(0.01)
+        set_progress(AnomalyProgressEnum.data_loaded)
 
         alg_params = {p.parametr: p.value for p in algorithm_params}
-
-        if threshold_class:
-            threshold_class_and_params = (
-                threshold_class,
-                {p.parametr: p.value for p in threshold_params},
-            )
-        else:
-            threshold_class_and_params = None
+        threshold_class_and_params = self._threshold(
+            threshold_class, threshold_params
+        )
 
         (
             model,
@@ -173,7 +309,8 @@ class AnomalyService(BaseAnomalyService):
             test_ts,
             test_pred,
             test_labels,
-        ) = await AnomalyModel().train(
+        ) = await self.executor.run(
+            merlion_models.AnomalyModel().train,
             algorithm,
             train_df,
             test_df,
@@ -181,19 +318,395 @@ class AnomalyService(BaseAnomalyService):
             label_column,
             alg_params,
             threshold_class_and_params,
+            set_progress=set_progress,
+            cancel_event=cancel_event,
+            usage=usage,
+        )
+
+        return (
+            train_metrics,
+            test_metrics,
+            test_ts,
+            test_pred,
+            test_labels,
+            model,
+        )
+
+    @staticmethod
+    def _check_profile(file: Dataset):
+        """Отклонить слишком короткий ряд по профилю датасета, не читая
+        файл. Пока профиль не построен, длина проверяется при загрузке."""
+        if file.profile and file.profile.rows <= MIN_SERIES_LENGTH:
+            raise AnomalyServiceException(
+                msg=f"Длина входного временного ряда ({file.profile.rows}) "
+                "слишком мала."
+            )
+
+    def _load_train_test(
+        self,
+        file_path,
+        train_percentage,
+        file_mode,
+        test_filename,
+        columns=None,
+    ):
+        """Загрузить датасет и разделить его на обучающую и тестовую части.
+
+        Загружаются только колонки `columns` (по умолчанию все). Если они
+        есть в хранилище колонок, возвращаются `DatasetView`, данные которых
+        читает процесс-воркер.
+        """
+        df = open_dataset(file_path, columns)
+
+        if len(df) <= MIN_SERIES_LENGTH:
+            raise AnomalyServiceException(
+                msg=f"Длина входного временного ряда ({len(df)}) слишком мала."
+            )
+
+        if file_mode == "single":
+            n = int(int(train_percentage) * len(df) / 100)
+            return df.iloc[:n], df.iloc[n:]
+
+        if not test_filename:
+            raise AnomalyServiceException(msg="Тестовый файл пуст!")
+        test_df = load_dataset(test_filename, columns)
+        return df, test_df
+
+    @staticmethod
+    def _threshold(threshold_class, threshold_params):
+        if not threshold_class:
+            return None
+        return (
+            threshold_class,
+            {p.parametr: p.value for p in threshold_params or []},
+        )
+
+    async def get_leaderboard(
+        self,
+        data: AnomalyLeaderboardDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> AnomalyLeaderboardSchema:
+        """Обучить несколько детекторов на одном датасете и ранжировать их.
+
+        Датасет загружается и делится один раз, кандидаты обучаются
+        параллельно в пуле процессов. Если кандидаты не указаны,
+        сравниваются все детекторы, доступные для выбранных переменных.
+        """
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise AnomalyServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(AnomalyProgressEnum.file_exist)
+        self._check_profile(file)
+
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file.file_path,
+            data.train_percentage,
+            data.file_mode,
+            data.test_filename,
+            columns=[*data.columns, data.label_column],
+        )
+        set_progress(AnomalyProgressEnum.data_loaded)
+
+        available = merlion_models.AnomalyModel.get_available_algorithms(
+            len(data.columns)
+        )
+        candidates = data.candidates or [
+            AnomalyCandidateSchema(algorithm=algorithm)
+            for algorithm in available
+            if is_algorithm_available(algorithm)
+        ]
+        threshold = self._threshold(
+            data.threshold_class, data.threshold_params
+        )
+        async with self._queue_slot(
+            user_id, set_progress, cancel_event, jobs=len(candidates)
+        ) as units:
+            entries = await gather_limited(
+                [
+                    self._train_candidate(
+                        candidate,
+                        data,
+                        train_df,
+                        test_df,
+                        threshold,
+                        set_progress,
+                        cancel_event,
+                    )
+                    for candidate in candidates
+                ],
+                units,
+            )
+        for entry in entries:
+            if isinstance(entry, BaseException):
+                raise entry
+
+        return AnomalyLeaderboardSchema(
+            metric=data.metric,
+            entries=rank_leaderboard(
+                entries, data.metric.value, higher_is_better=True
+            ),
+        )
+
+    async def _train_candidate(
+        self,
+        candidate: AnomalyCandidateSchema,
+        data: AnomalyLeaderboardDataSchema,
+        train_df,
+        test_df,
+        threshold,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> LeaderboardEntrySchema:
+        algorithm = candidate.algorithm
+
+        def set_candidate_progress(progress, **info):
+            set_progress(progress, candidate=algorithm, **info)
+
+        entry = LeaderboardEntrySchema(
+            algorithm=algorithm,
+            algorithm_params=candidate.algorithm_params,
+            status=SUCCESS,
+        )
+        started = time.monotonic()
+        try:
+            result = await self.executor.run(
+                merlion_models.AnomalyModel().train,
+                algorithm,
+                train_df,
+                test_df,
+                list(data.columns),
+                data.label_column,
+                {p.parametr: p.value for p in candidate.algorithm_params},
+                threshold,
+                set_progress=set_candidate_progress,
+                cancel_event=cancel_event,
+            )
+            entry.train_metrics, entry.test_metrics = result[1], result[2]
+        except TrainingCancelledError:
+            raise
+        except Exception as e:
+            entry.status = ERROR
+            entry.message = str(e)
+        entry.duration = round(time.monotonic() - started, 3)
+        set_candidate_progress(AnomalyProgressEnum.sget_test_pred)
+        return entry
+
+    async def search(
+        self,
+        data: AnomalySearchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> SearchResultSchema:
+        """Подобрать параметры детектора и сохранить лучшую модель.
+
+        Испытания выполняются в пуле процессов, при стратегии halving худшие
+        конфигурации отсекаются на урезанной обучающей выборке. В историю и
+        в реестр моделей сохраняется только лучшая конфигурация.
+        """
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise AnomalyServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(AnomalyProgressEnum.file_exist)
+        self._check_profile(file)
+
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file.file_path,
+            data.train_percentage,
+            data.file_mode,
+            data.test_filename,
+            columns=[*data.columns, data.label_column],
+        )
+        set_progress(AnomalyProgressEnum.data_loaded)
+        threshold = self._threshold(
+            data.threshold_class, data.threshold_params
+        )
+
+        async def run_trial(config, train_rows):
+            return await self.executor.run(
+                merlion_models.AnomalyModel().evaluate,
+                data.algorithm,
+                train_df.iloc[-train_rows:],
+                test_df,
+                list(data.columns),
+                data.label_column,
+                {p.parametr: p.value for p in config},
+                threshold,
+                set_progress=set_progress,
+                cancel_event=cancel_event,
+            )
+
+        async with self._queue_slot(
+            user_id,
             set_progress,
+            cancel_event,
+            jobs=count_configs(data),
+        ) as units:
+            trials, best = await run_search(
+                data,
+                data.algorithm.value,
+                len(train_df),
+                run_trial,
+                data.metric.value,
+                limit=units,
+                higher_is_better=True,
+            )
+            # Модель лучшей конфигурации обучается заново на всей обучающей
+            # выборке, чтобы не хранить модели испытаний
+            if best is not None:
+                best_result = await self.executor.run(
+                    merlion_models.AnomalyModel().train,
+                    data.algorithm,
+                    train_df,
+                    test_df,
+                    list(data.columns),
+                    data.label_column,
+                    {p.parametr: p.value for p in best.algorithm_params},
+                    threshold,
+                    set_progress=set_progress,
+                    cancel_event=cancel_event,
+                )
+        search_result = SearchResultSchema(
+            strategy=data.strategy, metric=data.metric.value, trials=trials
+        )
+        if best is None:
+            return search_result
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelledError()
+
+        (
+            model,
+            train_metrics,
+            test_metrics,
+            test_ts,
+            test_pred,
+            test_labels,
+        ) = best_result
+        result_in_db = ResultAnomalyModel(
+            user_id=user_id,
+            params=AnomalyTrainTestDataSchema(
+                **data.model_dump(
+                    include=set(AnomalyTrainTestDataSchema.model_fields)
+                ),
+                algorithm_params=best.algorithm_params,
+            ),
+            train_metrics=train_metrics,
+            test_metrics=test_metrics,
+            test_ts=serializer_timeseries_to_pydantic(test_ts),
+            test_pred=serializer_timeseries_to_pydantic(test_pred),
+            test_labels=serializer_timeseries_to_pydantic(test_labels),
+        )
+        set_progress(AnomalyProgressEnum.save_model_train)
+        await self.registry.register(
+            user_id=user_id,
+            result_id=str(result_in_db.id),
+            kind=KindJobEnum.anomaly,
+            algorithm=data.algorithm.value,
+            model=model,
+            dataset_path=file.file_path,
+            params=result_in_db.params.model_dump(mode="json"),
+        )
+        await self.storage.save_result(data=result_in_db)
+        set_progress(AnomalyProgressEnum.save_to_db_success)
+
+        search_result.best_params = best.algorithm_params
+        search_result.result_id = str(result_in_db.id)
+        return search_result
+
+    async def score(
+        self,
+        data: AnomalyScoreDataSchema,
+        user_id: str,
+        anomaly_id: str,
+    ) -> AnomalyScoreSchema:
+        """Найти аномалии в новом датасете сохраненным детектором.
+
+        Детектор берется из реестра моделей, датасет читается и
+        обрабатывается частями по `SCORING_CHUNK_ROWS` строк, график не
+        строится. В ответе возвращаются только точки с аномалиями.
+        """
+        result = await self.get_users_history_by_id(
+            user_id=user_id, anomaly_id=anomaly_id
+        )
+        _, loaded = await self.registry.load(
+            user_id=user_id, result_id=anomaly_id
+        )
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise AnomalyServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+
+        chunks = merlion_models.AnomalyModel.load_data_chunks(
+            file.file_path,
+            settings.SCORING.CHUNK_ROWS,
+            start=data.start,
+            end=data.end,
+        )
+        try:
+            test_metrics, test_pred, _ = await asyncio.to_thread(
+                loaded.call,
+                merlion_models.AnomalyModel().test,
+                chunks,
+                result.params.columns,
+                data.label_column,
+                self._threshold(data.threshold_class, data.threshold_params),
+                lambda progress: None,
+                plot=False,
+                context_size=settings.SCORING.CONTEXT_ROWS,
+            )
+        except Exception as e:
+            raise AnomalyServiceException(
+                msg=f"Не удалось найти аномалии: {e}"
+            )
+
+        df = test_pred.to_pd()
+        anomalies = df[df.iloc[:, 0] != 0]
+        return AnomalyScoreSchema(
+            n_points=len(df),
+            n_anomalies=len(anomalies),
+            test_metrics=test_metrics,
+            anomalies=serializer_dataframe_to_pydantic(anomalies),
         )
 
-        await set_progress(AnomalyProgressEnum.save_model_train)
-        await asyncio.sleep(0.01)
-        AnomalyModel.save_model(self.models_storage, model, algorithm)
 
-        return (train_metrics, test_metrics, test_ts, test_pred, test_labels)
+def is_algorithm_available(algorithm: str) -> bool:
+    """Проверить, что зависимости алгоритма установлены."""
+    try:
+        merlion_models.AnomalyModel.get_parameter_info(algorithm=algorithm)
+    except ImportError:
+        return False
+    return True
 
 
 @lru_cache()
 def get_anomaly_service(
     storage: BaseAnomalyStorage = Depends(get_anomaly_storage),
     dataset_storage: BaseDatasetStorage = Depends(get_dataset_storage),
+    executor: TrainingExecutor = Depends(get_training_executor),
+    cache: BaseTrainingCacheService = Depends(get_training_cache_service),
+    registry: BaseModelRegistryService = Depends(get_model_registry_service),
+    scheduler: TrainingScheduler = Depends(get_training_scheduler),
 ) -> AnomalyService:
-    return AnomalyService(storage=storage, dataset_storage=dataset_storage)
+    return AnomalyService(
+        storage=storage,
+        dataset_storage=dataset_storage,
+        executor=executor,
+        cache=cache,
+        registry=registry,
+        scheduler=scheduler,
+    )
@@ -1,11 +1,37 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Optional, Tuple
+
+from pydantic import BaseModel
 
 from models.anomaly import ResultAnomalyModel
+from models.cache import TrainingCacheEntry
 from models.dataset import Dataset
-from models.forecast import ResultForecastModel
+from models.forecast import ResultForecastBatchModel, ResultForecastModel
+from models.job import TrainingJob
+from models.registry import RegisteredModel
 from schemas import ConfirmEmailSchema, CreateUserSchema, LoginSchema
-from schemas.forecast import TrainTestDataSchema
+from schemas.anomaly import (
+    AnomalyLeaderboardDataSchema,
+    AnomalyLeaderboardSchema,
+    AnomalyScoreDataSchema,
+    AnomalyScoreSchema,
+    AnomalySearchDataSchema,
+)
+from schemas.base import SearchResultSchema, TimeseriesSchema
+from schemas.cache import TrainingCacheStatsSchema
+from schemas.forecast import (
+    ForecastBacktestDataSchema,
+    ForecastBacktestSchema,
+    ForecastBatchDataSchema,
+    ForecastLeaderboardDataSchema,
+    ForecastLeaderboardSchema,
+    ForecastPredictDataSchema,
+    ForecastSearchDataSchema,
+    TrainTestDataSchema,
+)
+from schemas.job import KindJobEnum
+from schemas.registry import ModelCacheStatsSchema
 from schemas.user import (
     ChangePasswordUserSchema,
     GetUserProfileSchema,
@@ -13,7 +39,14 @@ from schemas.user import (
     UserImage,
 )
 from storages import BaseAuthStorage, BaseDatasetStorage, BaseUserStorage
-from storages.base import BaseAnomalyStorage, BaseForecastStorage
+from storages.base import (
+    BaseAnomalyStorage,
+    BaseAnomalyStreamStorage,
+    BaseForecastStorage,
+    BaseJobStorage,
+    BaseModelRegistryStorage,
+    BaseTrainingCacheStorage,
+)
 
 
 class BaseService(ABC):
@@ -84,9 +117,62 @@ class BaseForecastService(ABC):
 
     @abstractmethod
     async def get_train_test_result(
-        self, data: TrainTestDataSchema, user_id: str, set_progress: Any
+        self,
+        data: TrainTestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
     ) -> ResultForecastModel: ...
 
+    @abstractmethod
+    async def get_leaderboard(
+        self,
+        data: ForecastLeaderboardDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ForecastLeaderboardSchema: ...
+
+    @abstractmethod
+    async def search(
+        self,
+        data: ForecastSearchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> SearchResultSchema: ...
+
+    @abstractmethod
+    async def backtest(
+        self,
+        data: ForecastBacktestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ForecastBacktestSchema: ...
+
+    @abstractmethod
+    async def predict(
+        self,
+        data: ForecastPredictDataSchema,
+        user_id: str,
+        forecast_id: str,
+    ) -> TimeseriesSchema: ...
+
+    @abstractmethod
+    async def batch(
+        self,
+        data: ForecastBatchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ResultForecastBatchModel: ...
+
+    @abstractmethod
+    async def get_batch_by_id(
+        self, user_id: str, batch_id: str
+    ) -> ResultForecastBatchModel: ...
+
     @abstractmethod
     async def get_users_history(
         self, user_id: str
@@ -122,9 +208,39 @@ class BaseAnomalyService(ABC):
 
     @abstractmethod
     async def get_train_test_result(
-        self, data: TrainTestDataSchema, user_id: str, set_progress: Any
+        self,
+        data: TrainTestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
     ) -> ResultAnomalyModel: ...
 
+    @abstractmethod
+    async def get_leaderboard(
+        self,
+        data: AnomalyLeaderboardDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> AnomalyLeaderboardSchema: ...
+
+    @abstractmethod
+    async def search(
+        self,
+        data: AnomalySearchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> SearchResultSchema: ...
+
+    @abstractmethod
+    async def score(
+        self,
+        data: AnomalyScoreDataSchema,
+        user_id: str,
+        anomaly_id: str,
+    ) -> AnomalyScoreSchema: ...
+
     @abstractmethod
     async def get_users_history(
         self, user_id: str
@@ -134,3 +250,105 @@ class BaseAnomalyService(ABC):
     async def get_users_history_by_id(
         self, user_id: str, anomaly_id: str
     ) -> ResultAnomalyModel: ...
+
+
+class BaseJobService(ABC):
+
+    def __init__(self, storage: BaseJobStorage) -> None:
+        self.storage = storage
+
+    @abstractmethod
+    async def submit(
+        self, kind: KindJobEnum, params: dict, user_id: str
+    ) -> TrainingJob: ...
+
+    @abstractmethod
+    async def cancel(self, user_id: str, job_id: str) -> TrainingJob: ...
+
+    @abstractmethod
+    async def get_users_job(
+        self, user_id: str, job_id: str
+    ) -> TrainingJob: ...
+
+
+class BaseTrainingCacheService(ABC):
+
+    def __init__(self, storage: BaseTrainingCacheStorage) -> None:
+        self.storage = storage
+
+    @abstractmethod
+    async def make_key(
+        self, kind: KindJobEnum, file_path: str, data: BaseModel
+    ) -> Optional[str]: ...
+
+    @abstractmethod
+    async def get(
+        self, key: Optional[str]
+    ) -> Optional[TrainingCacheEntry]: ...
+
+    @abstractmethod
+    async def put(
+        self,
+        key: Optional[str],
+        kind: KindJobEnum,
+        algorithm: str,
+        result: dict[str, Any],
+        model: Any,
+    ): ...
+
+    @abstractmethod
+    async def get_stats(self) -> TrainingCacheStatsSchema: ...
+
+
+class BaseModelRegistryService(ABC):
+
+    def __init__(self, storage: BaseModelRegistryStorage) -> None:
+        self.storage = storage
+
+    @abstractmethod
+    async def register(
+        self,
+        user_id: str,
+        result_id: str,
+        kind: KindJobEnum,
+        algorithm: str,
+        model: Any = None,
+        source_path: Optional[str] = None,
+        training_time: Optional[float] = None,
+        dataset_path: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> RegisteredModel: ...
+
+    @abstractmethod
+    async def load(
+        self, user_id: str, result_id: str
+    ) -> Tuple[RegisteredModel, Any]: ...
+
+    @abstractmethod
+    async def get_users_model(
+        self, user_id: str, model_id: str
+    ) -> RegisteredModel: ...
+
+    @abstractmethod
+    async def get_users_models(
+        self, user_id: str
+    ) -> AsyncGenerator[RegisteredModel, None]: ...
+
+    @abstractmethod
+    def get_cache_stats(self) -> ModelCacheStatsSchema: ...
+
+
+class BaseAnomalyStreamService(ABC):
+
+    def __init__(
+        self,
+        storage: BaseAnomalyStreamStorage,
+        anomaly_storage: BaseAnomalyStorage,
+        registry: BaseModelRegistryService,
+    ) -> None:
+        self.storage = storage
+        self.anomaly_storage = anomaly_storage
+        self.registry = registry
+
+    @abstractmethod
+    async def attach(self, user_id: str, anomaly_id: str) -> Any: ...
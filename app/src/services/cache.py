@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Depends
+from pydantic import BaseModel
+
+from core.config import settings
+from models.base import datetime_now
+from models.cache import TrainingCacheEntry
+from schemas.cache import TrainingCacheStatsSchema
+from schemas.job import KindJobEnum
+from services.base import BaseTrainingCacheService
+from storages.base import BaseTrainingCacheStorage
+from storages.cache import get_training_cache_storage
+from utils import directory_size, file_sha256, params_sha256
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingCacheService(BaseTrainingCacheService):
+    """Кэш результатов обучения.
+
+    Ключ строится по хэшу содержимого датасета и параметрам обучения, поэтому
+    повторный запрос с тем же файлом и теми же параметрами возвращает уже
+    сохраненный результат и модель без повторного обучения.
+    """
+
+    def __init__(self, storage: BaseTrainingCacheStorage) -> None:
+        super().__init__(storage)
+        self.enabled = settings.CACHE.ENABLED
+        self.models_path = settings.CACHE.MODELS_PATH
+
+    async def make_key(
+        self, kind: KindJobEnum, file_path: str, data: BaseModel
+    ) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        params = data.model_dump(
+            mode="json", exclude={"file_id", "test_filename"}
+        )
+        for name in ("algorithm_params", "threshold_params"):
+            if params.get(name):
+                params[name] = sorted(
+                    params[name], key=lambda p: p["parametr"]
+                )
+
+        try:
+            dataset_hash = await asyncio.to_thread(file_sha256, file_path)
+            test_hash = None
+            if data.file_mode != "single" and data.test_filename:
+                test_hash = await asyncio.to_thread(
+                    file_sha256, data.test_filename
+                )
+        except OSError:
+            return None
+
+        return params_sha256(
+            {
+                "kind": kind.value,
+                "dataset": dataset_hash,
+                "test_dataset": test_hash,
+                "params": params,
+            }
+        )
+
+    async def get(self, key: Optional[str]) -> Optional[TrainingCacheEntry]:
+        if key is None:
+            return None
+
+        entry = await self.storage.get(key)
+        if entry and entry.model_path and not os.path.isdir(entry.model_path):
+            entry = None
+        await self.storage.count_request(hit=entry is not None)
+        return entry
+
+    async def put(
+        self,
+        key: Optional[str],
+        kind: KindJobEnum,
+        algorithm: str,
+        result: dict[str, Any],
+        model: Any,
+    ):
+        if key is None:
+            return
+
+        model_path = os.path.join(self.models_path, key)
+        try:
+            await asyncio.to_thread(model.save, model_path)
+            entry = TrainingCacheEntry(
+                key=key,
+                kind=kind,
+                algorithm=algorithm,
+                result=result,
+                model_path=model_path,
+                size=directory_size(model_path)
+                + len(json.dumps(result, default=str)),
+            )
+            await self.storage.put(entry)
+            await self.evict()
+        except Exception:
+            logger.warning(
+                "Не удалось сохранить результат обучения в кэш",
+                exc_info=True,
+            )
+
+    async def evict(self):
+        evicted = await self.storage.evict(
+            used_before=datetime_now()
+            - timedelta(days=settings.CACHE.MAX_AGE_DAYS),
+            max_entries=settings.CACHE.MAX_ENTRIES,
+            max_size=settings.CACHE.MAX_SIZE_MB * 1024 * 1024,
+        )
+        for entry in evicted:
+            if entry.model_path:
+                shutil.rmtree(entry.model_path, ignore_errors=True)
+
+    async def get_stats(self) -> TrainingCacheStatsSchema:
+        stats = await self.storage.get_stats()
+        requests = stats["hits"] + stats["misses"]
+        return TrainingCacheStatsSchema(
+            enabled=self.enabled,
+            hit_ratio=stats["hits"] / requests if requests else None,
+            **stats,
+        )
+
+
+@lru_cache()
+def get_training_cache_service(
+    storage: BaseTrainingCacheStorage = Depends(get_training_cache_storage),
+) -> TrainingCacheService:
+    return TrainingCacheService(storage=storage)
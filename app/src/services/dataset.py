@@ -1,6 +1,9 @@
+import asyncio
+import hashlib
+import logging
 import os
 from functools import lru_cache
-from typing import AsyncGenerator
+from typing import AsyncGenerator, BinaryIO, NamedTuple, Optional
 
 from fastapi import Depends
 from pandas import read_csv
@@ -10,35 +13,105 @@ from exceptions.dataset import DatasetServiceException
 from models import Dataset
 from schemas.dataset import DatasetFile
 from storages import BaseDatasetStorage, get_dataset_storage
+from utils import (
+    build_column_store,
+    convert_to_columnar,
+    profile_dataset,
+    remember_file_sha256,
+)
 
 from .base import BaseDatasetService
 
+logger = logging.getLogger(__name__)
+
+# Фоновая подготовка загруженных датасетов
+_conversions: set[asyncio.Task] = set()
+
+
+class UploadStats(NamedTuple):
+    size: int
+    # Количество строк без заголовка (переводы строк внутри кавычек
+    # считаются отдельными строками)
+    rows: int
+    sha256: str
+
 
 class DatasetService(BaseDatasetService):
     def __init__(self, storage: BaseDatasetStorage) -> None:
         super().__init__(storage)
         self.path_file_storage = settings.FILE_STORAGE.PATH
+        self.max_size = settings.UPLOAD.MAX_SIZE_MB * 2**20
+        self.chunk_size = settings.UPLOAD.CHUNK_SIZE
+        self.columnar = settings.UPLOAD.COLUMNAR
+        self.profile = settings.UPLOAD.PROFILE
 
     async def save_dataset(
         self, dataset_file: DatasetFile, user_id: str
     ) -> Dataset:
         self.validate_file_extension(dataset_file)
+        self.validate_file_size(dataset_file.size)
 
         new_dataset = Dataset(file_name=dataset_file.filename, user_id=user_id)
 
-        path_save = self.save_user_file(
+        path_save, stats = await asyncio.to_thread(
+            self.save_user_file,
             file=dataset_file,
             directory=f"{self.path_file_storage}/{user_id}",
             file_name=f"{new_dataset.id}_{dataset_file.filename}",
         )
 
         new_dataset.file_path = path_save
-        new_dataset.columns = self.get_columns_from_dataset_file(path_save)
+        new_dataset.size = stats.size
+        new_dataset.rows = stats.rows
+        new_dataset.file_hash = stats.sha256
+        new_dataset.columns = await asyncio.to_thread(
+            self.get_columns_from_dataset_file, path_save
+        )
 
         await self.storage.create_document(new_dataset)
+        if self.columnar or self.profile:
+            task = asyncio.create_task(self.prepare_dataset(new_dataset))
+            _conversions.add(task)
+            task.add_done_callback(_conversions.discard)
 
         return new_dataset
 
+    async def prepare_dataset(self, dataset: Dataset):
+        """Подготовить датасет к обучению, не задерживая ответ на загрузку.
+
+        Датасет преобразуется в Parquet и хранилище колонок, затем по
+        копии строится профиль и сохраняется в документ датасета. Пока
+        копии не готовы или если преобразование не удалось, обучение
+        читает CSV-файл; пока нет профиля, длина ряда проверяется после
+        загрузки данных.
+        """
+        path = dataset.file_path
+        if self.columnar:
+            try:
+                await asyncio.to_thread(
+                    convert_to_columnar,
+                    path,
+                    settings.UPLOAD.COLUMNAR_CHUNK_ROWS,
+                )
+                if settings.UPLOAD.COLUMN_STORE:
+                    await asyncio.to_thread(
+                        build_column_store,
+                        path,
+                        settings.UPLOAD.COLUMN_STORE_DTYPE,
+                    )
+            except Exception:
+                logger.warning(
+                    f"Не удалось преобразовать {path}", exc_info=True
+                )
+        if self.profile:
+            try:
+                profile = await asyncio.to_thread(profile_dataset, path)
+                await self.storage.update_profile(str(dataset.id), profile)
+            except Exception:
+                logger.warning(
+                    f"Не удалось построить профиль {path}", exc_info=True
+                )
+
     async def get_user_datasets(
         self, user_id: str
     ) -> AsyncGenerator[Dataset, None]:
@@ -50,22 +123,60 @@ class DatasetService(BaseDatasetService):
                 msg="Недопустимый тип файла. Разрешены только файлы формата CSV."
             )
 
+    def validate_file_size(self, size: Optional[int]):
+        if self.max_size and size is not None and size > self.max_size:
+            raise DatasetServiceException(
+                msg=f"Размер файла превышает {self.max_size // 2**20} МБ.",
+                status_code=413,
+            )
+
     def get_columns_from_dataset_file(self, path: str):
-        df = read_csv(path)
+        # Для списка колонок достаточно заголовка файла
+        df = read_csv(path, nrows=0)
         columns = list(df.columns)
         return columns
 
     def save_user_file(
         self, file: DatasetFile, directory: str, file_name: str
-    ):
+    ) -> tuple[str, UploadStats]:
+        """Записать загруженный файл на диск блоками.
+
+        Выполняется в отдельном потоке. Хэш, размер и количество строк
+        считаются за тот же проход, поэтому память не зависит от размера
+        файла. Файл больше ограничения удаляется.
+        """
         ensure_directory_exists(directory=directory)
 
         path = f"{directory}/{file_name}"
 
-        with open(path, "wb+") as file_object:
-            file_object.write(file.file.read())
-
-        return path
+        file.file.seek(0)
+        try:
+            with open(path, "wb") as file_object:
+                stats = self.copy_file(file.file, file_object)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        remember_file_sha256(path, stats.sha256)
+
+        return path, stats
+
+    def copy_file(self, source: BinaryIO, target: BinaryIO) -> UploadStats:
+        digest = hashlib.sha256()
+        size = lines = 0
+        last = b""
+        for chunk in iter(lambda: source.read(self.chunk_size), b""):
+            size += len(chunk)
+            self.validate_file_size(size)
+            digest.update(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+            target.write(chunk)
+        if last and last != b"\n":
+            lines += 1
+        return UploadStats(
+            size=size, rows=max(lines - 1, 0), sha256=digest.hexdigest()
+        )
 
 
 @lru_cache()
@@ -6,31 +6,126 @@
 #
 
 import asyncio
+import statistics
+import time
 from functools import lru_cache
-from typing import Any, AsyncGenerator, List
+from typing import Any, AsyncGenerator, List, Optional
 
+import pandas as pd
 from fastapi import Depends
 
+from core.config import settings
+from core.executor import (
+    ResourceUsage,
+    TrainingCancelledError,
+    TrainingExecutor,
+    TrainingLimitError,
+    get_training_executor,
+)
+from core.params import params_registry
+from core.scheduler import (
+    TrainingScheduler,
+    gather_limited,
+    get_training_scheduler,
+)
 from exceptions.forecast import ForecastServiceException
-from models.forecast import ResultForecastModel, StatusForecastEnum
-from schemas.forecast import ForecastProgressEnum, TrainTestDataSchema
-from services.base import BaseForecastService
-from services.merlion.models import ForecastModel
+from models.dataset import Dataset
+from models.forecast import (
+    ResultForecastBatchModel,
+    ResultForecastModel,
+    StatusForecastEnum,
+)
+from schemas.base import (
+    LeaderboardEntrySchema,
+    SearchResultSchema,
+    TimeseriesSchema,
+)
+from schemas.forecast import (
+    BacktestFoldSchema,
+    BacktestWindowEnum,
+    ForecastBacktestDataSchema,
+    ForecastBacktestSchema,
+    ForecastBatchDataSchema,
+    ForecastCandidateSchema,
+    ForecastLeaderboardDataSchema,
+    ForecastLeaderboardSchema,
+    ForecastPredictDataSchema,
+    ForecastProgressEnum,
+    ForecastSearchDataSchema,
+    ForecastSeriesSchema,
+    TrainTestDataSchema,
+)
+from schemas.job import KindJobEnum
+from services.base import (
+    BaseForecastService,
+    BaseModelRegistryService,
+    BaseTrainingCacheService,
+)
+from services.cache import get_training_cache_service
+from services.leaderboard import ERROR, SUCCESS, rank_leaderboard
+from services.merlion import models as merlion_models
+from services.registry import get_model_registry_service
+from services.search import count_configs, run_search
 from storages.base import BaseDatasetStorage, BaseForecastStorage
 from storages.dataset import get_dataset_storage
 from storages.forecast import get_forecast_storage
-from utils import serializer_timeseries_to_pydantic
+from utils import (
+    DatasetView,
+    deserializer_timeseries_from_pydantic,
+    load_dataset,
+    open_dataset,
+    serializer_dataframe_to_pydantic,
+    serializer_timeseries_to_pydantic,
+)
+
+# Минимальная длина временного ряда для обучения
+MIN_SERIES_LENGTH = 20
+
+# Поля результата, которые сохраняются в кэше обучения
+CACHED_RESULT_FIELDS = {
+    "train_metrics",
+    "test_metrics",
+    "test_ts",
+    "train_ts",
+    "exog_ts",
+    "test_pred",
+}
 
 
 class ForecastService(BaseForecastService):
 
     def __init__(
-        self, storage: BaseForecastStorage, dataset_storage: BaseDatasetStorage
+        self,
+        storage: BaseForecastStorage,
+        dataset_storage: BaseDatasetStorage,
+        executor: TrainingExecutor,
+        cache: BaseTrainingCacheService,
+        registry: BaseModelRegistryService,
+        scheduler: TrainingScheduler,
     ) -> None:
         self.storage = storage
         self.dataset_storage = dataset_storage
+        self.executor = executor
+        self.cache = cache
+        self.registry = registry
+        self.scheduler = scheduler
+
+    def _queue_slot(
+        self,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+        jobs: int = 1,
+    ):
+        """Места в очереди обучения для `jobs` обучений с отправкой
+        позиции в прогресс."""
 
-    models_storage = "data"  # Папка где хранятся модели
+        async def on_position(position: int):
+            set_progress(ForecastProgressEnum.queued, queue_position=position)
+
+        return self.scheduler.slot(
+            user_id, on_position, cancel_event, jobs=jobs
+        )
 
     async def get_users_history(
         self, user_id: str
@@ -47,8 +142,22 @@ class ForecastService(BaseForecastService):
             raise ForecastServiceException("Объект не найден", status_code=404)
         return obj
 
+    async def get_batch_by_id(
+        self, user_id: str, batch_id: str
+    ) -> ResultForecastBatchModel:
+        obj = await self.storage.get_batch_by_user_and_id(
+            user_id=user_id, batch_id=batch_id
+        )
+        if not obj:
+            raise ForecastServiceException("Объект не найден", status_code=404)
+        return obj
+
     async def get_train_test_result(
-        self, data: TrainTestDataSchema, user_id: str, set_progress: Any
+        self,
+        data: TrainTestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
     ) -> ResultForecastModel:
         result_in_db = ResultForecastModel(user_id=user_id, params=data)
         file = await self.dataset_storage.get_document_by_user_and_id(
@@ -59,55 +168,124 @@ class ForecastService(BaseForecastService):
             raise ForecastServiceException(
                 msg="Файл с датасетом временного ряда не существует."
             )
-        await set_progress(ForecastProgressEnum.file_exist)
-        await asyncio.sleep(0.01)
-        try:
-            (
-                train_metrics,
-                test_metrics,
-                test_ts,
-                train_ts,
-                exog_ts,
-                test_pred,
-            ) = await self._train_test(
-                file_path=file.file_path,
-                target_col=data.target_col,
-                algorithm=data.algorithm,
-                algorithm_params=data.algorithm_params,
-                train_percentage=data.train_percentage,
-                file_mode=data.file_mode,
-                feature_cols=data.feature_cols,
-                exog_cols=data.exog_cols,
-                test_filename=data.test_filename,
-                set_progress=set_progress,
-            )
+        set_progress(ForecastProgressEnum.file_exist)
+        self._check_profile(file)
 
-        except ForecastServiceException as e:
-            raise e
-        except Exception as e:
-            result_in_db.status = StatusForecastEnum.error
-            result_in_db.message = str(e)
-            raise ForecastServiceException(
-                msg="Не удалось произвести вычисления."
+        cache_key = await self.cache.make_key(
+            KindJobEnum.forecast, file.file_path, data
+        )
+        cached = await self.cache.get(cache_key)
+        if cached:
+            result_in_db = ResultForecastModel(
+                user_id=user_id, params=data, from_cache=True, **cached.result
+            )
+            set_progress(ForecastProgressEnum.full_process_success)
+            await self.registry.register(
+                user_id=user_id,
+                result_id=str(result_in_db.id),
+                kind=KindJobEnum.forecast,
+                algorithm=data.algorithm.value,
+                source_path=cached.model_path,
+                dataset_path=file.file_path,
+                params=data.model_dump(mode="json"),
             )
-
-        else:
-            await set_progress(ForecastProgressEnum.full_process_success)
-            await asyncio.sleep(0.01)
-            result_in_db.train_metrics = train_metrics
-            result_in_db.test_metrics = test_metrics
-            result_in_db.test_ts = serializer_timeseries_to_pydantic(test_ts)
-            result_in_db.train_ts = serializer_timeseries_to_pydantic(
-                test_pred
-            )
-            result_in_db.exog_ts = serializer_timeseries_to_pydantic(exog_ts)
-            # result_in_db.test_pred = serializer_timeseries_to_pydantic(test_pred)
-
-        finally:
             await self.storage.save_result(data=result_in_db)
+            set_progress(ForecastProgressEnum.save_to_db_success)
+            return result_in_db
 
-        await set_progress(ForecastProgressEnum.save_to_db_success)
-        await asyncio.sleep(0.01)
+        usage = ResourceUsage()
+        async with self._queue_slot(user_id, set_progress, cancel_event):
+            try:
+                started = time.monotonic()
+                (
+                    train_metrics,
+                    test_metrics,
+                    test_ts,
+                    train_ts,
+                    exog_ts,
+                    test_pred,
+                    model,
+                ) = await self._train_test(
+                    file_path=file.file_path,
+                    target_col=data.target_col,
+                    algorithm=data.algorithm,
+                    algorithm_params=data.algorithm_params,
+                    train_percentage=data.train_percentage,
+                    file_mode=data.file_mode,
+                    feature_cols=data.feature_cols,
+                    exog_cols=data.exog_cols,
+                    test_filename=data.test_filename,
+                    set_progress=set_progress,
+                    cancel_event=cancel_event,
+                    usage=usage,
+                )
+                training_time = round(time.monotonic() - started, 3)
+                # Отмена в последние моменты обучения: результат не должен
+                # попасть в реестр, кэш и историю как успешный
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TrainingCancelledError()
+                # Модель регистрируется до сохранения результата, чтобы
+                # успешный результат всегда имел модель в реестре
+                set_progress(ForecastProgressEnum.save_model_train)
+                await self.registry.register(
+                    user_id=user_id,
+                    result_id=str(result_in_db.id),
+                    kind=KindJobEnum.forecast,
+                    algorithm=data.algorithm.value,
+                    model=model,
+                    training_time=training_time,
+                    dataset_path=file.file_path,
+                    params=data.model_dump(mode="json"),
+                )
+
+            except ForecastServiceException as e:
+                raise e
+            except TrainingCancelledError as e:
+                result_in_db.status = StatusForecastEnum.cancelled
+                result_in_db.message = "Вычисления отменены пользователем."
+                raise e
+            except TrainingLimitError as e:
+                result_in_db.status = StatusForecastEnum.error
+                result_in_db.message = str(e)
+                raise ForecastServiceException(msg=str(e))
+            except Exception as e:
+                result_in_db.status = StatusForecastEnum.error
+                result_in_db.message = str(e)
+                raise ForecastServiceException(
+                    msg="Не удалось произвести вычисления."
+                )
+
+            else:
+                set_progress(ForecastProgressEnum.full_process_success)
+                result_in_db.train_metrics = train_metrics
+                result_in_db.test_metrics = test_metrics
+                result_in_db.test_ts = serializer_timeseries_to_pydantic(
+                    test_ts
+                )
+                result_in_db.train_ts = serializer_timeseries_to_pydantic(
+                    test_pred
+                )
+                result_in_db.exog_ts = serializer_timeseries_to_pydantic(
+                    exog_ts
+                )
+                # result_in_db.test_pred = serializer_timeseries_to_pydantic(
+                #     test_pred
+                # )
+
+            finally:
+                result_in_db.duration = usage.duration
+                result_in_db.peak_memory = usage.peak_memory
+                await self.storage.save_result(data=result_in_db)
+
+        set_progress(ForecastProgressEnum.save_to_db_success)
+
+        await self.cache.put(
+            cache_key,
+            KindJobEnum.forecast,
+            data.algorithm.value,
+            result_in_db.model_dump(include=CACHED_RESULT_FIELDS),
+            model,
+        )
 
         return result_in_db
 
@@ -119,10 +297,12 @@ class ForecastService(BaseForecastService):
         algorithm_params,
         train_percentage,
         set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
         file_mode="single",
         feature_cols=None,
         exog_cols=None,
         test_filename=None,
+        usage: Optional[ResourceUsage] = None,
     ):
         """
         Функция для обучения и тестирования модели прогнозирования временных рядов.
@@ -148,6 +328,7 @@ class ForecastService(BaseForecastService):
         - test_ts (pd.DataFrame): Тестовые данные с прогнозируемыми значениями.
         - train_ts (pd.DataFrame): Обучающие данные с прогнозируемыми значениями.
         - exog_ts (pd.DataFrame): Данные экзогенных переменных.
+        - model: Обученная модель.
         """
 
         if not file_path:
@@ -165,24 +346,16 @@ class ForecastService(BaseForecastService):
         exog_cols = exog_cols or []
         params = {p.parametr: p.value for p in algorithm_params}
 
-        df = ForecastModel().load_data(file_path=file_path)
-
-        if len(df) <= 20:
-            raise ForecastServiceException(
-                msg=f"Длина входного временного ряда ({len(df)}) слишком мала."
-            )
-
-        if file_mode == "single":
-            n = int(int(train_percentage) * len(df) / 100)
-            train_df, test_df = df.iloc[:n], df.iloc[n:]
-        else:
-            if not test_filename:
-                raise ForecastServiceException(msg="Тестовый файл пуст!")
-            test_df = ForecastModel().load_data(file_path=test_filename)
-            train_df = df
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file_path,
+            train_percentage,
+            file_mode,
+            test_filename,
+            columns=[target_col, *feature_cols, *exog_cols],
+        )
 
-        await set_progress(ForecastProgressEnum.data_loaded)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.data_loaded)
 
         (
             model,
@@ -192,7 +365,8 @@ class ForecastService(BaseForecastService):
             train_ts,
             exog_ts,
             test_pred,
-        ) = await ForecastModel().train(
+        ) = await self.executor.run(
+            merlion_models.ForecastModel().train,
             algorithm,
             train_df,
             test_df,
@@ -201,11 +375,9 @@ class ForecastService(BaseForecastService):
             exog_cols,
             params,
             set_progress=set_progress,
+            cancel_event=cancel_event,
+            usage=usage,
         )
-        await set_progress(ForecastProgressEnum.save_model_train)
-        await asyncio.sleep(0.01)
-        ForecastModel.save_model(self.models_storage, model, algorithm)
-
         return (
             train_metrics,
             test_metrics,
@@ -213,12 +385,710 @@ class ForecastService(BaseForecastService):
             train_ts,
             exog_ts,
             test_pred,
+            model,
+        )
+
+    @staticmethod
+    def _check_profile(file: Dataset):
+        """Отклонить слишком короткий ряд по профилю датасета, не читая
+        файл. Пока профиль не построен, длина проверяется при загрузке."""
+        if file.profile and file.profile.rows <= MIN_SERIES_LENGTH:
+            raise ForecastServiceException(
+                msg=f"Длина входного временного ряда ({file.profile.rows}) "
+                "слишком мала."
+            )
+
+    def _load_data(self, file_path, columns=None):
+        df = open_dataset(file_path, columns)
+
+        if len(df) <= MIN_SERIES_LENGTH:
+            raise ForecastServiceException(
+                msg=f"Длина входного временного ряда ({len(df)}) слишком мала."
+            )
+        return df
+
+    def _load_train_test(
+        self,
+        file_path,
+        train_percentage,
+        file_mode,
+        test_filename,
+        columns=None,
+    ):
+        """Загрузить датасет и разделить его на обучающую и тестовую части.
+
+        Загружаются только колонки `columns` (по умолчанию все). Если они
+        есть в хранилище колонок, возвращаются `DatasetView`, данные которых
+        читает процесс-воркер.
+        """
+        df = self._load_data(file_path, columns)
+
+        if file_mode == "single":
+            n = int(int(train_percentage) * len(df) / 100)
+            return df.iloc[:n], df.iloc[n:]
+
+        if not test_filename:
+            raise ForecastServiceException(msg="Тестовый файл пуст!")
+        test_df = load_dataset(test_filename, columns)
+        return df, test_df
+
+    async def get_leaderboard(
+        self,
+        data: ForecastLeaderboardDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ForecastLeaderboardSchema:
+        """Обучить несколько алгоритмов на одном датасете и ранжировать их.
+
+        Датасет загружается и делится один раз, кандидаты обучаются
+        параллельно в пуле процессов. Ошибка одного кандидата не прерывает
+        сравнение, а отображается в его строке таблицы.
+        """
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise ForecastServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(ForecastProgressEnum.file_exist)
+        self._check_profile(file)
+
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file.file_path,
+            data.train_percentage,
+            data.file_mode,
+            data.test_filename,
+            columns=[
+                data.target_col,
+                *(data.feature_cols or []),
+                *(data.exog_cols or []),
+            ],
+        )
+        set_progress(ForecastProgressEnum.data_loaded)
+
+        async with self._queue_slot(
+            user_id, set_progress, cancel_event, jobs=len(data.candidates)
+        ) as units:
+            entries = await gather_limited(
+                [
+                    self._train_candidate(
+                        candidate,
+                        data,
+                        train_df,
+                        test_df,
+                        set_progress,
+                        cancel_event,
+                    )
+                    for candidate in data.candidates
+                ],
+                units,
+            )
+        for entry in entries:
+            if isinstance(entry, BaseException):
+                raise entry
+
+        return ForecastLeaderboardSchema(
+            metric=data.metric,
+            entries=rank_leaderboard(entries, data.metric.value),
         )
 
+    async def _train_candidate(
+        self,
+        candidate: ForecastCandidateSchema,
+        data: ForecastLeaderboardDataSchema,
+        train_df,
+        test_df,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> LeaderboardEntrySchema:
+        algorithm = candidate.algorithm.value
+
+        def set_candidate_progress(progress, **info):
+            set_progress(progress, candidate=algorithm, **info)
+
+        entry = LeaderboardEntrySchema(
+            algorithm=algorithm,
+            algorithm_params=candidate.algorithm_params,
+            status=SUCCESS,
+        )
+        started = time.monotonic()
+        try:
+            result = await self.executor.run(
+                merlion_models.ForecastModel().train,
+                candidate.algorithm,
+                train_df,
+                test_df,
+                data.target_col,
+                data.feature_cols or [],
+                data.exog_cols or [],
+                {p.parametr: p.value for p in candidate.algorithm_params},
+                set_progress=set_candidate_progress,
+                cancel_event=cancel_event,
+            )
+            entry.train_metrics, entry.test_metrics = result[1], result[2]
+        except TrainingCancelledError:
+            raise
+        except Exception as e:
+            entry.status = ERROR
+            entry.message = str(e)
+        entry.duration = round(time.monotonic() - started, 3)
+        set_candidate_progress(ForecastProgressEnum.test_metrics_computed)
+        return entry
+
+    async def search(
+        self,
+        data: ForecastSearchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> SearchResultSchema:
+        """Подобрать параметры алгоритма и сохранить лучшую модель.
+
+        Испытания выполняются в пуле процессов, при стратегии halving худшие
+        конфигурации отсекаются на урезанной обучающей выборке. В историю и
+        в реестр моделей сохраняется только лучшая конфигурация.
+        """
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise ForecastServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(ForecastProgressEnum.file_exist)
+        self._check_profile(file)
+
+        train_df, test_df = await asyncio.to_thread(
+            self._load_train_test,
+            file.file_path,
+            data.train_percentage,
+            data.file_mode,
+            data.test_filename,
+            columns=[
+                data.target_col,
+                *(data.feature_cols or []),
+                *(data.exog_cols or []),
+            ],
+        )
+        set_progress(ForecastProgressEnum.data_loaded)
+
+        async def run_trial(config, train_rows):
+            return await self.executor.run(
+                merlion_models.ForecastModel().evaluate,
+                data.algorithm,
+                train_df.iloc[-train_rows:],
+                test_df,
+                data.target_col,
+                data.feature_cols or [],
+                data.exog_cols or [],
+                {p.parametr: p.value for p in config},
+                set_progress=set_progress,
+                cancel_event=cancel_event,
+            )
+
+        async with self._queue_slot(
+            user_id,
+            set_progress,
+            cancel_event,
+            jobs=count_configs(data),
+        ) as units:
+            trials, best = await run_search(
+                data,
+                data.algorithm.value,
+                len(train_df),
+                run_trial,
+                data.metric.value,
+                limit=units,
+            )
+            # Модель лучшей конфигурации обучается заново на всей обучающей
+            # выборке, чтобы не хранить модели испытаний
+            if best is not None:
+                best_result = await self.executor.run(
+                    merlion_models.ForecastModel().train,
+                    data.algorithm,
+                    train_df,
+                    test_df,
+                    data.target_col,
+                    data.feature_cols or [],
+                    data.exog_cols or [],
+                    {p.parametr: p.value for p in best.algorithm_params},
+                    set_progress=set_progress,
+                    cancel_event=cancel_event,
+                )
+        search_result = SearchResultSchema(
+            strategy=data.strategy, metric=data.metric.value, trials=trials
+        )
+        if best is None:
+            return search_result
+        if cancel_event is not None and cancel_event.is_set():
+            raise TrainingCancelledError()
+
+        (
+            model,
+            train_metrics,
+            test_metrics,
+            test_ts,
+            train_ts,
+            exog_ts,
+            test_pred,
+        ) = best_result
+        result_in_db = ResultForecastModel(
+            user_id=user_id,
+            params=TrainTestDataSchema(
+                **data.model_dump(
+                    include=set(TrainTestDataSchema.model_fields)
+                ),
+                algorithm_params=best.algorithm_params,
+            ),
+            train_metrics=train_metrics,
+            test_metrics=test_metrics,
+            test_ts=serializer_timeseries_to_pydantic(test_ts),
+            train_ts=serializer_timeseries_to_pydantic(test_pred),
+            exog_ts=serializer_timeseries_to_pydantic(exog_ts),
+        )
+        set_progress(ForecastProgressEnum.save_model_train)
+        await self.registry.register(
+            user_id=user_id,
+            result_id=str(result_in_db.id),
+            kind=KindJobEnum.forecast,
+            algorithm=data.algorithm.value,
+            model=model,
+            dataset_path=file.file_path,
+            params=result_in_db.params.model_dump(mode="json"),
+        )
+        await self.storage.save_result(data=result_in_db)
+        set_progress(ForecastProgressEnum.save_to_db_success)
+
+        search_result.best_params = best.algorithm_params
+        search_result.result_id = str(result_in_db.id)
+        return search_result
+
+    async def backtest(
+        self,
+        data: ForecastBacktestDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ForecastBacktestSchema:
+        """Оценить алгоритм на нескольких точках начала прогноза.
+
+        Фолды обучаются параллельно в пуле процессов. В процесс-воркер
+        передаются только путь к датасету и границы фолда (`DatasetView`):
+        воркер отображает в память хранилище колонок или, если его нет,
+        берет срез из своего кэша разобранных датасетов, поэтому датасет не
+        копируется для каждого фолда.
+        """
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise ForecastServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(ForecastProgressEnum.file_exist)
+        self._check_profile(file)
+
+        df = await asyncio.to_thread(
+            self._load_data,
+            file.file_path,
+            [
+                data.target_col,
+                *(data.feature_cols or []),
+                *(data.exog_cols or []),
+            ],
+        )
+        index = df.index
+        if not isinstance(df, DatasetView):
+            df = DatasetView(file.file_path, tuple(df.columns), 0, len(df))
+        stride = data.stride or data.horizon
+        folds = backtest_folds(
+            len(df),
+            data.n_folds,
+            data.horizon,
+            stride,
+            data.window,
+            data.train_size,
+        )
+        if folds[0][1] - folds[0][0] <= MIN_SERIES_LENGTH:
+            raise ForecastServiceException(
+                msg="Недостаточно данных для обучения на первом фолде. "
+                "Уменьшите количество фолдов, горизонт или шаг."
+            )
+        set_progress(ForecastProgressEnum.data_loaded)
+
+        params = {p.parametr: p.value for p in data.algorithm_params}
+        params_info = params_registry.get("forecast", data.algorithm)
+        if "max_forecast_steps" in params_info:
+            params.setdefault("max_forecast_steps", data.horizon)
+
+        async with self._queue_slot(
+            user_id, set_progress, cancel_event, jobs=len(folds)
+        ) as units:
+            results = await gather_limited(
+                [
+                    self._backtest_fold(
+                        fold,
+                        df,
+                        index,
+                        bounds,
+                        data,
+                        params,
+                        set_progress,
+                        cancel_event,
+                    )
+                    for fold, bounds in enumerate(folds)
+                ],
+                units,
+            )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return ForecastBacktestSchema(
+            algorithm=data.algorithm,
+            window=data.window,
+            horizon=data.horizon,
+            stride=stride,
+            folds=results,
+            aggregate_metrics=aggregate_metrics(
+                [
+                    fold.test_metrics
+                    for fold in results
+                    if fold.status == StatusForecastEnum.success
+                ]
+            ),
+        )
+
+    async def _backtest_fold(
+        self,
+        fold: int,
+        df: DatasetView,
+        index,
+        bounds: tuple,
+        data: ForecastBacktestDataSchema,
+        params: dict,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> BacktestFoldSchema:
+        train_start, origin, test_end = bounds
+        train_df = df.iloc[train_start:origin]
+        test_df = df.iloc[origin:test_end]
+
+        def set_fold_progress(progress, **info):
+            set_progress(progress, candidate=f"fold {fold}", **info)
+
+        result = BacktestFoldSchema(
+            fold=fold,
+            train_start=index[train_start],
+            train_end=index[origin - 1],
+            test_start=index[origin],
+            test_end=index[test_end - 1],
+            train_rows=len(train_df),
+        )
+        started = time.monotonic()
+        try:
+            result.train_metrics, result.test_metrics = (
+                await self.executor.run(
+                    merlion_models.ForecastModel().evaluate,
+                    data.algorithm,
+                    train_df,
+                    test_df,
+                    data.target_col,
+                    data.feature_cols or [],
+                    data.exog_cols or [],
+                    dict(params),
+                    set_progress=set_fold_progress,
+                    cancel_event=cancel_event,
+                )
+            )
+        except TrainingCancelledError:
+            raise
+        except Exception as e:
+            result.status = StatusForecastEnum.error
+            result.message = str(e)
+        result.duration = round(time.monotonic() - started, 3)
+        return result
+
+    async def predict(
+        self,
+        data: ForecastPredictDataSchema,
+        user_id: str,
+        forecast_id: str,
+    ) -> TimeseriesSchema:
+        """Построить прогноз сохраненной моделью без повторного обучения.
+
+        Модель берется из реестра моделей, поэтому при повторных запросах она
+        уже загружена в память процесса. Если новые данные не переданы, для
+        моделей с экзогенными переменными используются экзогенные данные,
+        сохраненные при обучении.
+        """
+        result = await self.get_users_history_by_id(
+            user_id=user_id, forecast_id=forecast_id
+        )
+        _, loaded = await self.registry.load(
+            user_id=user_id, result_id=forecast_id
+        )
+        model = loaded.model
+        params = result.params
+
+        if data.file_id:
+            file = await self.dataset_storage.get_document_by_user_and_id(
+                user_id=user_id, doc_id=str(data.file_id)
+            )
+            if not file:
+                raise ForecastServiceException(
+                    msg="Файл с датасетом временного ряда не существует."
+                )
+            df = await asyncio.to_thread(load_dataset, file.file_path)
+        else:
+            df = deserializer_timeseries_from_pydantic(result.exog_ts)
+
+        if data.horizon is not None:
+            max_steps = getattr(model, "max_forecast_steps", None)
+            if max_steps is not None and data.horizon > max_steps:
+                raise ForecastServiceException(
+                    msg=f"Горизонт прогноза больше max_forecast_steps "
+                    f"модели ({max_steps})."
+                )
+            time_stamps = data.horizon
+        else:
+            time_stamps = data.time_stamps
+
+        try:
+            forecast = await asyncio.to_thread(
+                loaded.call,
+                merlion_models.ForecastModel.predict,
+                time_stamps,
+                params.target_col,
+                params.feature_cols or [],
+                params.exog_cols or [],
+                df,
+            )
+        except Exception as e:
+            raise ForecastServiceException(
+                msg=f"Не удалось построить прогноз: {e}"
+            )
+        return serializer_timeseries_to_pydantic(forecast)
+
+    async def batch(
+        self,
+        data: ForecastBatchDataSchema,
+        user_id: str,
+        set_progress: Any,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> ResultForecastBatchModel:
+        """Обучить и протестировать алгоритм на каждом ряде датасета.
+
+        Датасет читается и приводится к широкому формату один раз, ряды
+        обучаются параллельно в пуле процессов, в воркер передается только
+        колонка своего ряда. Результаты всех рядов сохраняются одним
+        документом, ошибка одного ряда не прерывает остальные.
+        """
+        started = time.monotonic()
+        file = await self.dataset_storage.get_document_by_user_and_id(
+            user_id=user_id, doc_id=str(data.file_id)
+        )
+        if not file:
+            raise ForecastServiceException(
+                msg="Файл с датасетом временного ряда не существует."
+            )
+        set_progress(ForecastProgressEnum.file_exist)
+
+        df = await asyncio.to_thread(
+            self._load_batch_data, file.file_path, data
+        )
+        if len(df.columns) > settings.TRAINING.BATCH_MAX_SERIES:
+            raise ForecastServiceException(
+                msg=f"Количество рядов ({len(df.columns)}) больше "
+                f"допустимого ({settings.TRAINING.BATCH_MAX_SERIES})."
+            )
+        set_progress(ForecastProgressEnum.data_loaded)
+
+        params = {p.parametr: p.value for p in data.algorithm_params}
+        async with self._queue_slot(
+            user_id, set_progress, cancel_event, jobs=len(df.columns)
+        ) as units:
+            results = await gather_limited(
+                [
+                    self._train_series(
+                        df[name].dropna().to_frame(),
+                        data,
+                        params,
+                        cancel_event=cancel_event,
+                    )
+                    for name in df.columns
+                ],
+                units,
+            )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        series = [entry for entry, _ in results]
+        forecasts = [pred for _, pred in results if pred is not None]
+        set_progress(ForecastProgressEnum.full_process_success)
+
+        result_in_db = ResultForecastBatchModel(
+            user_id=user_id,
+            params=data,
+            series=series,
+            forecast=(
+                serializer_dataframe_to_pydantic(pd.concat(forecasts, axis=1))
+                if forecasts
+                else None
+            ),
+            duration=round(time.monotonic() - started, 3),
+        )
+        if not forecasts:
+            result_in_db.status = StatusForecastEnum.error
+            result_in_db.message = (
+                "Не удалось обучить модель ни для одного ряда."
+            )
+        await self.storage.save_batch_result(data=result_in_db)
+        set_progress(ForecastProgressEnum.save_to_db_success)
+        return result_in_db
+
+    @staticmethod
+    def _load_batch_data(file_path, data: ForecastBatchDataSchema):
+        """Загрузить датасет и привести его к колонке на каждый ряд."""
+        df = load_dataset(
+            file_path, data.target_cols or [data.series_col, data.value_col]
+        )
+        if data.target_cols:
+            missing = [c for c in data.target_cols if c not in df]
+            if missing:
+                raise ForecastServiceException(
+                    msg=f"В датасете нет колонок: {', '.join(missing)}."
+                )
+            return df.loc[:, data.target_cols]
+
+        for column in (data.series_col, data.value_col):
+            if column not in df:
+                raise ForecastServiceException(
+                    msg=f"В датасете нет колонки {column}."
+                )
+        df = df.set_index(data.series_col, append=True)[data.value_col]
+        if df.index.has_duplicates:
+            raise ForecastServiceException(
+                msg="В датасете есть повторяющиеся метки времени у одного "
+                "ряда."
+            )
+        df = df.unstack(data.series_col).sort_index()
+        df.columns = [str(c) for c in df.columns]
+        return df
+
+    async def _train_series(
+        self,
+        series_df,
+        data: ForecastBatchDataSchema,
+        params: dict,
+        cancel_event: Optional[asyncio.Event] = None,
+    ):
+        name = series_df.columns[0]
+        entry = ForecastSeriesSchema(series=name)
+        if len(series_df) <= MIN_SERIES_LENGTH:
+            entry.status = StatusForecastEnum.error
+            entry.message = (
+                f"Длина временного ряда ({len(series_df)}) слишком мала."
+            )
+            return entry, None
+
+        def set_series_progress(progress, **info):
+            pass
+
+        n = int(data.train_percentage * len(series_df) / 100)
+        started = time.monotonic()
+        try:
+            (
+                entry.train_metrics,
+                entry.test_metrics,
+                test_pred,
+            ) = await self.executor.run(
+                merlion_models.ForecastModel().evaluate,
+                data.algorithm,
+                series_df.iloc[:n],
+                series_df.iloc[n:],
+                name,
+                [],
+                [],
+                dict(params),
+                set_progress=set_series_progress,
+                cancel_event=cancel_event,
+                return_forecast=True,
+            )
+        except TrainingCancelledError:
+            raise
+        except Exception as e:
+            entry.status = StatusForecastEnum.error
+            entry.message = str(e)
+            test_pred = None
+        else:
+            test_pred.columns = [name]
+        entry.duration = round(time.monotonic() - started, 3)
+        return entry, test_pred
+
+
+def backtest_folds(
+    n_rows: int,
+    n_folds: int,
+    horizon: int,
+    stride: int,
+    window: BacktestWindowEnum,
+    train_size: Optional[int] = None,
+) -> List[tuple]:
+    """Границы фолдов бэктестинга в виде (начало обучения, точка начала
+    прогноза, конец теста).
+
+    Последний фолд заканчивается на последней строке датасета, точки начала
+    прогноза отстоят друг от друга на `stride` строк.
+    """
+    first_origin = n_rows - horizon - (n_folds - 1) * stride
+    size = train_size or first_origin
+    folds = []
+    for k in range(n_folds):
+        origin = first_origin + k * stride
+        if window == BacktestWindowEnum.rolling:
+            train_start = max(0, origin - size)
+        else:
+            train_start = 0
+        folds.append((train_start, max(origin, 0), origin + horizon))
+    return folds
+
+
+def aggregate_metrics(metrics: List[dict]) -> dict[str, dict[str, float]]:
+    """Сводные значения числовых метрик по фолдам."""
+    values = {}
+    for fold_metrics in metrics:
+        for name, value in (fold_metrics or {}).items():
+            if isinstance(value, (int, float)):
+                values.setdefault(name, []).append(value)
+    return {
+        name: {
+            "mean": round(statistics.fmean(items), 5),
+            "std": round(statistics.pstdev(items), 5),
+            "min": min(items),
+            "max": max(items),
+        }
+        for name, items in values.items()
+    }
+
 
 @lru_cache()
 def get_forecast_service(
     storage: BaseForecastStorage = Depends(get_forecast_storage),
     dataset_storage: BaseDatasetStorage = Depends(get_dataset_storage),
+    executor: TrainingExecutor = Depends(get_training_executor),
+    cache: BaseTrainingCacheService = Depends(get_training_cache_service),
+    registry: BaseModelRegistryService = Depends(get_model_registry_service),
+    scheduler: TrainingScheduler = Depends(get_training_scheduler),
 ) -> ForecastService:
-    return ForecastService(storage=storage, dataset_storage=dataset_storage)
+    return ForecastService(
+        storage=storage,
+        dataset_storage=dataset_storage,
+        executor=executor,
+        cache=cache,
+        registry=registry,
+        scheduler=scheduler,
+    )
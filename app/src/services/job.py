@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+from functools import lru_cache
+
+from fastapi import Depends
+from pydantic import ValidationError
+
+from core.config import settings
+from core.executor import TrainingCancelledError
+from core.progress import Subscription, get_progress_bus
+from exceptions.base import ServiceException
+from exceptions.job import JobServiceException
+from models.base import datetime_now
+from models.job import TrainingJob
+from schemas.anomaly import AnomalyProgressEnum, AnomalyTrainTestDataSchema
+from schemas.forecast import ForecastProgressEnum, TrainTestDataSchema
+from schemas.job import KindJobEnum, StatusJobEnum
+from services.base import (
+    BaseAnomalyService,
+    BaseForecastService,
+    BaseJobService,
+)
+from storages.base import BaseJobStorage
+from storages.job import get_job_storage
+
+
+def job_progress_topic(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+class JobService(BaseJobService):
+
+    async def submit(
+        self, kind: KindJobEnum, params: dict, user_id: str
+    ) -> TrainingJob:
+        job = TrainingJob(user_id=user_id, kind=kind, params=params)
+        await self.storage.create(job)
+        return job
+
+    async def cancel(self, user_id: str, job_id: str) -> TrainingJob:
+        await self.get_users_job(user_id=user_id, job_id=job_id)
+        await self.storage.request_cancel(user_id=user_id, job_id=job_id)
+        return await self.get_users_job(user_id=user_id, job_id=job_id)
+
+    async def get_users_job(self, user_id: str, job_id: str) -> TrainingJob:
+        job = await self.storage.get_document_by_user_and_id(
+            user_id=user_id, job_id=job_id
+        )
+        if not job:
+            raise JobServiceException("Задача не найдена", status_code=404)
+        return job
+
+
+class JobWorker:
+    """Обработчик очереди задач обучения, запускается через worker.py.
+
+    Задачи забираются из коллекции jobs атомарно, поэтому можно запускать
+    любое количество процессов worker.py независимо от реплик API.
+    """
+
+    def __init__(
+        self,
+        storage: BaseJobStorage,
+        forecast_service: BaseForecastService,
+        anomaly_service: BaseAnomalyService,
+    ) -> None:
+        self.storage = storage
+        self.forecast_service = forecast_service
+        self.anomaly_service = anomaly_service
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self):
+        self.logger.info(f"Воркер {self.worker_id} запущен")
+        await asyncio.gather(
+            *[
+                self._loop()
+                for _ in range(max(1, settings.JOBS.WORKER_CONCURRENCY))
+            ]
+        )
+
+    async def _loop(self):
+        while True:
+            await self.storage.requeue_stale(
+                stale_before=datetime_now()
+                - timedelta(seconds=settings.JOBS.STALE_TIMEOUT),
+                max_attempts=settings.JOBS.MAX_ATTEMPTS,
+            )
+            job = await self.storage.claim(worker_id=self.worker_id)
+            if not job:
+                await asyncio.sleep(settings.JOBS.POLL_INTERVAL)
+                continue
+            await self.process(job)
+
+    async def process(self, job: TrainingJob):
+        self.logger.info(f"Задача {job.id} ({job.kind.value}) взята в работу")
+
+        bus = get_progress_bus()
+        topic = job_progress_topic(job.id)
+        set_progress = bus.publisher(topic, fanout=True)
+
+        if job.kind == KindJobEnum.forecast:
+            service = self.forecast_service
+            schema, finish = TrainTestDataSchema, ForecastProgressEnum.finish
+        else:
+            service = self.anomaly_service
+            schema, finish = (
+                AnomalyTrainTestDataSchema,
+                AnomalyProgressEnum.finish,
+            )
+
+        cancel_event = asyncio.Event()
+        watcher = asyncio.create_task(self._watch(job.id, cancel_event))
+        update = {}
+        try:
+            async with bus.subscribe(topic) as subscription:
+                writer = asyncio.create_task(
+                    self._write_progress(job.id, subscription)
+                )
+                try:
+                    result = await service.get_train_test_result(
+                        schema(**job.params),
+                        str(job.user_id),
+                        set_progress,
+                        cancel_event=cancel_event,
+                    )
+                finally:
+                    subscription.close()
+                    await writer
+        except TrainingCancelledError:
+            update.update(status=StatusJobEnum.cancelled)
+        except ServiceException as e:
+            update.update(status=StatusJobEnum.error, detail=[{"msg": e.msg}])
+        except ValidationError as e:
+            update.update(
+                status=StatusJobEnum.error,
+                detail=e.errors(
+                    include_url=False,
+                    include_context=False,
+                    include_input=False,
+                ),
+            )
+        except Exception:
+            self.logger.exception(f"Ошибка при выполнении задачи {job.id}")
+            update.update(
+                status=StatusJobEnum.error,
+                detail=[
+                    {
+                        "msg": "Произошла не предвиденная ошибка. "
+                        "Попробуйте позжею."
+                    }
+                ],
+            )
+        else:
+            update.update(
+                status=StatusJobEnum(result.status.value),
+                message=result.message,
+                result_id=result.id,
+                progress={"stage": finish.stage, "percent": finish.percent},
+            )
+        finally:
+            watcher.cancel()
+            update["finished_at"] = datetime_now()
+            await self.storage.update(job_id=job.id, data=update)
+
+        self.logger.info(f"Задача {job.id} завершена: {update['status']}")
+
+    async def _write_progress(self, job_id: str, subscription: Subscription):
+        """Сохранять в задачу последний опубликованный этап.
+
+        Пока идет запись, новые этапы объединяются в подписке, поэтому
+        обучение не ждет MongoDB.
+        """
+        async for events in subscription:
+            progress, info = events[-1]
+            try:
+                await self.storage.update(
+                    job_id=job_id,
+                    data={
+                        "progress": {
+                            "stage": progress.stage,
+                            "percent": progress.percent,
+                            **info,
+                        },
+                        "heartbeat_at": datetime_now(),
+                    },
+                )
+            except Exception:
+                self.logger.warning(
+                    f"Не удалось сохранить прогресс задачи {job_id}"
+                )
+
+    async def _watch(self, job_id: str, cancel_event: asyncio.Event):
+        """Обновлять heartbeat задачи и следить за запросом отмены."""
+        loop = asyncio.get_running_loop()
+        last_heartbeat = loop.time()
+        while True:
+            await asyncio.sleep(settings.JOBS.POLL_INTERVAL)
+            if await self.storage.is_cancel_requested(job_id):
+                cancel_event.set()
+                return
+            if (
+                loop.time() - last_heartbeat
+                >= settings.JOBS.HEARTBEAT_INTERVAL
+            ):
+                await self.storage.update(
+                    job_id=job_id, data={"heartbeat_at": datetime_now()}
+                )
+                last_heartbeat = loop.time()
+
+
+@lru_cache()
+def get_job_service(
+    storage: BaseJobStorage = Depends(get_job_storage),
+) -> JobService:
+    return JobService(storage=storage)
@@ -0,0 +1,41 @@
+from typing import List
+
+from schemas.base import LeaderboardEntrySchema
+
+SUCCESS = "success"
+ERROR = "error"
+
+
+def metric_value(entry: LeaderboardEntrySchema, metric: str):
+    """Значение метрики тестовой выборки или None, если его нет."""
+    if entry.status != SUCCESS or not entry.test_metrics:
+        return None
+    value = entry.test_metrics.get(metric)
+    return value if isinstance(value, (int, float)) else None
+
+
+def rank_leaderboard(
+    entries: List[LeaderboardEntrySchema],
+    metric: str,
+    higher_is_better: bool = False,
+) -> List[LeaderboardEntrySchema]:
+    """Отсортировать кандидатов по метрике тестовой выборки.
+
+    Кандидаты без значения метрики (например, завершившиеся с ошибкой)
+    не получают место и располагаются в конце таблицы.
+    """
+    ranked = sorted(
+        (
+            entry
+            for entry in entries
+            if metric_value(entry, metric) is not None
+        ),
+        key=lambda entry: metric_value(entry, metric),
+        reverse=higher_is_better,
+    )
+    unranked = [
+        entry for entry in entries if metric_value(entry, metric) is None
+    ]
+    for rank, entry in enumerate(ranked, start=1):
+        entry.rank = rank
+    return ranked + unranked
@@ -1,7 +1,23 @@
-from .anomaly import AnomalyModel
-from .forecast import ForecastModel
+"""Модели Merlion.
+
+Классы импортируются при первом обращении к атрибуту пакета, поэтому
+импорт схем и сервисов не загружает Merlion и его зависимости.
+"""
+
+from importlib import import_module
+
+_MODULES = {
+    "ForecastModel": ".forecast",
+    "AnomalyModel": ".anomaly",
+}
 
 __all__ = [
     "ForecastModel",
     "AnomalyModel",
 ]
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_MODULES[name], __name__), name)
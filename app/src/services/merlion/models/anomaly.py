@@ -4,17 +4,23 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # For full license text, see the LICENSE file in the repo root or https://opensource.org/licenses/BSD-3-Clause
 #
-import asyncio
+import copy
 import importlib
 import logging
 
+import numpy as np
+import pandas as pd
 from merlion.dashboard.models.anomaly import AnomalyModel as _AnomalyModel
 from merlion.evaluate.anomaly import TSADMetric
 from merlion.models.factory import ModelFactory
 from merlion.plot import MTSFigure, plot_anoms_plotly
 from merlion.utils.time_series import TimeSeries
 
+from core.params import params_registry
+from core.threads import job_params
 from schemas.anomaly import AnomalyProgressEnum
+from services.merlion.monitor import TrainingMonitor
+from utils import load_dataset, materialize
 
 
 class AnomalyModel(_AnomalyModel):
@@ -46,6 +52,12 @@ class AnomalyModel(_AnomalyModel):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
 
+    def load_data(self, file_path, nrows=None):
+        # Полный датасет берется из кэша разобранных датасетов
+        if nrows is not None:
+            return super().load_data(file_path, nrows=nrows)
+        return load_dataset(file_path)
+
     @staticmethod
     def get_available_algorithms(num_input_metrics):
         if num_input_metrics <= 0:
@@ -61,12 +73,42 @@ class AnomalyModel(_AnomalyModel):
 
     @staticmethod
     def get_threshold_info(threshold):
+        """Описание параметров порога из реестра параметров."""
+        return {
+            name: {"type": info.type, "default": info.default}
+            for name, info in params_registry.get(
+                "threshold", threshold
+            ).items()
+        }
+
+    @staticmethod
+    def _threshold(threshold_params):
+        if threshold_params is None:
+            return None
+        thres_class, thres_params = threshold_params
         module = importlib.import_module("merlion.post_process.threshold")
-        model_class = getattr(module, threshold)
-        param_info = AnomalyModel._param_info(model_class.__init__)
-        if not param_info["alm_threshold"]["default"]:
-            param_info["alm_threshold"]["default"] = 3.0
-        return param_info
+        model_class = getattr(module, thres_class)
+        return model_class(**thres_params)
+
+    @staticmethod
+    def load_data_chunks(file_path, chunk_size, start=None, end=None):
+        """Читать датасет частями по `chunk_size` строк.
+
+        Индекс разбирается так же, как в `load_data`. Если заданы `start` и
+        `end`, из каждой части оставляются только строки этого интервала.
+        """
+        for df in pd.read_csv(file_path, chunksize=chunk_size):
+            index_type = df.dtypes[df.columns[0]]
+            df = df.set_index(df.columns[0])
+            df.index = pd.to_datetime(
+                df.index.values,
+                unit="ms" if index_type in [np.int32, np.int64] else None,
+            )
+            if start is not None:
+                df = df[df.index >= start]
+            if end is not None:
+                df = df[df.index <= end]
+            yield df
 
     @staticmethod
     def _compute_metrics(labels, predictions):
@@ -107,7 +149,7 @@ class AnomalyModel(_AnomalyModel):
             ), f"The variable {columns[i]} is not in the time {kind} series."
         return columns, label_column
 
-    async def train(
+    def train(
         self,
         algorithm,
         train_df,
@@ -118,6 +160,7 @@ class AnomalyModel(_AnomalyModel):
         threshold_params,
         set_progress,
     ):
+        train_df, test_df = materialize(train_df), materialize(test_df)
         columns, label_column = AnomalyModel._check(
             train_df, columns, label_column, is_train=True
         )
@@ -126,12 +169,10 @@ class AnomalyModel(_AnomalyModel):
         )
 
         if threshold_params is not None:
-            thres_class, thres_params = threshold_params
-            module = importlib.import_module("merlion.post_process.threshold")
-            model_class = getattr(module, thres_class)
-            params["threshold"] = model_class(**thres_params)
+            params["threshold"] = AnomalyModel._threshold(threshold_params)
 
         model_class = ModelFactory.get_model_class(algorithm)
+        params = job_params("anomaly", algorithm, params)
         model = model_class(model_class.config_class(**params))
         train_ts, train_labels = TimeSeries.from_pd(train_df[columns]), None
         test_ts, test_labels = TimeSeries.from_pd(test_df[columns]), None
@@ -140,15 +181,13 @@ class AnomalyModel(_AnomalyModel):
             test_labels = TimeSeries.from_pd(test_df[label_column])
 
         self.logger.info(f"Training the anomaly detector: {algorithm}...")
-        await set_progress(AnomalyProgressEnum.start_anomaly_detector_training)
-        await asyncio.sleep(0.01)
+        set_progress(AnomalyProgressEnum.start_anomaly_detector_training)
 
-        scores = model.train(train_data=train_ts)
-        await set_progress(AnomalyProgressEnum.training_completed)
-        await asyncio.sleep(0.01)
+        with TrainingMonitor(set_progress, AnomalyProgressEnum.training):
+            scores = model.train(train_data=train_ts)
+        set_progress(AnomalyProgressEnum.training_completed)
 
-        await set_progress(AnomalyProgressEnum.get_train_metrics)
-        await asyncio.sleep(0.01)
+        set_progress(AnomalyProgressEnum.get_train_metrics)
         self.logger.info("Computing training performance metrics...")
         train_pred = (
             model.post_rule(scores) if model.post_rule is not None else scores
@@ -159,8 +198,7 @@ class AnomalyModel(_AnomalyModel):
             else None
         )
 
-        await set_progress(AnomalyProgressEnum.get_train_metrics)
-        await asyncio.sleep(0.01)
+        set_progress(AnomalyProgressEnum.get_train_metrics)
         self.logger.info("Getting test-time results...")
         test_pred = model.get_anomaly_label(test_ts)
         test_metrics = (
@@ -178,29 +216,84 @@ class AnomalyModel(_AnomalyModel):
             test_labels,
         )
 
-    def test(
-        self, model, df, columns, label_column, threshold_params, set_progress
+    def evaluate(
+        self,
+        algorithm,
+        train_df,
+        test_df,
+        columns,
+        label_column,
+        params,
+        threshold_params,
+        set_progress,
     ):
-        columns, label_column = AnomalyModel._check(
-            df, columns, label_column, is_train=False
+        """Обучить модель и вернуть только метрики.
+
+        Используется при поиске параметров, где модель и ряды испытаний не
+        нужны и не должны передаваться между процессами.
+        """
+        _, train_metrics, test_metrics, *_ = self.train(
+            algorithm,
+            train_df,
+            test_df,
+            columns,
+            label_column,
+            params,
+            threshold_params,
+            set_progress,
         )
+        return train_metrics, test_metrics
 
-        threshold = None
-        if threshold_params is not None:
-            thres_class, thres_params = threshold_params
-            module = importlib.import_module("merlion.post_process.threshold")
-            model_class = getattr(module, thres_class)
-            threshold = model_class(**thres_params)
+    def test(
+        self,
+        model,
+        df,
+        columns,
+        label_column,
+        threshold_params,
+        set_progress,
+        plot=True,
+        context_size=0,
+    ):
+        """Найти аномалии в новых данных обученным детектором.
+
+        `df` - DataFrame или итератор его частей. Части обрабатываются по
+        очереди, последние `context_size` строк предыдущей части передаются
+        детектору как `time_series_prev`, поэтому в памяти одновременно
+        находятся одна часть данных и метки уже обработанных частей.
+        Переданная модель не изменяется: при переопределении порога
+        используется ее копия. График строится только для целого DataFrame.
+        """
+        threshold = AnomalyModel._threshold(threshold_params)
         if threshold is not None:
+            model = copy.deepcopy(model)
             model.threshold = threshold
 
         self.logger.info("Detecting anomalies...")
         set_progress(("2", "10"))
 
-        test_ts, label_ts = TimeSeries.from_pd(df[columns]), None
-        if label_column is not None and label_column != "":
-            label_ts = TimeSeries.from_pd(df[[label_column]])
-        predictions = model.get_anomaly_label(time_series=test_ts)
+        columns = list(columns)
+        predictions, labels, time_series_prev = [], [], None
+        for chunk in [df] if isinstance(df, pd.DataFrame) else df:
+            if len(chunk) == 0:
+                continue
+            columns, label_column = AnomalyModel._check(
+                chunk, columns, label_column, is_train=False
+            )
+            chunk_ts = TimeSeries.from_pd(chunk[columns])
+            chunk_pred = model.get_anomaly_label(
+                time_series=chunk_ts, time_series_prev=time_series_prev
+            )
+            predictions.append(chunk_pred.to_pd().astype(np.float32))
+            if label_column is not None and label_column != "":
+                labels.append(chunk[[label_column]].astype(np.float32))
+            if context_size > 0:
+                time_series_prev = TimeSeries.from_pd(
+                    chunk[columns].iloc[-context_size:]
+                )
+        assert len(predictions) > 0, "The time series is empty."
+        predictions = TimeSeries.from_pd(pd.concat(predictions))
+        label_ts = TimeSeries.from_pd(pd.concat(labels)) if labels else None
         set_progress(("7", "10"))
 
         self.logger.info("Computing test performance metrics...")
@@ -211,11 +304,13 @@ class AnomalyModel(_AnomalyModel):
         )
         set_progress(("8", "10"))
 
-        self.logger.info("Plotting anomaly labels...")
-        figure = AnomalyModel._plot_anomalies(
-            model, test_ts, predictions, label_ts
-        )
+        figure = None
+        if plot and isinstance(df, pd.DataFrame):
+            self.logger.info("Plotting anomaly labels...")
+            figure = AnomalyModel._plot_anomalies(
+                model, TimeSeries.from_pd(df[columns]), predictions, label_ts
+            )
         self.logger.info("Finished.")
         set_progress(("10", "10"))
 
-        return metrics, figure
+        return metrics, predictions, figure
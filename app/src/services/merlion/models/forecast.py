@@ -4,20 +4,27 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # For full license text, see the LICENSE file in the repo root or https://opensource.org/licenses/BSD-3-Clause
 #
-import asyncio
-
 import pandas as pd
 from merlion.dashboard.models.forecast import ForecastModel as _ForecastModel
 from merlion.evaluate.forecast import ForecastEvaluator
 from merlion.models.factory import ModelFactory
-from merlion.utils.time_series import TimeSeries
+from merlion.utils.time_series import TimeSeries, to_timestamp
 
+from core.threads import job_params
 from schemas.forecast import ForecastProgressEnum
+from services.merlion.monitor import TrainingMonitor
+from utils import load_dataset, materialize
 
 
 class ForecastModel(_ForecastModel):
 
-    async def train(
+    def load_data(self, file_path, nrows=None):
+        # Полный датасет берется из кэша разобранных датасетов
+        if nrows is not None:
+            return super().load_data(file_path, nrows=nrows)
+        return load_dataset(file_path)
+
+    def train(
         self,
         algorithm,
         train_df,
@@ -28,6 +35,7 @@ class ForecastModel(_ForecastModel):
         params,
         set_progress,
     ):
+        train_df, test_df = materialize(train_df), materialize(test_df)
         if target_column not in train_df:
             target_column = int(target_column)
         assert (
@@ -58,9 +66,9 @@ class ForecastModel(_ForecastModel):
         # Get the target_seq_index & initialize the model
         params["target_seq_index"] = columns.index(target_column)
         model_class = ModelFactory.get_model_class(algorithm)
+        params = job_params("forecast", algorithm, params)
         model = model_class(model_class.config_class(**params))
-        await set_progress(ForecastProgressEnum.model_initialized)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.model_initialized)
         # Handle exogenous regressors if they are supported by the model
         if model.supports_exog and len(exog_columns) > 0:
             exog_ts = TimeSeries.from_pd(
@@ -77,24 +85,22 @@ class ForecastModel(_ForecastModel):
             exog_ts = None
 
         self.logger.info(f"Training the forecasting model: {algorithm}...")
-        await set_progress(ForecastProgressEnum.training_started)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.training_started)
         train_ts = TimeSeries.from_pd(train_df)
-        predictions = model.train(train_ts, exog_data=exog_ts)
+        with TrainingMonitor(set_progress, ForecastProgressEnum.training):
+            predictions = model.train(train_ts, exog_data=exog_ts)
         if isinstance(predictions, tuple):
             predictions = predictions[0]
 
         self.logger.info("Computing training performance metrics...")
-        await set_progress(ForecastProgressEnum.training_completed)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.training_completed)
         evaluator = ForecastEvaluator(
             model, config=ForecastEvaluator.config_class()
         )
         train_metrics = ForecastModel._compute_metrics(
             evaluator, train_ts, predictions
         )
-        await set_progress(ForecastProgressEnum.train_metrics_computed)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.train_metrics_computed)
         test_ts = TimeSeries.from_pd(test_df)
         if (
             "max_forecast_steps" in params
@@ -110,8 +116,7 @@ class ForecastModel(_ForecastModel):
         test_metrics = ForecastModel._compute_metrics(
             evaluator, test_ts, test_pred
         )
-        await set_progress(ForecastProgressEnum.test_metrics_computed)
-        await asyncio.sleep(0.01)
+        set_progress(ForecastProgressEnum.test_metrics_computed)
         self.logger.info("Finished.")
         return (
             model,
@@ -122,3 +127,74 @@ class ForecastModel(_ForecastModel):
             exog_ts,
             test_pred,
         )
+
+    @staticmethod
+    def predict(
+        model,
+        time_stamps,
+        target_column,
+        feature_columns,
+        exog_columns,
+        df=None,
+    ):
+        """Построить прогноз обученной моделью без повторного обучения.
+
+        Колонки целевой переменной и признаков из `df` передаются модели как
+        история перед прогнозом, экзогенные колонки - как экзогенные данные.
+        `time_stamps` - количество шагов или список меток времени.
+        """
+        if not isinstance(time_stamps, int):
+            time_stamps = to_timestamp(pd.DatetimeIndex(time_stamps))
+        time_series_prev, exog_ts = None, None
+        if df is not None:
+            columns = [target_column] + feature_columns
+            if all(c in df for c in columns):
+                history = df.loc[:, columns].dropna()
+                if len(history) > 0:
+                    time_series_prev = TimeSeries.from_pd(history)
+            if (
+                model.supports_exog
+                and len(exog_columns) > 0
+                and all(c in df for c in exog_columns)
+            ):
+                exog_ts = TimeSeries.from_pd(df.loc[:, exog_columns])
+
+        forecast, _ = model.forecast(
+            time_stamps=time_stamps,
+            time_series_prev=time_series_prev,
+            exog_data=exog_ts,
+        )
+        return forecast
+
+    def evaluate(
+        self,
+        algorithm,
+        train_df,
+        test_df,
+        target_column,
+        feature_columns,
+        exog_columns,
+        params,
+        set_progress,
+        return_forecast=False,
+    ):
+        """Обучить модель и вернуть только метрики.
+
+        Используется при бэктестинге, пакетном прогнозе и поиске
+        параметров, где модель не нужна и не должна передаваться между
+        процессами. При `return_forecast` также возвращается прогноз
+        тестовой части.
+        """
+        _, train_metrics, test_metrics, *_, test_pred = self.train(
+            algorithm,
+            train_df,
+            test_df,
+            target_column,
+            feature_columns,
+            exog_columns,
+            params,
+            set_progress,
+        )
+        if return_forecast:
+            return train_metrics, test_metrics, test_pred.to_pd()
+        return train_metrics, test_metrics
@@ -0,0 +1,138 @@
+import logging
+import re
+import threading
+import time
+from enum import Enum
+from typing import Callable, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LOSS = re.compile(r"Loss:?\s*([-+0-9.eE]+|nan|inf)")
+
+# Монитор задачи, которая выполняется в процессе-воркере
+_active: Optional["TrainingMonitor"] = None
+_original_print: Optional[Callable] = None
+
+
+def _progress_bar_print(bar, iteration, prefix, suffix, end=""):
+    """Замена `ProgressBar.print` Merlion.
+
+    Глубокие модели Merlion (AutoEncoder, VAE, DAGMM, LSTMED и
+    прогнозирующие нейросети) вызывают его после каждой эпохи. Во время
+    обучения эпоха и loss передаются монитору, иначе вызывается исходный
+    метод.
+    """
+    monitor = _active
+    if monitor is None:
+        return _original_print(bar, iteration, prefix, suffix, end=end)
+    match = _LOSS.search(suffix or "")
+    monitor.update(
+        iteration, bar.total, float(match.group(1)) if match else None
+    )
+
+
+def _install_hook() -> None:
+    global _original_print
+    if _original_print is not None:
+        return
+    from merlion.utils.misc import ProgressBar
+
+    _original_print = ProgressBar.print
+    ProgressBar.print = _progress_bar_print
+
+
+class TrainingMonitor:
+    """Отчет о ходе обучения модели в блоке `with`.
+
+    Эпохи глубоких моделей передаются в `set_progress` этапом `stage` с
+    полем `training` (эпоха, количество эпох, loss, прошедшее время и
+    оценка оставшегося времени) не чаще одного раза в `interval` секунд.
+    Для моделей без эпох раз в `heartbeat` секунд отправляется прошедшее
+    время, чтобы зависшее обучение было видно до ограничения по времени.
+    """
+
+    def __init__(
+        self,
+        set_progress: Callable,
+        stage: Enum,
+        interval: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+    ) -> None:
+        self.set_progress = set_progress
+        self.stage = stage
+        self.interval = (
+            settings.TRAINING.PROGRESS_INTERVAL
+            if interval is None
+            else interval
+        )
+        self.heartbeat = (
+            settings.TRAINING.PROGRESS_HEARTBEAT
+            if heartbeat is None
+            else heartbeat
+        )
+        self.epoch: Optional[int] = None
+        self.epochs: Optional[int] = None
+        self.loss: Optional[float] = None
+        self._started = 0.0
+        self._sent_at = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "TrainingMonitor":
+        global _active
+        _install_hook()
+        self._started = self._sent_at = time.monotonic()
+        _active = self
+        if self.heartbeat:
+            self._thread = threading.Thread(
+                target=self._beat, name="training-monitor", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _active
+        _active = None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def update(
+        self, epoch: int, epochs: int, loss: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            self.epoch, self.epochs, self.loss = epoch, epochs, loss
+        now = time.monotonic()
+        if now - self._sent_at >= self.interval or epoch >= epochs:
+            self._send(now)
+
+    def report(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            report = {"elapsed": round(elapsed, 1)}
+            if self.epoch:
+                report.update(
+                    epoch=self.epoch,
+                    epochs=self.epochs,
+                    loss=self.loss,
+                    eta=round(
+                        elapsed / self.epoch * (self.epochs - self.epoch), 1
+                    ),
+                )
+        return report
+
+    def _send(self, now: float) -> None:
+        self._sent_at = now
+        try:
+            self.set_progress(self.stage, training=self.report())
+        except Exception:
+            logger.warning("Не удалось отправить ход обучения")
+
+    def _beat(self) -> None:
+        while not self._stopped.wait(self.heartbeat):
+            now = time.monotonic()
+            if now - self._sent_at >= self.heartbeat:
+                self._send(now)
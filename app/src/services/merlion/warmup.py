@@ -0,0 +1,55 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from schemas.anomaly import AlgorithmAnomaly
+from schemas.forecast import AlgorithmForecast
+
+logger = logging.getLogger(__name__)
+
+# Обязательные параметры алгоритмов для обучения на синтетическом ряде
+WARMUP_PARAMS = {
+    "MSESDetector": {"max_forecast_steps": 24},
+}
+
+
+def _warmup_series(rows: int):
+    from merlion.utils.time_series import TimeSeries
+
+    index = pd.date_range("2020-01-01", periods=rows, freq="h")
+    values = np.sin(np.arange(rows) * 2 * np.pi / 24)
+    values += np.random.default_rng(0).normal(scale=0.1, size=rows)
+    return TimeSeries.from_pd(pd.DataFrame({"value": values}, index=index))
+
+
+def preload_algorithms(fit: bool = False, rows: int = 200) -> dict:
+    """Импортировать классы всех алгоритмов прогнозирования и детекторов.
+
+    Первое обучение алгоритма включает импорт его модуля и зависимостей
+    (torch, Prophet), поэтому процесс-воркер выполняет импорт заранее. При
+    `fit` каждый алгоритм дополнительно обучается на коротком
+    синтетическом ряде, чтобы инициализировать бэкенды. Возвращает время
+    подготовки каждого алгоритма в секундах или текст ошибки.
+    """
+    from merlion.models.factory import ModelFactory
+
+    train_ts = _warmup_series(rows) if fit else None
+    report = {}
+    for algorithm in [*AlgorithmForecast, *AlgorithmAnomaly]:
+        started = time.monotonic()
+        try:
+            model_class = ModelFactory.get_model_class(algorithm.value)
+            if fit:
+                config = model_class.config_class(
+                    **WARMUP_PARAMS.get(algorithm.value, {})
+                )
+                model = model_class(config)
+                model.train(train_ts)
+        except Exception as e:
+            logger.warning(f"Не удалось подготовить {algorithm.value}: {e}")
+            report[algorithm.value] = f"{type(e).__name__}: {e}"
+        else:
+            report[algorithm.value] = round(time.monotonic() - started, 3)
+    return report
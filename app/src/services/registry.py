@@ -0,0 +1,174 @@
+import asyncio
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Callable, NamedTuple, Optional, Tuple
+
+from fastapi import Depends
+
+from core.cache import SizedLRUCache
+from core.config import settings
+from exceptions.registry import ModelRegistryServiceException
+from models.registry import RegisteredModel
+from schemas.job import KindJobEnum
+from schemas.registry import ModelCacheStatsSchema
+from services.base import BaseModelRegistryService
+from storages.base import BaseModelRegistryStorage
+from storages.registry import get_model_registry_storage
+from utils import directory_size, file_sha256
+
+
+class LoadedModel(NamedTuple):
+    """Загруженная модель и блокировка, под которой она используется.
+
+    Модели Merlion меняют свое состояние при прогнозе и оценке (например,
+    состояние преобразований), поэтому одна модель из кэша не должна
+    использоваться несколькими потоками одновременно.
+    """
+
+    model: Any
+    lock: threading.Lock
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Вызвать `func(model, *args, **kwargs)` под блокировкой модели."""
+        with self.lock:
+            return func(self.model, *args, **kwargs)
+
+
+# Загруженные модели, общие для всех экземпляров сервиса в процессе
+loaded_models = SizedLRUCache(
+    max_size=settings.REGISTRY.CACHE_MAX_MB * 1024 * 1024,
+    max_items=settings.REGISTRY.CACHE_MAX_ITEMS,
+)
+
+
+class ModelRegistryService(BaseModelRegistryService):
+    """Реестр обученных моделей.
+
+    Каждая модель хранится в отдельной папке пользователя и результата
+    обучения, метаданные - в MongoDB. Загруженные модели хранятся в
+    LRU-кэше процесса, размер модели оценивается по размеру ее файлов.
+    """
+
+    def __init__(self, storage: BaseModelRegistryStorage) -> None:
+        super().__init__(storage)
+        self.path = settings.REGISTRY.PATH
+        self.loaded = loaded_models
+
+    async def register(
+        self,
+        user_id: str,
+        result_id: str,
+        kind: KindJobEnum,
+        algorithm: str,
+        model: Any = None,
+        source_path: Optional[str] = None,
+        training_time: Optional[float] = None,
+        dataset_path: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> RegisteredModel:
+        """Сохранить модель или скопировать уже сохраненную из
+        `source_path`."""
+        version = await self.storage.next_version(
+            user_id=user_id, kind=kind.value, algorithm=algorithm
+        )
+        path = os.path.join(
+            self.path, str(user_id), str(result_id), f"v{version}"
+        )
+        if model is not None:
+            await asyncio.to_thread(model.save, path)
+        else:
+            await asyncio.to_thread(
+                shutil.copytree, source_path, path, dirs_exist_ok=True
+            )
+
+        dataset_hash = None
+        if dataset_path:
+            try:
+                dataset_hash = await asyncio.to_thread(
+                    file_sha256, dataset_path
+                )
+            except OSError:
+                pass
+
+        registered = RegisteredModel(
+            user_id=user_id,
+            result_id=result_id,
+            kind=kind,
+            algorithm=algorithm,
+            version=version,
+            path=path,
+            size=directory_size(path),
+            training_time=training_time,
+            dataset_hash=dataset_hash,
+            params=params,
+        )
+        await self.storage.create(registered)
+        if model is not None:
+            self.loaded.put(
+                str(registered.id),
+                LoadedModel(model, threading.Lock()),
+                registered.size,
+            )
+        return registered
+
+    async def load(
+        self, user_id: str, result_id: str
+    ) -> Tuple[RegisteredModel, LoadedModel]:
+        """Получить последнюю версию модели результата обучения.
+
+        Модель возвращается вместе с блокировкой из записи кэша: вызовы,
+        меняющие состояние модели, выполняются через `LoadedModel.call`.
+        """
+        registered = await self.storage.get_by_user_and_result(
+            user_id=user_id, result_id=result_id
+        )
+        if not registered:
+            raise ModelRegistryServiceException(
+                "Модель не найдена", status_code=404
+            )
+
+        loaded = self.loaded.get(str(registered.id))
+        if loaded is None:
+            # Merlion импортируется при первой загрузке модели
+            from merlion.models.factory import ModelFactory
+
+            try:
+                model = await asyncio.to_thread(
+                    ModelFactory.load, registered.algorithm, registered.path
+                )
+            except FileNotFoundError:
+                raise ModelRegistryServiceException(
+                    "Файлы модели не найдены", status_code=404
+                )
+            loaded = LoadedModel(model, threading.Lock())
+            self.loaded.put(str(registered.id), loaded, registered.size)
+        return registered, loaded
+
+    async def get_users_model(
+        self, user_id: str, model_id: str
+    ) -> RegisteredModel:
+        registered = await self.storage.get_by_user_and_id(
+            user_id=user_id, model_id=model_id
+        )
+        if not registered:
+            raise ModelRegistryServiceException(
+                "Модель не найдена", status_code=404
+            )
+        return registered
+
+    async def get_users_models(
+        self, user_id: str
+    ) -> AsyncGenerator[RegisteredModel, None]:
+        return self.storage.get_documents_by_user(user_id=user_id)
+
+    def get_cache_stats(self) -> ModelCacheStatsSchema:
+        return ModelCacheStatsSchema(**self.loaded.stats())
+
+
+@lru_cache()
+def get_model_registry_service(
+    storage: BaseModelRegistryStorage = Depends(get_model_registry_storage),
+) -> ModelRegistryService:
+    return ModelRegistryService(storage=storage)
@@ -0,0 +1,177 @@
+import math
+import random
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from core.config import settings
+from core.executor import TrainingCancelledError
+from core.scheduler import gather_limited
+from schemas.base import (
+    BaseSearchDataSchema,
+    ParamsAlgorithmSchema,
+    SearchStrategyEnum,
+    SearchTrialSchema,
+    param_space_size,
+)
+from services.leaderboard import ERROR, SUCCESS, metric_value
+
+# Функция обучения одной конфигурации на последних `train_rows` строках
+# обучающей выборки, возвращает метрики `evaluate` модели Merlion
+# (обучающие и тестовые)
+RunTrial = Callable[[List[ParamsAlgorithmSchema], int], Awaitable[tuple]]
+
+
+def count_configs(data: BaseSearchDataSchema) -> int:
+    """Число конфигураций, которые вернёт `sample_configs`."""
+    total = param_space_size(data.param_space)
+    if data.strategy == SearchStrategyEnum.grid:
+        return total
+    return min(total, data.n_trials)
+
+
+def sample_configs(
+    data: BaseSearchDataSchema,
+) -> List[List[ParamsAlgorithmSchema]]:
+    """Выбрать конфигурации параметров для проверки.
+
+    Для grid возвращается вся сетка, для random и halving - не более
+    `n_trials` случайных узлов сетки без повторов.
+    """
+    total = param_space_size(data.param_space)
+    if data.strategy == SearchStrategyEnum.grid or total <= data.n_trials:
+        indexes = range(total)
+    else:
+        indexes = random.Random(data.seed).sample(range(total), data.n_trials)
+
+    configs = []
+    for index in indexes:
+        config = []
+        for space in reversed(data.param_space):
+            index, position = divmod(index, len(space.values))
+            config.append(
+                ParamsAlgorithmSchema(
+                    parametr=space.parametr, value=space.values[position]
+                )
+            )
+        configs.append(config[::-1])
+    return configs
+
+
+def rung_budgets(
+    data: BaseSearchDataSchema, n_configs: int, n_rows: int
+) -> List[int]:
+    """Количество обучающих строк на каждом этапе отбора.
+
+    На последнем этапе используется вся обучающая выборка, на каждом
+    предыдущем - в `halving_factor` раз меньше.
+    """
+    if data.strategy != SearchStrategyEnum.halving or n_configs <= 1:
+        return [n_rows]
+
+    rungs = 0
+    while n_configs > 1:
+        n_configs = math.ceil(n_configs / data.halving_factor)
+        rungs += 1
+    min_rows = min(n_rows, settings.TRAINING.SEARCH_MIN_ROWS)
+    budgets = [
+        max(min_rows, n_rows // data.halving_factor**k)
+        for k in range(rungs, 0, -1)
+    ]
+    return sorted(set(budgets + [n_rows]))
+
+
+async def run_search(
+    data: BaseSearchDataSchema,
+    algorithm: str,
+    n_rows: int,
+    run_trial: RunTrial,
+    metric: str,
+    higher_is_better: bool = False,
+    limit: Optional[int] = None,
+) -> Tuple[List[SearchTrialSchema], Optional[SearchTrialSchema]]:
+    """Поиск параметров с отсечением худших конфигураций.
+
+    Конфигурации одного этапа обучаются параллельно, не больше `limit`
+    одновременно (мест в очереди обучения). После каждого этапа,
+    кроме последнего, в следующий проходит лучшая `1 / halving_factor`
+    часть, остальные помечаются как отсеченные. Возвращает все испытания
+    и лучшее испытание последнего этапа.
+
+    Испытания возвращают только метрики, модели не передаются из
+    процессов-воркеров и не хранятся до конца поиска: лучшую конфигурацию
+    вызывающий код обучает заново.
+    """
+    configs = sample_configs(data)
+    budgets = rung_budgets(data, len(configs), n_rows)
+    trials: List[SearchTrialSchema] = []
+    best = None
+
+    for rung, train_rows in enumerate(budgets):
+        rung_trials = await gather_limited(
+            [
+                _run_trial(run_trial, algorithm, config, rung, train_rows)
+                for config in configs
+            ],
+            limit or len(configs),
+        )
+        for trial in rung_trials:
+            if isinstance(trial, BaseException):
+                raise trial
+
+        scored = sorted(
+            (
+                trial
+                for trial in rung_trials
+                if metric_value(trial, metric) is not None
+            ),
+            key=lambda trial: metric_value(trial, metric),
+            reverse=higher_is_better,
+        )
+        trials.extend(rung_trials)
+
+        if rung == len(budgets) - 1:
+            if scored:
+                best = scored[0]
+            break
+
+        keep = max(1, math.ceil(len(configs) / data.halving_factor))
+        for trial in scored[keep:]:
+            trial.pruned = True
+        for trial in rung_trials:
+            if metric_value(trial, metric) is None:
+                trial.pruned = True
+        configs = [trial.algorithm_params for trial in scored[:keep]]
+        if not configs:
+            break
+
+    for rank, trial in enumerate(scored if best else [], start=1):
+        trial.rank = rank
+    return trials, best
+
+
+async def _run_trial(
+    run_trial: RunTrial,
+    algorithm: str,
+    config: List[ParamsAlgorithmSchema],
+    rung: int,
+    train_rows: int,
+) -> SearchTrialSchema:
+    trial = SearchTrialSchema(
+        algorithm=algorithm,
+        algorithm_params=config,
+        status=SUCCESS,
+        rung=rung,
+        train_rows=train_rows,
+    )
+    started = time.monotonic()
+    try:
+        trial.train_metrics, trial.test_metrics = await run_trial(
+            config, train_rows
+        )
+    except TrainingCancelledError:
+        raise
+    except Exception as e:
+        trial.status = ERROR
+        trial.message = str(e)
+    trial.duration = round(time.monotonic() - started, 3)
+    return trial
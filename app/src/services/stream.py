@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import Any, List, Optional
+
+import pandas as pd
+from fastapi import Depends
+
+from core.config import settings
+from exceptions.anomaly import AnomalyServiceException
+from models.stream import AnomalyStreamState
+from schemas.anomaly import AnomalyStreamBatchSchema, AnomalyStreamResultSchema
+from services.base import BaseAnomalyStreamService, BaseModelRegistryService
+from services.registry import get_model_registry_service
+from storages.anomaly import get_anomaly_storage
+from storages.base import BaseAnomalyStorage, BaseAnomalyStreamStorage
+from storages.stream import get_anomaly_stream_storage
+from utils import (
+    deserializer_timeseries_from_pydantic,
+    serializer_dataframe_to_pydantic,
+)
+
+
+class AnomalyStream:
+    """Поток точек, который обрабатывает один обученный детектор.
+
+    Между сообщениями в памяти хранятся последние точки потока (история для
+    детектора) и последние оценки аномальности до постобработки, по которым
+    калибратор и порог вычисляют метки с учетом предыдущих сообщений.
+    Состояние периодически сохраняется в БД и восстанавливается при
+    следующем подключении к тому же детектору.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        columns: List[str],
+        state: AnomalyStreamState,
+        storage: BaseAnomalyStreamStorage,
+        lock: Optional[threading.Lock] = None,
+    ) -> None:
+        self.model = model
+        # Блокировка модели из кэша реестра, общая для всех ее потоков
+        self.lock = lock or threading.Lock()
+        self.columns = list(columns)
+        self.state = state
+        self.storage = storage
+        self.history = self._restore(state.history, self.columns)
+        self.scores = self._restore(state.scores, ["anom_score"])
+        self.unsaved = 0
+        self.saved_at = time.monotonic()
+
+    @staticmethod
+    def _restore(ts, columns) -> pd.DataFrame:
+        df = deserializer_timeseries_from_pydantic(ts)
+        if df is None:
+            return pd.DataFrame(columns=columns, dtype=float)
+        return df
+
+    async def process(
+        self, batch: AnomalyStreamBatchSchema
+    ) -> AnomalyStreamResultSchema:
+        df = self._to_dataframe(batch)
+        try:
+            scores, labels = await asyncio.to_thread(self._score, df)
+        except Exception as e:
+            raise AnomalyServiceException(
+                msg=f"Не удалось найти аномалии: {e}"
+            )
+
+        n_anomalies = int((labels.iloc[:, 0] != 0).sum())
+        self.state.n_points += len(df)
+        self.state.n_anomalies += n_anomalies
+        self.state.last_timestamp = df.index[-1].to_pydatetime()
+        self.unsaved += len(df)
+        if (
+            self.unsaved >= settings.STREAM.CHECKPOINT_POINTS
+            or time.monotonic() - self.saved_at
+            >= settings.STREAM.CHECKPOINT_INTERVAL
+        ):
+            await self.checkpoint()
+
+        return AnomalyStreamResultSchema(
+            index=labels.index.tolist(),
+            scores=scores.iloc[:, 0].tolist(),
+            labels=labels.iloc[:, 0].tolist(),
+            n_points=self.state.n_points,
+            n_anomalies=self.state.n_anomalies,
+        )
+
+    def _to_dataframe(self, batch: AnomalyStreamBatchSchema) -> pd.DataFrame:
+        missing = [c for c in self.columns if c not in batch.data]
+        if missing:
+            raise AnomalyServiceException(
+                msg=f"В данных нет переменных: {', '.join(missing)}."
+            )
+        # Метки с часовым поясом приводятся к UTC без пояса, как история
+        # потока и последняя метка, сохраненные в MongoDB
+        index = pd.to_datetime(batch.index, utc=True).tz_convert(None)
+        df = pd.DataFrame(
+            {c: batch.data[c] for c in self.columns},
+            index=index,
+            dtype=float,
+        )
+        if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+            raise AnomalyServiceException(
+                msg="Метки времени должны возрастать."
+            )
+        last = self.state.last_timestamp
+        if last is not None and df.index[0] <= pd.Timestamp(last):
+            raise AnomalyServiceException(
+                msg=f"Метки времени должны быть больше последней "
+                f"полученной ({last})."
+            )
+        return df
+
+    def _score(self, df: pd.DataFrame):
+        """Вычислить оценки и метки новых точек и обновить состояние.
+
+        Преобразования детектора (разности, окна) не могут обработать одну
+        точку без истории, поэтому первые `STREAM_WARMUP_ROWS` точек потока
+        накапливаются без оценки и затем оцениваются вместе.
+        """
+        from merlion.utils.time_series import TimeSeries
+
+        rows = settings.STREAM.HISTORY_ROWS
+        if len(self.scores) == 0:
+            points, history = pd.concat([self.history, df]), None
+            if len(points) < settings.STREAM.WARMUP_ROWS:
+                self.history = points.iloc[-rows:]
+                empty = pd.DataFrame(columns=["anom_score"], dtype=float)
+                return empty, empty
+        else:
+            points, history = df, TimeSeries.from_pd(self.history)
+        with self.lock:
+            scores = self.model.get_anomaly_score(
+                TimeSeries.from_pd(points), time_series_prev=history
+            ).to_pd()
+
+            all_scores = pd.concat([self.scores, scores])
+            if self.model.post_rule is not None:
+                labels = self.model.post_rule(TimeSeries.from_pd(all_scores))
+                labels = labels.to_pd().iloc[-len(scores) :]
+            else:
+                labels = scores
+
+        self.history = pd.concat([self.history, df]).iloc[-rows:]
+        self.scores = all_scores.iloc[-rows:]
+        return scores, labels
+
+    async def checkpoint(self):
+        self.state.history = serializer_dataframe_to_pydantic(self.history)
+        self.state.scores = serializer_dataframe_to_pydantic(self.scores)
+        await self.storage.save(self.state)
+        self.unsaved = 0
+        self.saved_at = time.monotonic()
+
+
+class AnomalyStreamService(BaseAnomalyStreamService):
+
+    async def attach(self, user_id: str, anomaly_id: str) -> AnomalyStream:
+        result = await self.anomaly_storage.get_documents_by_user_and_id(
+            user_id=user_id, anomaly_id=anomaly_id
+        )
+        if not result:
+            raise AnomalyServiceException("Объект не найден", status_code=404)
+        _, loaded = await self.registry.load(
+            user_id=user_id, result_id=anomaly_id
+        )
+        state = await self.storage.get(user_id=user_id, anomaly_id=anomaly_id)
+        if not state:
+            state = AnomalyStreamState(user_id=user_id, anomaly_id=anomaly_id)
+        return AnomalyStream(
+            model=loaded.model,
+            columns=result.params.columns,
+            state=state,
+            storage=self.storage,
+            lock=loaded.lock,
+        )
+
+
+@lru_cache()
+def get_anomaly_stream_service(
+    storage: BaseAnomalyStreamStorage = Depends(get_anomaly_stream_storage),
+    anomaly_storage: BaseAnomalyStorage = Depends(get_anomaly_storage),
+    registry: BaseModelRegistryService = Depends(get_model_registry_service),
+) -> AnomalyStreamService:
+    return AnomalyStreamService(
+        storage=storage, anomaly_storage=anomaly_storage, registry=registry
+    )
@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Optional
+from datetime import datetime
+from typing import AsyncGenerator, List, Optional
 
 from models import Profile, User
 from models.anomaly import ResultAnomalyModel
 from models.auth import Auth
-from models.dataset import Dataset
-from models.forecast import ResultForecastModel
+from models.cache import TrainingCacheEntry
+from models.dataset import Dataset, DatasetProfile
+from models.forecast import ResultForecastBatchModel, ResultForecastModel
+from models.job import TrainingJob
+from models.progress import ProgressEventModel
+from models.registry import RegisteredModel
+from models.stream import AnomalyStreamState
 
 
 class BaseStorage(ABC):
@@ -88,6 +94,14 @@ class BaseForecastStorage(BaseStorage):
         self, user_id: str, forecast_id: str
     ) -> ResultForecastModel: ...
 
+    @abstractmethod
+    async def save_batch_result(self, data: ResultForecastBatchModel): ...
+
+    @abstractmethod
+    async def get_batch_by_user_and_id(
+        self, user_id: str, batch_id: str
+    ) -> Optional[ResultForecastBatchModel]: ...
+
 
 class BaseDatasetStorage(BaseStorage):
 
@@ -104,6 +118,9 @@ class BaseDatasetStorage(BaseStorage):
         self, user_id: str, doc_id: str
     ) -> Dataset: ...
 
+    @abstractmethod
+    async def update_profile(self, doc_id: str, profile: DatasetProfile): ...
+
 
 class BaseAnomalyStorage(BaseStorage):
 
@@ -119,3 +136,99 @@ class BaseAnomalyStorage(BaseStorage):
     async def get_documents_by_user_and_id(
         self, user_id: str, anomaly_id: str
     ) -> ResultAnomalyModel: ...
+
+
+class BaseJobStorage(BaseStorage):
+
+    @abstractmethod
+    async def create(self, job: TrainingJob): ...
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[TrainingJob]: ...
+
+    @abstractmethod
+    async def update(self, job_id: str, data: dict): ...
+
+    @abstractmethod
+    async def requeue_stale(
+        self, stale_before: datetime, max_attempts: int
+    ): ...
+
+    @abstractmethod
+    async def request_cancel(self, user_id: str, job_id: str): ...
+
+    @abstractmethod
+    async def is_cancel_requested(self, job_id: str) -> bool: ...
+
+    @abstractmethod
+    async def get_document_by_user_and_id(
+        self, user_id: str, job_id: str
+    ) -> Optional[TrainingJob]: ...
+
+
+class BaseTrainingCacheStorage(BaseStorage):
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[TrainingCacheEntry]: ...
+
+    @abstractmethod
+    async def put(self, entry: TrainingCacheEntry): ...
+
+    @abstractmethod
+    async def evict(
+        self, used_before: datetime, max_entries: int, max_size: int
+    ) -> List[TrainingCacheEntry]: ...
+
+    @abstractmethod
+    async def count_request(self, hit: bool): ...
+
+    @abstractmethod
+    async def get_stats(self) -> dict: ...
+
+
+class BaseModelRegistryStorage(BaseStorage):
+
+    @abstractmethod
+    async def create(self, model: RegisteredModel): ...
+
+    @abstractmethod
+    async def next_version(
+        self, user_id: str, kind: str, algorithm: str
+    ) -> int: ...
+
+    @abstractmethod
+    async def get_by_user_and_result(
+        self, user_id: str, result_id: str
+    ) -> Optional[RegisteredModel]: ...
+
+    @abstractmethod
+    async def get_by_user_and_id(
+        self, user_id: str, model_id: str
+    ) -> Optional[RegisteredModel]: ...
+
+    @abstractmethod
+    async def get_documents_by_user(
+        self, user_id: str
+    ) -> AsyncGenerator[RegisteredModel, None]: ...
+
+
+class BaseAnomalyStreamStorage(BaseStorage):
+
+    @abstractmethod
+    async def get(
+        self, user_id: str, anomaly_id: str
+    ) -> Optional[AnomalyStreamState]: ...
+
+    @abstractmethod
+    async def save(self, state: AnomalyStreamState): ...
+
+
+class BaseProgressStorage(BaseStorage):
+
+    @abstractmethod
+    async def add(self, event: ProgressEventModel): ...
+
+    @abstractmethod
+    async def get_after(
+        self, topic: str, after_id: Optional[str] = None
+    ) -> List[ProgressEventModel]: ...
@@ -0,0 +1,118 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+
+from core.config import settings
+from db.mongodb import get_db
+from models.base import datetime_now
+from models.cache import TrainingCacheEntry
+
+from .base import BaseTrainingCacheStorage
+
+STATS_ID = "training"
+
+
+class TrainingCacheStorageMongoDB(BaseTrainingCacheStorage):
+    db: AsyncIOMotorDatabase
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.TRAINING_CACHE
+        )
+        self.stats_collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.TRAINING_CACHE_STATS
+        )
+        self.db = db
+
+    async def create_indexes(self):
+        await self.collection.create_index([("key", ASCENDING)], unique=True)
+        await self.collection.create_index([("last_used_at", ASCENDING)])
+
+    async def get(self, key: str) -> Optional[TrainingCacheEntry]:
+        doc = await self.collection.find_one_and_update(
+            {"key": key},
+            {"$set": {"last_used_at": datetime_now()}, "$inc": {"hits": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        return TrainingCacheEntry(**doc) if doc else None
+
+    async def put(self, entry: TrainingCacheEntry):
+        doc = entry.model_dump(by_alias=True)
+        doc.pop("_id")
+        await self.collection.update_one(
+            {"key": entry.key},
+            {"$setOnInsert": {"_id": entry.id}, "$set": doc},
+            upsert=True,
+        )
+
+    async def evict(
+        self, used_before: datetime, max_entries: int, max_size: int
+    ) -> List[TrainingCacheEntry]:
+        """Удалить устаревшие записи, затем самые давно использованные,
+        пока кэш не уложится в ограничения по количеству и размеру."""
+        evicted = await self.collection.find(
+            {"last_used_at": {"$lt": used_before}}
+        ).to_list(None)
+
+        stats = await self._totals(exclude=[doc["_id"] for doc in evicted])
+        entries, size = stats["entries"], stats["size"]
+        if entries > max_entries or size > max_size:
+            cursor = self.collection.find(
+                {"last_used_at": {"$gte": used_before}},
+                projection={"result": 0},
+                sort=[("last_used_at", ASCENDING)],
+            )
+            async for doc in cursor:
+                if entries <= max_entries and size <= max_size:
+                    break
+                evicted.append(doc)
+                entries -= 1
+                size -= doc.get("size", 0)
+
+        if evicted:
+            await self.collection.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in evicted]}}
+            )
+        return [TrainingCacheEntry(**{"result": {}, **doc}) for doc in evicted]
+
+    async def count_request(self, hit: bool):
+        await self.stats_collection.update_one(
+            {"_id": STATS_ID},
+            {"$inc": {"hits" if hit else "misses": 1}},
+            upsert=True,
+        )
+
+    async def get_stats(self) -> dict:
+        counters = await self.stats_collection.find_one({"_id": STATS_ID})
+        return {
+            **(await self._totals()),
+            "hits": (counters or {}).get("hits", 0),
+            "misses": (counters or {}).get("misses", 0),
+        }
+
+    async def _totals(self, exclude: Optional[list] = None) -> dict:
+        pipeline = [
+            {"$match": {"_id": {"$nin": exclude or []}}},
+            {
+                "$group": {
+                    "_id": None,
+                    "entries": {"$sum": 1},
+                    "size": {"$sum": "$size"},
+                }
+            },
+        ]
+        totals = await self.collection.aggregate(pipeline).to_list(1)
+        if not totals:
+            return {"entries": 0, "size": 0}
+        return {"entries": totals[0]["entries"], "size": totals[0]["size"]}
+
+
+@lru_cache()
+def get_training_cache_storage(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> TrainingCacheStorageMongoDB:
+    return TrainingCacheStorageMongoDB(db=db)
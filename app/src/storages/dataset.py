@@ -8,7 +8,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from core.config import settings
 from db.mongodb import get_db
 from models.base import PydanticObjectId
-from models.dataset import Dataset
+from models.dataset import Dataset, DatasetProfile
 
 from .base import BaseDatasetStorage
 
@@ -43,6 +43,12 @@ class DatasetStorageMongoDB(BaseDatasetStorage):
         )
         return Dataset(**user_doc) if user_doc else None
 
+    async def update_profile(self, doc_id: str, profile: DatasetProfile):
+        await self.collection.update_one(
+            {"_id": ObjectId(doc_id)},
+            {"$set": {"profile": profile.model_dump()}},
+        )
+
 
 @lru_cache()
 def get_dataset_storage(
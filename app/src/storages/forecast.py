@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from bson import ObjectId
 from fastapi import Depends
@@ -7,7 +7,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from core.config import settings
 from db.mongodb import get_db
-from models.forecast import ResultForecastModel
+from models.forecast import ResultForecastBatchModel, ResultForecastModel
 
 from .base import BaseForecastStorage
 
@@ -19,6 +19,9 @@ class ForecastStorageMongoDB(BaseForecastStorage):
         self.collection = db.get_collection(
             settings.MONGODB.COLLECTIONS.FORECAST
         )
+        self.batch_collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.FORECAST_BATCH
+        )
         self.db = db
 
     async def save_result(self, data: ResultForecastModel):
@@ -43,6 +46,18 @@ class ForecastStorageMongoDB(BaseForecastStorage):
         )
         return ResultForecastModel(**doc) if doc else None
 
+    async def save_batch_result(self, data: ResultForecastBatchModel):
+        doc = data.model_dump(by_alias=True)
+        await self.batch_collection.insert_one(document=doc)
+
+    async def get_batch_by_user_and_id(
+        self, user_id: str, batch_id: str
+    ) -> Optional[ResultForecastBatchModel]:
+        doc = await self.batch_collection.find_one(
+            {"_id": ObjectId(batch_id), "user_id": ObjectId(user_id)}
+        )
+        return ResultForecastBatchModel(**doc) if doc else None
+
 
 @lru_cache()
 def get_forecast_storage(
@@ -0,0 +1,118 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+
+from core.config import settings
+from db.mongodb import get_db
+from models.base import datetime_now
+from models.job import TrainingJob
+from schemas.job import StatusJobEnum
+
+from .base import BaseJobStorage
+
+
+class JobStorageMongoDB(BaseJobStorage):
+    db: AsyncIOMotorDatabase
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = db.get_collection(settings.MONGODB.COLLECTIONS.JOBS)
+        self.db = db
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [("status", ASCENDING), ("created_at", ASCENDING)]
+        )
+        await self.collection.create_index([("user_id", ASCENDING)])
+
+    async def create(self, job: TrainingJob):
+        doc = job.model_dump(by_alias=True)
+        await self.collection.insert_one(document=doc)
+
+    async def claim(self, worker_id: str) -> Optional[TrainingJob]:
+        """Атомарно забрать самую старую задачу из очереди."""
+        now = datetime_now()
+        doc = await self.collection.find_one_and_update(
+            {"status": StatusJobEnum.queued},
+            {
+                "$set": {
+                    "status": StatusJobEnum.process,
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "heartbeat_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return TrainingJob(**doc) if doc else None
+
+    async def update(self, job_id: str, data: dict):
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id)}, {"$set": data}
+        )
+
+    async def requeue_stale(self, stale_before: datetime, max_attempts: int):
+        """Вернуть в очередь задачи, воркер которых перестал отвечать."""
+        query = {
+            "status": StatusJobEnum.process,
+            "heartbeat_at": {"$lt": stale_before},
+        }
+        await self.collection.update_many(
+            {**query, "attempts": {"$gte": max_attempts}},
+            {
+                "$set": {
+                    "status": StatusJobEnum.error,
+                    "message": "Превышено количество попыток выполнения.",
+                    "finished_at": datetime_now(),
+                }
+            },
+        )
+        await self.collection.update_many(
+            query,
+            {"$set": {"status": StatusJobEnum.queued, "worker_id": None}},
+        )
+
+    async def request_cancel(self, user_id: str, job_id: str):
+        """Задача из очереди отменяется сразу, выполняемая - воркером."""
+        query = {"_id": ObjectId(job_id), "user_id": ObjectId(user_id)}
+        result = await self.collection.update_one(
+            {**query, "status": StatusJobEnum.queued},
+            {
+                "$set": {
+                    "status": StatusJobEnum.cancelled,
+                    "finished_at": datetime_now(),
+                }
+            },
+        )
+        if not result.modified_count:
+            await self.collection.update_one(
+                {**query, "status": StatusJobEnum.process},
+                {"$set": {"cancel_requested": True}},
+            )
+
+    async def is_cancel_requested(self, job_id: str) -> bool:
+        doc = await self.collection.find_one(
+            {"_id": ObjectId(job_id)}, projection={"cancel_requested": 1}
+        )
+        return bool(doc and doc.get("cancel_requested"))
+
+    async def get_document_by_user_and_id(
+        self, user_id: str, job_id: str
+    ) -> Optional[TrainingJob]:
+        doc = await self.collection.find_one(
+            {"_id": ObjectId(job_id), "user_id": ObjectId(user_id)}
+        )
+        return TrainingJob(**doc) if doc else None
+
+
+@lru_cache()
+def get_job_storage(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> JobStorageMongoDB:
+    return JobStorageMongoDB(db=db)
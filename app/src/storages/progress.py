@@ -0,0 +1,52 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from core.config import settings
+from db.mongodb import get_db
+from models.progress import ProgressEventModel
+
+from .base import BaseProgressStorage
+
+
+class ProgressStorageMongoDB(BaseProgressStorage):
+    db: AsyncIOMotorDatabase
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.PROGRESS_EVENTS
+        )
+        self.db = db
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [("topic", ASCENDING), ("_id", ASCENDING)]
+        )
+        await self.collection.create_index(
+            "created_at", expireAfterSeconds=settings.PROGRESS.TTL
+        )
+
+    async def add(self, event: ProgressEventModel):
+        doc = event.model_dump(by_alias=True)
+        doc["_id"] = ObjectId(doc["_id"])
+        await self.collection.insert_one(doc)
+
+    async def get_after(
+        self, topic: str, after_id: Optional[str] = None
+    ) -> List[ProgressEventModel]:
+        query = {"topic": topic}
+        if after_id:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        cursor = self.collection.find(query).sort("_id", ASCENDING)
+        return [ProgressEventModel(**doc) async for doc in cursor]
+
+
+@lru_cache()
+def get_progress_storage(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> ProgressStorageMongoDB:
+    return ProgressStorageMongoDB(db=db)
@@ -0,0 +1,111 @@
+from functools import lru_cache
+from typing import AsyncGenerator, Optional
+
+from bson import ObjectId
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from core.config import settings
+from db.mongodb import get_db
+from models.registry import RegisteredModel
+
+from .base import BaseModelRegistryStorage
+
+
+class ModelRegistryStorageMongoDB(BaseModelRegistryStorage):
+    db: AsyncIOMotorDatabase
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.MODELS
+        )
+        self.versions = db.get_collection(
+            settings.MONGODB.COLLECTIONS.MODEL_VERSIONS
+        )
+        self.db = db
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [
+                ("user_id", ASCENDING),
+                ("kind", ASCENDING),
+                ("algorithm", ASCENDING),
+                ("version", DESCENDING),
+            ],
+            unique=True,
+        )
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("result_id", ASCENDING)]
+        )
+
+    async def create(self, model: RegisteredModel):
+        doc = model.model_dump(by_alias=True)
+        await self.collection.insert_one(document=doc)
+
+    async def next_version(
+        self, user_id: str, kind: str, algorithm: str
+    ) -> int:
+        """Выделить следующую версию модели атомарным счетчиком.
+
+        Счетчик сначала поднимается до последней сохраненной версии
+        (`$max`), чтобы учесть модели, зарегистрированные до появления
+        счетчика, затем увеличивается `$inc`. Параллельные обучения одного
+        алгоритма получают разные версии.
+        """
+        key = {
+            "user_id": ObjectId(user_id),
+            "kind": kind,
+            "algorithm": algorithm,
+        }
+        latest = await self.collection.find_one(
+            key, projection={"version": 1}, sort=[("version", DESCENDING)]
+        )
+        if latest:
+            await self.versions.update_one(
+                {"_id": key},
+                {"$max": {"version": latest["version"]}},
+                upsert=True,
+            )
+        doc = await self.versions.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["version"]
+
+    async def get_by_user_and_result(
+        self, user_id: str, result_id: str
+    ) -> Optional[RegisteredModel]:
+        doc = await self.collection.find_one(
+            {"user_id": ObjectId(user_id), "result_id": ObjectId(result_id)},
+            sort=[("version", DESCENDING)],
+        )
+        return RegisteredModel(**doc) if doc else None
+
+    async def get_by_user_and_id(
+        self, user_id: str, model_id: str
+    ) -> Optional[RegisteredModel]:
+        doc = await self.collection.find_one(
+            {"_id": ObjectId(model_id), "user_id": ObjectId(user_id)}
+        )
+        return RegisteredModel(**doc) if doc else None
+
+    async def get_documents_by_user(
+        self, user_id: str, length: int = 100
+    ) -> AsyncGenerator[RegisteredModel, None]:
+        documents = (
+            await self.collection.find({"user_id": ObjectId(user_id)})
+            .sort("created_at", DESCENDING)
+            .to_list(length)
+        )
+        for doc in documents:
+            yield RegisteredModel(**doc)
+
+
+@lru_cache()
+def get_model_registry_storage(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> ModelRegistryStorageMongoDB:
+    return ModelRegistryStorageMongoDB(db=db)
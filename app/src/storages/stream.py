@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from core.config import settings
+from db.mongodb import get_db
+from models.base import datetime_now
+from models.stream import AnomalyStreamState
+
+from .base import BaseAnomalyStreamStorage
+
+
+class AnomalyStreamStorageMongoDB(BaseAnomalyStreamStorage):
+    db: AsyncIOMotorDatabase
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = db.get_collection(
+            settings.MONGODB.COLLECTIONS.ANOMALY_STREAMS
+        )
+        self.db = db
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [("user_id", ASCENDING), ("anomaly_id", ASCENDING)], unique=True
+        )
+
+    async def get(
+        self, user_id: str, anomaly_id: str
+    ) -> Optional[AnomalyStreamState]:
+        doc = await self.collection.find_one(
+            {
+                "user_id": ObjectId(user_id),
+                "anomaly_id": ObjectId(anomaly_id),
+            }
+        )
+        return AnomalyStreamState(**doc) if doc else None
+
+    async def save(self, state: AnomalyStreamState):
+        state.updated_at = datetime_now()
+        doc = state.model_dump(by_alias=True, exclude={"id"})
+        await self.collection.update_one(
+            {"user_id": doc["user_id"], "anomaly_id": doc["anomaly_id"]},
+            {"$set": doc, "$setOnInsert": {"_id": ObjectId(state.id)}},
+            upsert=True,
+        )
+
+
+@lru_cache()
+def get_anomaly_stream_storage(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> AnomalyStreamStorageMongoDB:
+    return AnomalyStreamStorageMongoDB(db=db)
@@ -1,5 +1,33 @@
-from .utils import serializer_timeseries_to_pydantic
+from .column_store import (
+    DatasetView,
+    build_column_store,
+    materialize,
+    open_dataset,
+)
+from .columnar import columnar_path, convert_to_columnar, load_dataset
+from .hashing import file_sha256, params_sha256, remember_file_sha256
+from .profiling import profile_dataset
+from .utils import (
+    deserializer_timeseries_from_pydantic,
+    directory_size,
+    serializer_dataframe_to_pydantic,
+    serializer_timeseries_to_pydantic,
+)
 
 __all__ = [
+    "DatasetView",
+    "build_column_store",
+    "columnar_path",
+    "convert_to_columnar",
+    "deserializer_timeseries_from_pydantic",
+    "directory_size",
+    "file_sha256",
+    "load_dataset",
+    "materialize",
+    "open_dataset",
+    "params_sha256",
+    "profile_dataset",
+    "remember_file_sha256",
+    "serializer_dataframe_to_pydantic",
     "serializer_timeseries_to_pydantic",
 ]
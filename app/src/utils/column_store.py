@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import shutil
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .columnar import columnar_path, load_dataset
+
+logger = logging.getLogger(__name__)
+
+STORE_SUFFIX = ".columns"
+META_FILE = "meta.json"
+INDEX_FILE = "index.npy"
+
+
+def column_store_path(file_path: str) -> str:
+    """Папка с колонками CSV-датасета в виде файлов `.npy`."""
+    return os.path.splitext(file_path)[0] + STORE_SUFFIX
+
+
+def build_column_store(file_path: str, dtype: str = "float64") -> str:
+    """Сохранить числовые колонки датасета отдельными массивами `.npy`.
+
+    Колонки берутся по одной из Parquet-копии датасета, поэтому в памяти
+    одновременно находится только одна колонка. Индекс времени хранится
+    как int64 (наносекунды), значения - в типе `dtype`. Нечисловые колонки
+    пропускаются: их читают из Parquet или CSV. Папка собирается во
+    временной и переименовывается после записи всех колонок.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    source = columnar_path(file_path)
+    path = column_store_path(file_path)
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        parquet = pq.ParquetFile(source)
+        index_name = parquet.schema_arrow.pandas_metadata["index_columns"][0]
+        index = pd.read_parquet(source, columns=[]).index
+        np.save(
+            os.path.join(tmp_path, INDEX_FILE),
+            index.values.astype("datetime64[ns]").view("int64"),
+        )
+        columns = {}
+        for name in parquet.schema_arrow.names:
+            if name == index_name:
+                continue
+            column = parquet.read(columns=[name]).column(0)
+            if not (
+                pa.types.is_integer(column.type)
+                or pa.types.is_floating(column.type)
+            ):
+                continue
+            file_name = f"c{len(columns)}.npy"
+            np.save(
+                os.path.join(tmp_path, file_name),
+                column.to_numpy().astype(dtype, copy=False),
+            )
+            columns[name] = file_name
+        with open(os.path.join(tmp_path, META_FILE), "w") as file:
+            json.dump(
+                {"rows": len(index), "dtype": dtype, "columns": columns},
+                file,
+                ensure_ascii=False,
+            )
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def read_store_meta(file_path: str) -> Optional[dict]:
+    try:
+        with open(
+            os.path.join(column_store_path(file_path), META_FILE)
+        ) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+class DatasetView:
+    """Строки `start:stop` колонок `columns` датасета в хранилище колонок.
+
+    Передается в процесс-воркер вместо DataFrame: при pickle передаются
+    только путь и границы, а воркер отображает файлы колонок в память
+    (`load`), поэтому задачи на одном датасете используют общий page
+    cache, а не копии данных. Поддерживает `len`, срезы `iloc` и `index`,
+    как DataFrame в коде сервисов.
+
+    Если колонок нет в хранилище (оно еще не построено или колонка
+    нечисловая), `load` читает датасет через `load_dataset`: процесс-воркер
+    разбирает файл один раз и берет срезы из своего кэша разобранных
+    датасетов, а DataFrame по-прежнему не передается между процессами.
+    `index` в этом случае недоступен.
+    """
+
+    def __init__(
+        self, file_path: str, columns: tuple[str, ...], start: int, stop: int
+    ) -> None:
+        self.file_path = file_path
+        self.columns = columns
+        self.start = start
+        self.stop = stop
+
+    def __repr__(self) -> str:
+        return (
+            f"DatasetView({self.file_path!r}, {list(self.columns)}, "
+            f"{self.start}:{self.stop})"
+        )
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def iloc(self) -> "_ViewSlicer":
+        return _ViewSlicer(self)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        store = column_store_path(self.file_path)
+        values = np.load(os.path.join(store, INDEX_FILE), mmap_mode="r")
+        return pd.DatetimeIndex(
+            values[self.start : self.stop].view("datetime64[ns]")
+        )
+
+    def load(self) -> pd.DataFrame:
+        """DataFrame на отображенных в память файлах колонок.
+
+        Файлы открываются в режиме copy-on-write: страницы общие для всех
+        процессов, пока их не изменяют, а изменения не попадают в файл.
+        """
+        store = column_store_path(self.file_path)
+        meta = read_store_meta(self.file_path)
+        if meta is None or not all(
+            name in meta["columns"] for name in self.columns
+        ):
+            return load_dataset(self.file_path, self.columns).iloc[
+                self.start : self.stop
+            ]
+        data = {
+            name: np.load(
+                os.path.join(store, meta["columns"][name]), mmap_mode="c"
+            )[self.start : self.stop]
+            for name in self.columns
+        }
+        return pd.DataFrame(data, index=self.index, copy=False)
+
+
+class _ViewSlicer:
+    def __init__(self, view: DatasetView) -> None:
+        self.view = view
+
+    def __getitem__(self, key: slice) -> DatasetView:
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("DatasetView поддерживает только срезы строк")
+        start, stop, _ = key.indices(len(self.view))
+        return DatasetView(
+            self.view.file_path,
+            self.view.columns,
+            self.view.start + start,
+            self.view.start + max(start, stop),
+        )
+
+
+def open_dataset(file_path: str, columns: Optional[Iterable[str]] = None):
+    """Датасет для передачи в процесс-воркер.
+
+    Если все колонки `columns` есть в хранилище колонок, возвращается
+    `DatasetView` без чтения данных, иначе - DataFrame из `load_dataset`.
+    """
+    meta = read_store_meta(file_path)
+    if meta is not None and columns is not None:
+        names = list(dict.fromkeys(c for c in columns if c))
+        if names and all(name in meta["columns"] for name in names):
+            return DatasetView(file_path, tuple(names), 0, meta["rows"])
+    return load_dataset(file_path, columns)
+
+
+def materialize(frame) -> pd.DataFrame:
+    """DataFrame из `DatasetView` или сам DataFrame."""
+    if isinstance(frame, DatasetView):
+        return frame.load()
+    return frame
@@ -0,0 +1,179 @@
+import logging
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.cache import SizedLRUCache
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SUFFIX = ".parquet"
+
+# Разобранные датасеты по пути, размеру и времени изменения файла
+parsed_datasets = SizedLRUCache(
+    max_size=settings.DATASET.CACHE_MAX_MB * 2**20,
+    max_items=settings.DATASET.CACHE_MAX_ITEMS,
+)
+
+
+def columnar_path(file_path: str) -> str:
+    """Путь к Parquet-копии CSV-датасета."""
+    return os.path.splitext(file_path)[0] + COLUMNAR_SUFFIX
+
+
+def _parse_index(df: pd.DataFrame) -> pd.DataFrame:
+    """Первая колонка - индекс времени, как в `load_data` Merlion."""
+    index_type = df.dtypes[df.columns[0]]
+    df = df.set_index(df.columns[0])
+    df.index = pd.to_datetime(
+        df.index.values,
+        unit="ms" if index_type in [np.int32, np.int64] else None,
+    )
+    return df
+
+
+def _common_dtype(first, second) -> str:
+    if first == second:
+        return first
+    numeric = {"int64", "float64"}
+    if first in numeric and second in numeric:
+        return "float64"
+    return "object"
+
+
+def _infer_dtypes(file_path: str, chunk_rows: int) -> dict[str, str]:
+    """Общие типы колонок по всем блокам файла.
+
+    Типы блоков могут различаться (пропуски в целочисленной колонке,
+    текст в числовой), поэтому для каждой колонки выбирается тип, в
+    который без потерь переводятся все блоки.
+    """
+    dtypes: dict[str, str] = {}
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        for column, dtype in chunk.dtypes.items():
+            dtype = str(dtype)
+            dtypes[column] = (
+                _common_dtype(dtypes[column], dtype)
+                if column in dtypes
+                else dtype
+            )
+    return dtypes
+
+
+def _columnar_schema(table, dtypes: dict[str, str]):
+    """Схема Parquet-копии с общими типами колонок из `_infer_dtypes`.
+
+    Схема первого блока не подходит: текстовая колонка, пустая во всем
+    блоке, получает в нем тип null, и следующие блоки к нему не приводятся.
+    Из схемы блока берутся только индекс и метаданные pandas.
+    """
+    import pyarrow as pa
+
+    types = {
+        "object": pa.string(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+    }
+    schema = table.schema
+    index_columns = schema.pandas_metadata["index_columns"]
+    for i, field in enumerate(schema):
+        arrow_type = types.get(dtypes.get(field.name))
+        if field.name not in index_columns and arrow_type is not None:
+            schema = schema.set(i, field.with_type(arrow_type))
+    return schema
+
+
+def convert_to_columnar(file_path: str, chunk_rows: int = 100_000) -> str:
+    """Сохранить CSV-датасет в Parquet с разобранным индексом времени.
+
+    Файл читается блоками по `chunk_rows` строк в два прохода (типы
+    колонок, затем запись), поэтому память не зависит от размера файла.
+    Копия записывается во временный файл и переименовывается только после
+    успешной записи, так что загрузка никогда не видит недописанный файл.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = columnar_path(file_path)
+    tmp_path = f"{path}.tmp"
+    dtypes = _infer_dtypes(file_path, chunk_rows)
+    writer = None
+    try:
+        for chunk in pd.read_csv(
+            file_path, chunksize=chunk_rows, dtype=dtypes
+        ):
+            table = pa.Table.from_pandas(_parse_index(chunk))
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    tmp_path, _columnar_schema(table, dtypes)
+                )
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            raise ValueError("Пустой датасет")
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def load_dataset(
+    file_path: str, columns: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Загрузить датасет с индексом времени.
+
+    Если есть Parquet-копия, читаются только колонки `columns`; иначе
+    CSV разбирается как в `load_data` Merlion, также только с нужными
+    колонками. Колонки, которых нет в датасете, пропускаются, чтобы
+    ошибку о них выдала проверка алгоритма. `columns=None` - все колонки.
+
+    Разобранный датасет запоминается в `parsed_datasets` по пути, размеру
+    и времени изменения файла, поэтому повторная загрузка того же файла
+    не разбирает его. Возвращается поверхностная копия: добавление и
+    удаление колонок не меняют кэш.
+    """
+    columns = (
+        tuple(dict.fromkeys(c for c in columns if c is not None))
+        if columns is not None
+        else None
+    )
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns, columns)
+    df = parsed_datasets.get(key)
+    if df is None:
+        df = _read_dataset(file_path, columns)
+        parsed_datasets.put(key, df, int(df.memory_usage(deep=True).sum()))
+    return df.copy(deep=False)
+
+
+def _read_dataset(
+    file_path: str, columns: Optional[tuple[str, ...]]
+) -> pd.DataFrame:
+    path = columnar_path(file_path)
+    if os.path.exists(path):
+        try:
+            import pyarrow.parquet as pq
+
+            if columns is not None:
+                names = set(pq.read_schema(path).names)
+                columns = [c for c in columns if c in names]
+            return pd.read_parquet(path, columns=columns)
+        except Exception:
+            logger.warning(
+                f"Не удалось прочитать {path}, используется CSV-файл",
+                exc_info=True,
+            )
+
+    usecols = None
+    if columns is not None:
+        header = list(pd.read_csv(file_path, nrows=0).columns)
+        usecols = header[:1] + [c for c in columns if c in header[1:]]
+    return _parse_index(pd.read_csv(file_path, usecols=usecols))
@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Any
+
+CHUNK_SIZE = 1024 * 1024
+# Хэши, посчитанные при записи файла: (путь, размер, mtime) -> хэш
+_KNOWN_MAX = 1024
+_known: dict[tuple[str, int, int], str] = {}
+
+
+def file_sha256(path: str) -> str:
+    """Хэш содержимого файла.
+
+    Результат запоминается по пути, размеру и времени изменения файла,
+    поэтому повторное чтение файла происходит только после его изменения.
+    """
+    stat = os.stat(path)
+    digest = _known.get((path, stat.st_size, stat.st_mtime_ns))
+    if digest is not None:
+        return digest
+    return _file_sha256(path, stat.st_size, stat.st_mtime_ns)
+
+
+def remember_file_sha256(path: str, digest: str) -> None:
+    """Запомнить хэш файла, посчитанный при его записи, чтобы
+    `file_sha256` не читал файл повторно."""
+    stat = os.stat(path)
+    if len(_known) >= _KNOWN_MAX:
+        del _known[next(iter(_known))]
+    _known[(path, stat.st_size, stat.st_mtime_ns)] = digest
+
+
+@lru_cache(maxsize=1024)
+def _file_sha256(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def params_sha256(params: Any) -> str:
+    """Хэш параметров, не зависящий от порядка ключей словарей."""
+    dump = json.dumps(
+        params, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(dump.encode()).hexdigest()
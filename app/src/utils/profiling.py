@@ -0,0 +1,86 @@
+import math
+import os
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from models.dataset import ColumnProfile, DatasetProfile
+
+from .columnar import columnar_path, load_dataset
+
+
+def _number(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+def infer_frequency(index: pd.DatetimeIndex) -> Optional[str]:
+    """Частота ряда: по `pd.infer_freq`, а для неравномерного ряда -
+    по медиане интервалов между соседними метками времени."""
+    if len(index) < 3:
+        return None
+    try:
+        frequency = pd.infer_freq(index)
+    except (TypeError, ValueError):
+        frequency = None
+    if frequency is not None:
+        return frequency
+    deltas = np.diff(index.dropna().sort_values().asi8)
+    deltas = deltas[deltas > 0]
+    if not len(deltas):
+        return None
+    return to_offset(pd.Timedelta(int(np.median(deltas)))).freqstr
+
+
+def profile_column(name: str, values: pd.Series) -> ColumnProfile:
+    profile = ColumnProfile(
+        name=name,
+        dtype=str(values.dtype),
+        null_ratio=float(values.isna().mean()) if len(values) else 0.0,
+    )
+    if pd.api.types.is_numeric_dtype(
+        values
+    ) and not pd.api.types.is_bool_dtype(values):
+        profile.min = _number(values.min())
+        profile.max = _number(values.max())
+        profile.mean = _number(values.mean())
+    return profile
+
+
+def profile_dataset(file_path: str) -> DatasetProfile:
+    """Профиль датасета: количество строк, интервал и частота меток
+    времени, их упорядоченность и повторы, тип, доля пропусков, минимум,
+    максимум и среднее каждой колонки.
+
+    Если есть Parquet-копия, колонки читаются из нее по одной, иначе
+    датасет загружается целиком.
+    """
+    path = columnar_path(file_path)
+    read_column: Callable[[str], pd.Series]
+    if os.path.exists(path):
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(path)
+        index_columns = schema.pandas_metadata["index_columns"]
+        names = [name for name in schema.names if name not in index_columns]
+        index = pd.read_parquet(path, columns=[]).index
+
+        def read_column(name: str) -> pd.Series:
+            return pq.read_table(path, columns=[name]).column(0).to_pandas()
+
+    else:
+        df = load_dataset(file_path)
+        index, names = df.index, list(df.columns)
+        read_column = df.__getitem__
+
+    return DatasetProfile(
+        rows=len(index),
+        start=index.min() if len(index) else None,
+        end=index.max() if len(index) else None,
+        frequency=infer_frequency(index),
+        monotonic=index.is_monotonic_increasing,
+        duplicate_timestamps=int(index.duplicated().sum()),
+        columns=[profile_column(name, read_column(name)) for name in names],
+    )
@@ -1,13 +1,41 @@
-from merlion.utils.time_series import TimeSeries
+import os
+from typing import TYPE_CHECKING
+
+import pandas as pd
 
 from schemas.base import TimeseriesSchema
 
+if TYPE_CHECKING:
+    from merlion.utils.time_series import TimeSeries
+
 
-def serializer_timeseries_to_pydantic(ts: TimeSeries) -> TimeseriesSchema:
+def serializer_timeseries_to_pydantic(ts: "TimeSeries") -> TimeseriesSchema:
     """Преобразовать merlion TimeSeries в схему pydantic"""
     if ts is None:
         return None
-    df = ts.to_pd()
+    return serializer_dataframe_to_pydantic(ts.to_pd())
+
+
+def serializer_dataframe_to_pydantic(df: pd.DataFrame) -> TimeseriesSchema:
+    """Преобразовать DataFrame с индексом времени в схему pydantic"""
     return TimeseriesSchema(
         data=df.to_dict(orient="list"), index=df.index.tolist()
     )
+
+
+def deserializer_timeseries_from_pydantic(
+    ts: TimeseriesSchema,
+) -> pd.DataFrame:
+    """Преобразовать схему pydantic обратно в DataFrame"""
+    if ts is None:
+        return None
+    return pd.DataFrame(ts.data, index=pd.DatetimeIndex(ts.index))
+
+
+def directory_size(path: str) -> int:
+    """Суммарный размер файлов в папке в байтах."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
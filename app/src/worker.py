@@ -0,0 +1,99 @@
+import asyncio
+from functools import partial
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from core import executor, progress, scheduler, threads
+from core.config import settings
+from db import mongodb
+from services.anomaly import get_anomaly_service
+from services.cache import get_training_cache_service
+from services.forecast import get_forecast_service
+from services.job import JobWorker
+from services.merlion.warmup import preload_algorithms
+from services.registry import get_model_registry_service
+from storages.anomaly import get_anomaly_storage
+from storages.cache import get_training_cache_storage
+from storages.dataset import get_dataset_storage
+from storages.forecast import get_forecast_storage
+from storages.job import get_job_storage
+from storages.progress import get_progress_storage
+from storages.registry import get_model_registry_storage
+
+
+async def main():
+    mongodb.mongodb = AsyncIOMotorClient(settings.MONGODB.DSN)
+    executor.training_executor = executor.TrainingExecutor(
+        max_workers=settings.TRAINING.POOL_SIZE,
+        start_method=settings.TRAINING.START_METHOD,
+        timeout=settings.TRAINING.TIMEOUT,
+        memory_limit=settings.TRAINING.MEMORY_LIMIT_MB * 2**20,
+        memory_check_interval=settings.TRAINING.MEMORY_CHECK_INTERVAL,
+        initializer=(
+            partial(preload_algorithms, fit=settings.TRAINING.WARMUP_FIT)
+            if settings.TRAINING.PRELOAD
+            else None
+        ),
+        cpu_budget=threads.CpuBudget(
+            slots=settings.TRAINING.POOL_SIZE,
+            threads_per_job=settings.TRAINING.THREADS_PER_JOB,
+            affinity=settings.TRAINING.CPU_AFFINITY,
+        ),
+    )
+    executor.training_executor.start()
+    await executor.training_executor.wait_ready()
+    scheduler.training_scheduler = scheduler.TrainingScheduler(
+        max_running=settings.SCHEDULER.MAX_RUNNING,
+        user_max_running=settings.SCHEDULER.USER_MAX_RUNNING,
+        max_queue=settings.SCHEDULER.MAX_QUEUE,
+        retry_after=settings.SCHEDULER.RETRY_AFTER,
+        weights=settings.SCHEDULER.USER_WEIGHTS,
+    )
+
+    db = mongodb.get_db()
+    storage = get_job_storage(db=db)
+    await storage.create_indexes()
+    progress.progress_bus = progress.ProgressBus(
+        storage=(
+            get_progress_storage(db=db) if settings.PROGRESS.FANOUT else None
+        ),
+        poll_interval=settings.PROGRESS.POLL_INTERVAL,
+    )
+    if settings.PROGRESS.FANOUT:
+        await progress.progress_bus.storage.create_indexes()
+    dataset_storage = get_dataset_storage(db=db)
+    cache = get_training_cache_service(
+        storage=get_training_cache_storage(db=db)
+    )
+    registry_storage = get_model_registry_storage(db=db)
+    await registry_storage.create_indexes()
+    registry = get_model_registry_service(storage=registry_storage)
+
+    worker = JobWorker(
+        storage=storage,
+        forecast_service=get_forecast_service(
+            storage=get_forecast_storage(db=db),
+            dataset_storage=dataset_storage,
+            executor=executor.training_executor,
+            cache=cache,
+            registry=registry,
+            scheduler=scheduler.training_scheduler,
+        ),
+        anomaly_service=get_anomaly_service(
+            storage=get_anomaly_storage(db=db),
+            dataset_storage=dataset_storage,
+            executor=executor.training_executor,
+            cache=cache,
+            registry=registry,
+            scheduler=scheduler.training_scheduler,
+        ),
+    )
+    try:
+        await worker.run()
+    finally:
+        executor.training_executor.shutdown()
+        mongodb.mongodb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())